@@ -0,0 +1,214 @@
+"""시설 검색·리뷰 집계·회원 위치 컬럼 추가
+
+기존 배포 DB(init_db의 create_all로 만든 테이블)에 모델 변경분을 반영합니다.
+create_all은 이미 있는 테이블을 바꾸지 않으므로, 이 마이그레이션 없이는
+facilities / users 조회가 없는 컬럼 때문에 실패합니다.
+
+- facilities: source_key(유니크 인덱스, parse_facilities upsert의 ON CONFLICT 대상),
+  grid_cell(인덱스), sports, 리뷰 누적 합계/개수 컬럼
+- users: latitude, longitude
+- facility_sports(종목 역색인), facility_congestion_profiles 테이블
+- 기존 행 채우기: grid_cell(좌표에서 계산), facility_sports(sports에서),
+  리뷰 수·평균·합계/개수·세부 평균(facility_reviews 집계)
+
+이미 있는 컬럼·인덱스·테이블은 건너뛰므로, 일부만 수동으로 반영한 DB에도 실행할 수 있습니다.
+테이블이 아직 없는 새 DB는 init_db()가 모두 만들므로 `alembic stamp head`만 하면 됩니다.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+
+from alembic import context, op
+import numpy as np
+import sqlalchemy as sa
+
+from app.models.facility import sport_tokens
+from app.utils.geo import grid_cells
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+REVIEW_DIMENSIONS = ('cleanliness', 'equipment', 'staff', 'value')
+
+# 기존 행 채우기 청크 크기
+BACKFILL_CHUNK_SIZE = 10000
+
+
+def _facility_columns():
+    columns = [
+        sa.Column('source_key', sa.String(64), nullable=True),
+        sa.Column('grid_cell', sa.Integer(), nullable=True),
+        sa.Column('sports', sa.String(500), nullable=True),
+        sa.Column('rating_sum', sa.Float(), nullable=False, server_default='0'),
+    ]
+    for dimension in REVIEW_DIMENSIONS:
+        columns.append(sa.Column(f'{dimension}_sum', sa.Float(), nullable=False, server_default='0'))
+        columns.append(sa.Column(f'{dimension}_count', sa.Integer(), nullable=False, server_default='0'))
+    return columns
+
+
+def _add_missing_columns(inspector, table, columns):
+    existing = {column['name'] for column in inspector.get_columns(table)}
+    for column in columns:
+        if column.name not in existing:
+            op.add_column(table, column)
+
+
+def _create_missing_index(inspector, table, name, columns, unique=False):
+    if name not in {index['name'] for index in inspector.get_indexes(table)}:
+        op.create_index(name, table, columns, unique=unique)
+
+
+def _backfill_grid_cells(bind):
+    """좌표가 있는데 grid_cell이 비어 있는 시설 (모델 이벤트와 같은 app.utils.geo.grid_cells)"""
+    facilities = sa.table('facilities', sa.column('id'), sa.column('latitude'),
+                          sa.column('longitude'), sa.column('grid_cell'))
+    rows = bind.execute(
+        sa.select(facilities.c.id, facilities.c.latitude, facilities.c.longitude).where(
+            facilities.c.grid_cell.is_(None),
+            facilities.c.latitude.isnot(None),
+            facilities.c.longitude.isnot(None),
+        )
+    ).all()
+
+    stmt = facilities.update().where(facilities.c.id == sa.bindparam('facility_id')).values(
+        grid_cell=sa.bindparam('cell'))
+    for start in range(0, len(rows), BACKFILL_CHUNK_SIZE):
+        chunk = rows[start:start + BACKFILL_CHUNK_SIZE]
+        ids, lats, lons = zip(*chunk)
+        cells = grid_cells(np.asarray(lats, dtype=float), np.asarray(lons, dtype=float))
+        bind.execute(stmt, [{'facility_id': i, 'cell': int(c)} for i, c in zip(ids, cells)])
+
+
+def _backfill_sport_index(bind):
+    """역색인이 비어 있으면 facilities.sports로 채움"""
+    sports_table = sa.table('facility_sports', sa.column('sport'), sa.column('facility_id'))
+    if bind.execute(sa.select(sports_table.c.facility_id).limit(1)).first() is not None:
+        return
+
+    facilities = sa.table('facilities', sa.column('id'), sa.column('sports'))
+    rows = []
+    for facility_id, sports in bind.execute(
+        sa.select(facilities.c.id, facilities.c.sports).where(facilities.c.sports.isnot(None))
+    ):
+        rows.extend({'sport': token, 'facility_id': facility_id} for token in sport_tokens(sports))
+        if len(rows) >= BACKFILL_CHUNK_SIZE:
+            bind.execute(sports_table.insert(), rows)
+            rows = []
+    if rows:
+        bind.execute(sports_table.insert(), rows)
+
+
+def _backfill_review_sums(bind):
+    """
+    리뷰 수·평균·합계/개수·세부 평균을 facility_reviews에서 다시 집계 (이후 증분 갱신의 기준값)
+
+    예전 적재 스크립트가 total_reviews / average_rating에 임의 값을 넣었으므로
+    합계와 같은 UPDATE에서 함께 덮어써 증분 갱신이 일관된 상태에서 시작하게 합니다.
+    """
+    def aggregate(expression):
+        return f"(SELECT {expression} FROM facility_reviews r WHERE r.facility_id = facilities.id)"
+
+    count = aggregate('COUNT(*)')
+    rating_sum = aggregate('COALESCE(SUM(r.overall_rating), 0)')
+    assignments = [
+        f"total_reviews = {count}",
+        f"rating_sum = {rating_sum}",
+        f"average_rating = CASE WHEN {count} > 0 THEN {rating_sum} * 1.0 / {count} ELSE 0 END",
+    ]
+    for dimension in REVIEW_DIMENSIONS:
+        assignments.append(f"{dimension}_sum = {aggregate(f'COALESCE(SUM(r.{dimension}_rating), 0)')}")
+        assignments.append(f"{dimension}_count = {aggregate(f'COUNT(r.{dimension}_rating)')}")
+    op.execute(f"UPDATE facilities SET {', '.join(assignments)}")
+
+    # review_scores (항목별 평균 JSON, review_service._refresh_review_scores와 같은 형식)
+    columns = [f'{dimension}_{part}' for dimension in REVIEW_DIMENSIONS for part in ('sum', 'count')]
+    facilities = sa.table('facilities', sa.column('id'), sa.column('review_scores', sa.JSON),
+                          *[sa.column(name) for name in columns])
+    stmt = facilities.update().where(facilities.c.id == sa.bindparam('facility_id')).values(
+        review_scores=sa.bindparam('scores', type_=sa.JSON))
+
+    rows = bind.execute(sa.select(facilities.c.id, *[facilities.c[name] for name in columns])).all()
+    for start in range(0, len(rows), BACKFILL_CHUNK_SIZE):
+        bind.execute(stmt, [
+            {
+                'facility_id': row[0],
+                'scores': {
+                    dimension: round(row[1 + 2 * i] / row[2 + 2 * i], 2) if row[2 + 2 * i] else None
+                    for i, dimension in enumerate(REVIEW_DIMENSIONS)
+                },
+            }
+            for row in rows[start:start + BACKFILL_CHUNK_SIZE]
+        ])
+
+
+def upgrade() -> None:
+    if context.is_offline_mode():
+        raise RuntimeError("기존 컬럼·테이블을 확인해야 하므로 --sql(오프라인) 모드로는 실행할 수 없습니다")
+
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+    if 'facilities' not in tables:
+        # 새 DB: init_db()가 현재 모델로 모든 테이블을 만듦
+        return
+
+    # facilities
+    _add_missing_columns(inspector, 'facilities', _facility_columns())
+    inspector = sa.inspect(bind)
+    _create_missing_index(inspector, 'facilities', 'ix_facilities_source_key', ['source_key'], unique=True)
+    _create_missing_index(inspector, 'facilities', 'ix_facilities_grid_cell', ['grid_cell'])
+
+    # users
+    if 'users' in tables:
+        _add_missing_columns(inspector, 'users', [
+            sa.Column('latitude', sa.Float(), nullable=True),
+            sa.Column('longitude', sa.Float(), nullable=True),
+        ])
+
+    # 새 테이블
+    if 'facility_sports' not in tables:
+        op.create_table(
+            'facility_sports',
+            sa.Column('sport', sa.String(50), primary_key=True),
+            sa.Column('facility_id', sa.Integer(), sa.ForeignKey('facilities.id', ondelete='CASCADE'),
+                      primary_key=True),
+        )
+        op.create_index('ix_facility_sports_facility_id', 'facility_sports', ['facility_id'])
+
+    if 'facility_congestion_profiles' not in tables:
+        op.create_table(
+            'facility_congestion_profiles',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('facility_id', sa.Integer(), nullable=False),
+            sa.Column('scores', sa.LargeBinary(168), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+        )
+        op.create_index('ix_facility_congestion_profiles_id', 'facility_congestion_profiles', ['id'])
+        op.create_index('ix_facility_congestion_profiles_facility_id', 'facility_congestion_profiles',
+                        ['facility_id'], unique=True)
+
+    # 기존 행 채우기
+    _backfill_grid_cells(bind)
+    _backfill_sport_index(bind)
+    if 'facility_reviews' in tables:
+        _backfill_review_sums(bind)
+
+
+def downgrade() -> None:
+    op.drop_table('facility_congestion_profiles')
+    op.drop_table('facility_sports')
+
+    with op.batch_alter_table('users') as batch:
+        batch.drop_column('longitude')
+        batch.drop_column('latitude')
+
+    with op.batch_alter_table('facilities') as batch:
+        batch.drop_index('ix_facilities_grid_cell')
+        batch.drop_index('ix_facilities_source_key')
+        for column in reversed(_facility_columns()):
+            batch.drop_column(column.name)
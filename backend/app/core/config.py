@@ -45,6 +45,62 @@ class Settings(BaseSettings):
     FITDNA_REFERENCE_TABLE: str = "../fitdna_original_reference.pkl"
     EXERCISE_RECOMMENDATION_FILE: str = "../phase2_exercise_recommendation.csv"
 
+    # FIT-DNA 계산 결과 캐시 (동일 입력 재요청용 LRU)
+    FITDNA_RESULT_CACHE_SIZE: int = 1024
+
+    # (나이, 성별) 그룹별 FIT-DNA 계산기 캐시
+    FITDNA_SCORER_CACHE_SIZE: int = 256
+
+    # 참조 테이블 파일 변경 감시 주기 (초, 0이면 감시 안 함)
+    FITDNA_REFERENCE_WATCH_INTERVAL: float = 30.0
+
+    # Z-Score 계산 방식 ("mean": 평균·표준편차, "robust": 중앙값·MAD)
+    FITDNA_ZSCORE_METHOD: str = "mean"
+
+    # FIT-DNA 일괄 계산 (bulk 업로드 청크 크기)
+    FITDNA_BULK_CHUNK_SIZE: int = 5000
+
+    # 주변 시설 검색 방식
+    # ("grid": 메모리 격자 인덱스, "kdtree": 메모리 KD-tree, "sql": 위도/경도 범위 쿼리)
+    FACILITY_SEARCH_BACKEND: str = "grid"
+
+    # 주변 시설 검색 메모리 인덱스: DB 변경 확인 주기 (초)
+    FACILITY_INDEX_REFRESH_SECONDS: float = 60.0
+
+    # 시설 추천 랭킹 가중치 (거리, 평점, 현재 시간대 혼잡도, FIT-DNA 약점 종목 일치)
+    FACILITY_RANK_WEIGHT_DISTANCE: float = 0.4
+    FACILITY_RANK_WEIGHT_RATING: float = 0.2
+    FACILITY_RANK_WEIGHT_CONGESTION: float = 0.2
+    FACILITY_RANK_WEIGHT_FITDNA: float = 0.2
+
+    # 시설 주간 혼잡도 프로필 재집계 주기 (초, 0이면 끔)
+    CONGESTION_PROFILE_REFRESH_SECONDS: float = 3600.0
+
+    # 시설 리뷰 집계 보정 주기 (초, 0이면 끔)
+    REVIEW_RECONCILE_SECONDS: float = 21600.0
+
+    # 운동 메이트 매칭 워커 수 (앱 프로세스 내 비동기 워커, 0이면 매칭 요청을 처리하지 않음)
+    MATCHING_WORKERS: int = 2
+
+    # 계산 중('running') 상태로 이 시간(초)이 지난 매칭 요청은 워커가 죽은 것으로 보고 다시 큐에 넣음
+    # (미처리 요청 재등록 주기도 같은 값)
+    MATCHING_STALE_SECONDS: float = 300.0
+
+    # 운동 메이트 회원 벡터 인덱스: DB 변경 확인 주기 (초, 다른 워커 프로세스·세션 밖 쓰기 반영)
+    MEMBER_INDEX_REFRESH_SECONDS: float = 60.0
+
+    # 매칭 요청당 저장할 후보 수
+    MATCHING_MAX_CANDIDATES: int = 20
+
+    # 회원 벡터 인덱스에서 가져와 다중 요소 점수를 계산할 후보 수
+    MATCHING_CANDIDATE_POOL: int = 2000
+
+    # 매칭 점수 가중치 (체력 유사도, 선호 운동 일치, 선호 시간대 일치, 거리)
+    MATCHING_WEIGHT_FITDNA: float = 0.4
+    MATCHING_WEIGHT_EXERCISE: float = 0.25
+    MATCHING_WEIGHT_TIME: float = 0.2
+    MATCHING_WEIGHT_LOCATION: float = 0.15
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -7,9 +7,11 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
+import asyncio
 import os
 
 from app.core.config import settings
+from app.services import fitdna_service, facility_search, congestion_service, review_service, matching_service, member_index
 from app.routers import (
     auth,
     fitdna,
@@ -47,6 +49,47 @@ app.include_router(matching.router, prefix="/api/matching", tags=["운동 메이
 app.include_router(reports.router, prefix="/api/reports", tags=["마이페이지 리포트"])
 
 
+# 백그라운드 작업 (참조 시 GC로 사라지지 않도록 보관)
+_background_tasks = set()
+
+
+def _start_background_task(coro):
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+@app.on_event("startup")
+async def startup():
+    """
+    시작 시 백그라운드 작업 등록
+    - FIT-DNA 참조 테이블 로드 (+ 파일 변경 감시)
+    - 시설 검색 인덱스 생성
+    - 혼잡도 프로필 주기 집계
+    - 리뷰 집계 보정
+    - 회원 벡터 인덱스 생성 + 매칭 워커
+    """
+    _start_background_task(fitdna_service.load_reference_table_async())
+    _start_background_task(facility_search.build_facility_index_async())
+    if settings.FITDNA_REFERENCE_WATCH_INTERVAL > 0:
+        _start_background_task(
+            fitdna_service.watch_reference_table(settings.FITDNA_REFERENCE_WATCH_INTERVAL)
+        )
+    if settings.CONGESTION_PROFILE_REFRESH_SECONDS > 0:
+        _start_background_task(
+            congestion_service.refresh_congestion_profiles_periodically(settings.CONGESTION_PROFILE_REFRESH_SECONDS)
+        )
+    if settings.REVIEW_RECONCILE_SECONDS > 0:
+        _start_background_task(
+            review_service.reconcile_review_aggregates_periodically(settings.REVIEW_RECONCILE_SECONDS)
+        )
+    if settings.MATCHING_WORKERS > 0:
+        _start_background_task(member_index.build_member_index_async())
+        for _ in range(settings.MATCHING_WORKERS):
+            _start_background_task(matching_service.matching_worker())
+        _start_background_task(matching_service.requeue_processing_requests())
+
+
 @app.get("/")
 async def root():
     """루트 엔드포인트"""
@@ -59,8 +102,12 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """헬스 체크"""
-    return {"status": "healthy"}
+    """헬스 체크 (FIT-DNA 참조 테이블 준비 여부 포함)"""
+    return {
+        "status": "healthy",
+        "fitdna_reference_ready": fitdna_service.is_reference_table_ready(),
+        "fitdna_reference_version": fitdna_service.get_reference_table_version(),
+    }
 
 
 # 정적 파일 서빙 (웹 디렉토리)
@@ -7,7 +7,7 @@ from .user import User, GenderEnum
 from .fitness import FitnessMeasurement, FitDNAResult, LifestyleSurvey
 from .workout import WorkoutSession, UserGoal
 from .daily_health import DailyCondition, InjuryRisk, PreventionRoutine
-from .facility import Facility, FacilityReview, FacilityCongestion
+from .facility import Facility, FacilitySport, FacilityReview, FacilityCongestion, FacilityCongestionProfile
 from .matching import MatchingPreference, Match, MatchRequest, MatchStatusEnum
 
 __all__ = [
@@ -24,8 +24,10 @@ __all__ = [
     "InjuryRisk",
     "PreventionRoutine",
     "Facility",
+    "FacilitySport",
     "FacilityReview",
     "FacilityCongestion",
+    "FacilityCongestionProfile",
     "MatchingPreference",
     "Match",
     "MatchRequest",
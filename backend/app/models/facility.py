@@ -2,8 +2,11 @@
 운동 시설 관련 모델
 """
 
-from sqlalchemy import Column, Integer, String, Float, Boolean, JSON, Text
+import re
+
+from sqlalchemy import Column, Integer, String, Float, Boolean, JSON, Text, LargeBinary, ForeignKey, event, inspect
 from .base import Base, TimestampMixin
+from app.utils.geo import grid_cell
 
 
 class Facility(Base, TimestampMixin):
@@ -12,6 +15,9 @@ class Facility(Base, TimestampMixin):
 
     id = Column(Integer, primary_key=True, index=True)
 
+    # 원본 데이터 식별 키 (parse_facilities.facility_source_key, 재적재 시 upsert 기준)
+    source_key = Column(String(64), unique=True, nullable=True, index=True)
+
     # 기본 정보
     name = Column(String(200), nullable=False, index=True)
     facility_type = Column(String(50), nullable=False, index=True)  # 'gym', 'pool', 'park', 'running'
@@ -20,6 +26,10 @@ class Facility(Base, TimestampMixin):
     address = Column(String(500), nullable=False)
     latitude = Column(Float, nullable=False, index=True)
     longitude = Column(Float, nullable=False, index=True)
+    grid_cell = Column(Integer, nullable=True, index=True)  # 위도/경도 격자 키 (app.utils.geo.grid_cell, 저장 시 자동 갱신)
+
+    # 운동 종목
+    sports = Column(String(500), nullable=True)  # "헬스,수영,요가"
 
     # 연락처
     phone = Column(String(50), nullable=True)
@@ -39,11 +49,22 @@ class Facility(Base, TimestampMixin):
     # 프로그램 정보 (JSON)
     programs = Column(JSON, nullable=True)  # [{"name": "요가", "time": "월수금 10:00-11:00", ...}]
 
-    # 평점 및 리뷰
+    # 평점 및 리뷰 (리뷰 작성/삭제 시 증분 갱신, app.services.review_service)
     average_rating = Column(Float, default=0.0)
     total_reviews = Column(Integer, default=0)
     review_scores = Column(JSON, nullable=True)  # {"cleanliness": 4.5, "equipment": 4.3, ...}
 
+    # 리뷰 누적 합계 (평균 = 합계 / 개수, 세부 항목은 입력한 리뷰만 개수에 포함)
+    rating_sum = Column(Float, default=0.0, nullable=False)
+    cleanliness_sum = Column(Float, default=0.0, nullable=False)
+    cleanliness_count = Column(Integer, default=0, nullable=False)
+    equipment_sum = Column(Float, default=0.0, nullable=False)
+    equipment_count = Column(Integer, default=0, nullable=False)
+    staff_sum = Column(Float, default=0.0, nullable=False)
+    staff_count = Column(Integer, default=0, nullable=False)
+    value_sum = Column(Float, default=0.0, nullable=False)
+    value_count = Column(Integer, default=0, nullable=False)
+
     # 썸네일
     thumbnail = Column(String(500), nullable=True)
 
@@ -54,6 +75,48 @@ class Facility(Base, TimestampMixin):
         return f"<Facility(id={self.id}, name={self.name}, type={self.facility_type})>"
 
 
+@event.listens_for(Facility, "before_insert")
+@event.listens_for(Facility, "before_update")
+def _update_facility_grid_cell(mapper, connection, target):
+    """좌표가 바뀌면 격자 키도 함께 갱신"""
+    if target.latitude is not None and target.longitude is not None:
+        target.grid_cell = grid_cell(target.latitude, target.longitude)
+
+
+class FacilitySport(Base):
+    """시설 운동 종목 역색인 (종목 → 시설 ID 목록)"""
+    __tablename__ = "facility_sports"
+
+    # (sport, facility_id) 기본 키 = 종목별 시설 ID 정렬 목록
+    sport = Column(String(50), primary_key=True)
+    facility_id = Column(Integer, ForeignKey("facilities.id", ondelete="CASCADE"), primary_key=True, index=True)
+
+    def __repr__(self):
+        return f"<FacilitySport(sport={self.sport}, facility_id={self.facility_id})>"
+
+
+def sport_tokens(sports) -> list:
+    """종목 문자열("농구, 축구") → 정규화된 종목 토큰 목록 (중복 제거, 순서 유지)"""
+    if not sports:
+        return []
+    tokens = (token.strip().lower() for token in re.split(r'[,/]', sports))
+    return list(dict.fromkeys(token[:50] for token in tokens if token))
+
+
+@event.listens_for(Facility, "after_insert")
+@event.listens_for(Facility, "after_update")
+def _update_facility_sports_index(mapper, connection, target):
+    """종목이 바뀌면 역색인 행도 함께 갱신"""
+    if not inspect(target).attrs.sports.history.has_changes():
+        return
+
+    table = FacilitySport.__table__
+    connection.execute(table.delete().where(table.c.facility_id == target.id))
+    tokens = sport_tokens(target.sports)
+    if tokens:
+        connection.execute(table.insert(), [{"sport": token, "facility_id": target.id} for token in tokens])
+
+
 class FacilityReview(Base, TimestampMixin):
     """시설 리뷰"""
     __tablename__ = "facility_reviews"
@@ -99,3 +162,20 @@ class FacilityCongestion(Base, TimestampMixin):
 
     def __repr__(self):
         return f"<FacilityCongestion(facility_id={self.facility_id}, day={self.day_of_week}, hour={self.hour})>"
+
+
+class FacilityCongestionProfile(Base, TimestampMixin):
+    """
+    시설 주간 혼잡도 프로필 (facility_congestion 집계, 시설당 1행)
+
+    scores: 요일(0=월요일)×시간(0-23) 168칸 uint8 배열 (혼잡도 0-10을 ×10 저장, 255=데이터 없음)
+    app.services.congestion_service 참고
+    """
+    __tablename__ = "facility_congestion_profiles"
+
+    id = Column(Integer, primary_key=True, index=True)
+    facility_id = Column(Integer, unique=True, nullable=False, index=True)
+    scores = Column(LargeBinary(168), nullable=False)
+
+    def __repr__(self):
+        return f"<FacilityCongestionProfile(facility_id={self.facility_id})>"
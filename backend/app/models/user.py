@@ -41,6 +41,10 @@ class User(Base, TimestampMixin):
     # 가입일
     joined_date = Column(Date, nullable=True)
 
+    # 활동 위치 (운동 메이트 매칭 반경 검색용)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+
     # 현재 FIT-DNA (최신 검사 결과에서 참조)
     current_fitdna_type = Column(String(10), nullable=True)  # PFE, PSE, etc.
 
@@ -5,15 +5,21 @@
 - 날씨 기반 운동 추천
 """
 
+from datetime import datetime
+
+import numpy as np
 from fastapi import APIRouter, Query, Depends, HTTPException
-from pydantic import BaseModel
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-import math
 
 from app.core.database import get_db
-from app.models import Facility
+from app.models import Facility, FacilityReview, User
+from app.services import congestion_service, facility_recommendation, review_service
+from app.services.facility_search import search_nearby_facilities, search_nearest_facilities
+from app.utils.geo import haversine_km
 
 router = APIRouter()
 
@@ -27,21 +33,22 @@ class LocationInput(BaseModel):
     radius_km: float = 2.0  # 기본 2km
 
 
+class ReviewInput(BaseModel):
+    """시설 리뷰 입력"""
+    user_id: int
+    overall_rating: float = Field(..., ge=1.0, le=5.0)
+    cleanliness_rating: Optional[float] = Field(None, ge=1.0, le=5.0)
+    equipment_rating: Optional[float] = Field(None, ge=1.0, le=5.0)
+    staff_rating: Optional[float] = Field(None, ge=1.0, le=5.0)
+    value_rating: Optional[float] = Field(None, ge=1.0, le=5.0)
+    comment: Optional[str] = None
+
+
 # ===== API 엔드포인트 =====
 
 def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """두 지점 사이의 거리 계산 (Haversine formula, km 단위)"""
-    R = 6371  # 지구 반지름 (km)
-
-    lat1_rad = math.radians(lat1)
-    lat2_rad = math.radians(lat2)
-    delta_lat = math.radians(lat2 - lat1)
-    delta_lon = math.radians(lon2 - lon1)
-
-    a = math.sin(delta_lat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon/2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-
-    return R * c
+    return haversine_km(lat1, lon1, lat2, lon2)
 
 
 @router.get("/nearby")
@@ -50,46 +57,42 @@ async def get_nearby_facilities(
     lon: float = Query(..., description="경도"),
     radius: float = Query(2.0, description="반경 (km)"),
     limit: int = Query(10, description="최대 결과 수"),
-    sports: Optional[str] = Query(None, description="운동 종목 필터 (예: 농구, 축구)"),
+    sports: Optional[str] = Query(None, description="운동 종목 필터 (쉼표로 여러 개, 예: 농구, 축구)"),
+    nearest: bool = Query(False, description="반경 안에서 가까운 순 limit개 (KD-tree k-최근접 검색)"),
     db: Session = Depends(get_db)
 ):
     """
     GPS 기반 주변 운동시설 조회
     - 헬스장/수영장/공원/러닝코스 등
     - 거리순 정렬
+    - 격자 인덱스로 반경을 덮는 격자의 시설만 거리 계산
+    - nearest=true: KD-tree로 가까운 시설부터 limit개만 탐색 (반경은 최대 거리)
     """
+    if not -90 <= lat <= 90 or not -180 <= lon <= 180:
+        raise HTTPException(status_code=400, detail="위도는 -90~90, 경도는 -180~180 범위여야 합니다")
 
-    # 모든 시설 조회
-    query = db.query(Facility)
-
-    # 운동 종목 필터링
-    if sports:
-        query = query.filter(Facility.sports.contains(sports))
-
-    facilities = query.limit(1000).all()  # 일단 1000개만 가져옴
+    if nearest:
+        results = await run_in_threadpool(
+            search_nearest_facilities, db, lat, lon, limit, sports, radius
+        )
+    else:
+        results = await run_in_threadpool(
+            search_nearby_facilities, db, lat, lon, radius, limit, sports
+        )
 
-    # 거리 계산 및 필터링
-    facilities_with_distance = []
-    for facility in facilities:
-        distance = calculate_distance(lat, lon, facility.latitude, facility.longitude)
-
-        if distance <= radius:
-            facilities_with_distance.append({
-                "id": facility.id,
-                "name": facility.name,
-                "type": facility.category,
-                "distance_km": round(distance, 2),
-                "address": facility.address,
-                "sports": facility.sports,
-                "latitude": facility.latitude,
-                "longitude": facility.longitude
-            })
-
-    # 거리순 정렬
-    facilities_with_distance.sort(key=lambda x: x['distance_km'])
-
-    # 제한
-    facilities_with_distance = facilities_with_distance[:limit]
+    facilities_with_distance = [
+        {
+            "id": facility.id,
+            "name": facility.name,
+            "type": facility.facility_type,
+            "distance_km": round(distance, 2),
+            "address": facility.address,
+            "sports": facility.sports,
+            "latitude": facility.latitude,
+            "longitude": facility.longitude
+        }
+        for facility, distance in results
+    ]
 
     return {
         "location": {"latitude": lat, "longitude": lon},
@@ -99,43 +102,58 @@ async def get_nearby_facilities(
     }
 
 
-@router.get("/{facility_id}")
-async def get_facility_detail(facility_id: int, db: Session = Depends(get_db)):
+@router.get("/recommend")
+async def recommend_facilities(
+    lat: float = Query(..., description="위도"),
+    lon: float = Query(..., description="경도"),
+    radius: float = Query(2.0, gt=0, description="반경 (km)"),
+    limit: int = Query(10, ge=1, le=100, description="최대 결과 수"),
+    user_id: Optional[int] = Query(None, description="사용자 ID (현재 FIT-DNA 유형 사용)"),
+    fitdna_type: Optional[str] = Query(None, description="FIT-DNA 유형 (user_id보다 우선, 예: PSQ)"),
+    sports: Optional[str] = Query(None, description="운동 종목 필터 (쉼표로 여러 개, 예: 농구, 축구)"),
+    w_distance: Optional[float] = Query(None, ge=0, description="거리 가중치"),
+    w_rating: Optional[float] = Query(None, ge=0, description="평점 가중치"),
+    w_congestion: Optional[float] = Query(None, ge=0, description="혼잡도 가중치"),
+    w_fitdna: Optional[float] = Query(None, ge=0, description="FIT-DNA 약점 종목 가중치"),
+    db: Session = Depends(get_db)
+):
     """
-    시설 상세 정보
-    - 혼잡도, 가격, 운영시간, 프로그램 정보
-    - 사용자 리뷰 기반 점수
-    - 접근성 점수 (거리·날씨·혼잡도 기반)
+    맞춤 시설 추천
+    - 반경 내 시설을 거리·평점·현재 시간대 혼잡도·FIT-DNA 약점 보완 종목으로 점수화
+    - 가중치는 설정값(FACILITY_RANK_WEIGHT_*)을 쓰고 w_* 파라미터로 바꿀 수 있음
     """
+    if not -90 <= lat <= 90 or not -180 <= lon <= 180:
+        raise HTTPException(status_code=400, detail="위도는 -90~90, 경도는 -180~180 범위여야 합니다")
 
-    facility = db.query(Facility).filter(Facility.id == facility_id).first()
-    if not facility:
-        raise HTTPException(status_code=404, detail="Facility not found")
+    if fitdna_type is None and user_id is not None:
+        user = db.query(User.current_fitdna_type).filter(User.id == user_id).first()
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        fitdna_type = user.current_fitdna_type
+
+    weights = {
+        name: value for name, value in (
+            ("distance", w_distance), ("rating", w_rating),
+            ("congestion", w_congestion), ("fitdna", w_fitdna)
+        ) if value is not None
+    }
+    results = await run_in_threadpool(
+        facility_recommendation.recommend_facilities,
+        db, lat, lon, radius, limit, fitdna_type, sports, weights
+    )
 
     return {
-        "id": facility.id,
-        "name": facility.name,
-        "type": facility.category,
-        "basic_info": {
-            "address": facility.address,
-            "sports": facility.sports,
-            "latitude": facility.latitude,
-            "longitude": facility.longitude
-        },
-        "operating_hours": facility.operating_hours if facility.operating_hours else {
-            "weekday": "미정",
-            "weekend": "미정"
-        },
-        "pricing": facility.pricing if facility.pricing else {
-            "info": "가격 정보 없음"
-        },
-        "reviews": {
-            "average_rating": facility.average_rating if facility.average_rating else 0.0,
-            "total_reviews": 0
-        }
+        "location": {"latitude": lat, "longitude": lon},
+        "radius_km": radius,
+        "fitdna_type": fitdna_type,
+        "weakness_axes": facility_recommendation.weakness_axes(fitdna_type),
+        "weights": {**facility_recommendation.default_weights(), **weights},
+        "facilities": results,
+        "total_count": len(results)
     }
 
 
+# 고정 경로는 /{facility_id}보다 먼저 등록 (뒤에 있으면 /{facility_id}가 먼저 매칭되어 422)
 @router.get("/weather-recommendation")
 async def get_weather_based_recommendation(
     lat: float = Query(..., description="위도"),
@@ -194,3 +212,132 @@ async def get_weather_based_recommendation(
         },
         "overall_suggestion": "오늘은 야외 운동하기 좋은 날씨입니다! 러닝이나 사이클링을 추천합니다."
     }
+
+
+@router.get("/{facility_id}")
+async def get_facility_detail(facility_id: int, db: Session = Depends(get_db)):
+    """
+    시설 상세 정보
+    - 혼잡도, 가격, 운영시간, 프로그램 정보
+    - 사용자 리뷰 기반 점수
+    - 접근성 점수 (거리·날씨·혼잡도 기반)
+    """
+
+    facility = db.query(Facility).filter(Facility.id == facility_id).first()
+    if not facility:
+        raise HTTPException(status_code=404, detail="Facility not found")
+
+    return {
+        "id": facility.id,
+        "name": facility.name,
+        "type": facility.facility_type,
+        "basic_info": {
+            "address": facility.address,
+            "sports": facility.sports,
+            "latitude": facility.latitude,
+            "longitude": facility.longitude
+        },
+        "operating_hours": facility.operating_hours if facility.operating_hours else {
+            "weekday": "미정",
+            "weekend": "미정"
+        },
+        "pricing": facility.pricing if facility.pricing else {
+            "info": "가격 정보 없음"
+        },
+        "reviews": review_service.review_summary(facility)
+    }
+
+
+@router.get("/{facility_id}/congestion")
+async def get_facility_congestion(
+    facility_id: int,
+    hours: int = Query(24, ge=1, le=168, description="추천할 시간 범위 (지금부터 N시간)"),
+    top: int = Query(3, ge=1, le=24, description="추천 시간대 수"),
+    db: Session = Depends(get_db)
+):
+    """
+    시설 혼잡도
+    - 요일(월~일)×시간(0~23) 주간 혼잡도 (0~10, 데이터 없는 시간은 null)
+    - 현재 시간대 혼잡도
+    - 지금부터 hours시간 안에서 가장 한산한 시간대 top개
+    """
+    facility = db.query(Facility.id, Facility.name).filter(Facility.id == facility_id).first()
+    if not facility:
+        raise HTTPException(status_code=404, detail="Facility not found")
+
+    profile = congestion_service.get_week_profile(db, facility_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Congestion data not found")
+
+    now = datetime.now()
+    current_score = profile[now.weekday(), now.hour]
+    current_score = None if np.isnan(current_score) else float(current_score)
+
+    return {
+        "facility_id": facility.id,
+        "name": facility.name,
+        "current": {
+            "day_of_week": now.weekday(),
+            "hour": now.hour,
+            "score": current_score,
+            "level": congestion_service.congestion_level(current_score)
+        },
+        "week_profile": [
+            {
+                "day_of_week": day,
+                "day_name": congestion_service.DAY_NAMES[day],
+                "scores": [None if np.isnan(score) else float(score) for score in profile[day]]
+            }
+            for day in range(congestion_service.DAYS)
+        ],
+        "best_times": congestion_service.least_crowded_slots(profile, now, hours, top)
+    }
+
+
+@router.post("/{facility_id}/reviews")
+async def create_facility_review(facility_id: int, data: ReviewInput, db: Session = Depends(get_db)):
+    """
+    시설 리뷰 작성
+    - 시설의 리뷰 수·평점·항목별 점수를 증분 갱신
+    """
+    if not db.query(Facility.id).filter(Facility.id == facility_id).first():
+        raise HTTPException(status_code=404, detail="Facility not found")
+
+    review = review_service.add_review(
+        db, facility_id, data.user_id, data.overall_rating, data.comment,
+        cleanliness=data.cleanliness_rating,
+        equipment=data.equipment_rating,
+        staff=data.staff_rating,
+        value=data.value_rating
+    )
+    facility = db.query(Facility).filter(Facility.id == facility_id).first()
+
+    return {
+        "message": "리뷰 저장 완료",
+        "review_id": review.id,
+        "reviews": review_service.review_summary(facility)
+    }
+
+
+@router.delete("/{facility_id}/reviews/{review_id}")
+async def delete_facility_review(facility_id: int, review_id: int, user_id: int, db: Session = Depends(get_db)):
+    """
+    시설 리뷰 삭제 (작성자만)
+    - 시설 집계에서 해당 리뷰를 뺌
+    """
+    review = db.query(FacilityReview).filter(
+        FacilityReview.id == review_id,
+        FacilityReview.facility_id == facility_id
+    ).first()
+    if not review:
+        raise HTTPException(status_code=404, detail="Review not found")
+    if review.user_id != user_id:
+        raise HTTPException(status_code=403, detail="본인이 작성한 리뷰만 삭제할 수 있습니다")
+
+    review_service.delete_review(db, review)
+    facility = db.query(Facility).filter(Facility.id == facility_id).first()
+
+    return {
+        "message": "리뷰 삭제 완료",
+        "reviews": review_service.review_summary(facility)
+    }
@@ -6,16 +6,28 @@ FIT-DNA 체력 유형 검사 API
 - 결과 조회 (유형, 강점/약점, 추천 운동, 루틴)
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
+from datetime import date
 from sqlalchemy.orm import Session
+import csv
+import io
+import json
+import math
+import tempfile
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.models import User, FitnessMeasurement, FitDNAResult
 from app.services.fitdna_service import (
-    calculate_user_fitdna,
+    calculate_user_fitdna_cached,
+    calculate_fitdna_rows,
+    get_fitdna_cache_stats,
     get_fitdna_strengths_weaknesses,
+    reload_reference_table,
     zscore_to_score_0_10
 )
 
@@ -43,6 +55,14 @@ class FitnessMeasurementsInput(BaseModel):
     shuttle_run: Optional[int] = None  # 왕복오래달리기 - 회
 
 
+class FitDNACalculateInput(BaseModel):
+    """FIT-DNA 계산 요청"""
+    user_id: Optional[int] = None  # 지정 시 측정값·결과를 DB에 저장
+    age: int
+    gender: str  # 'M' or 'F'
+    measurements: FitnessMeasurementsInput
+
+
 class LifestyleSurveyInput(BaseModel):
     """라이프스타일 설문"""
     exercise_frequency: int  # 주당 운동 횟수
@@ -94,20 +114,287 @@ async def submit_survey(data: LifestyleSurveyInput):
 
 
 @router.post("/calculate")
-async def calculate_fitdna():
+async def calculate_fitdna(data: FitDNACalculateInput, db: Session = Depends(get_db)):
     """
     FIT-DNA 유형 계산
-    - 기본 정보 + 측정값 + 설문을 종합하여 유형 계산
+    - 나이·성별 + 측정값으로 유형 계산 (fitdna_from_measurements.py)
+    - user_id가 있으면 측정값(FitnessMeasurement)과 결과(FitDNAResult)를 한 트랜잭션으로 저장
+    - 동일 입력 재요청은 캐시된 계산 결과 사용
     """
-    # TODO: fitdna_from_measurements.py 연동
+    measurements = {k: v for k, v in data.measurements.dict().items() if v is not None}
+
+    # CPU 연산은 이벤트 루프 밖(스레드풀)에서 실행
+    try:
+        result = await run_in_threadpool(
+            calculate_user_fitdna_cached, data.age, data.gender, measurements
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    strengths, weaknesses = get_fitdna_strengths_weaknesses(
+        result['strength_z'], result['flexibility_z'], result['endurance_z']
+    )
+
+    response = {
+        "fitdna_type": result['fitdna_type'],
+        "type_name": result['type_name'],
+        "description": result['description'],
+        "levels": {
+            "strength": result['strength_level'],
+            "flexibility": result['flexibility_level'],
+            "endurance": result['endurance_level']
+        },
+        "zscores": {
+            "strength": result['strength_z'],
+            "flexibility": result['flexibility_z'],
+            "endurance": result['endurance_z']
+        },
+        "scores": {
+            "strength": zscore_to_score_0_10(result['strength_z']),
+            "flexibility": zscore_to_score_0_10(result['flexibility_z']),
+            "endurance": zscore_to_score_0_10(result['endurance_z'])
+        },
+        "strengths": strengths,
+        "weaknesses": weaknesses,
+        "percentiles": result['percentiles'],
+        "measurements_used": result['measurements_used']
+    }
+
+    if data.user_id is not None:
+        saved = await run_in_threadpool(
+            _save_fitdna_result, db, data.user_id, measurements, response
+        )
+        response.update(saved)
+
+    return response
+
+
+def _save_fitdna_result(db: Session, user_id: int, measurements: Dict, response: Dict) -> Dict:
+    """측정값 + FIT-DNA 결과 저장 (단일 트랜잭션)"""
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    today = date.today()
+
+    # 재시도 요청: 오늘 같은 측정값으로 저장된 현재 결과가 있으면 그대로 반환
+    current = db.query(FitDNAResult).filter(
+        FitDNAResult.user_id == user_id,
+        FitDNAResult.is_current == 1,
+        FitDNAResult.test_date == today
+    ).order_by(FitDNAResult.id.desc()).first()
+    if current and current.measurement and _same_measurements(current.measurement, measurements):
+        return {
+            "user_id": user_id,
+            "measurement_id": current.measurement_id,
+            "result_id": current.id
+        }
+
+    try:
+        measurement = FitnessMeasurement(
+            user_id=user_id,
+            measurement_date=today,
+            strength_zscore=response['zscores']['strength'],
+            flexibility_zscore=response['zscores']['flexibility'],
+            endurance_zscore=response['zscores']['endurance'],
+            **measurements
+        )
+        db.add(measurement)
+        db.flush()  # measurement.id 확보
+
+        # 이전 결과는 과거 기록으로 전환
+        db.query(FitDNAResult).filter(
+            FitDNAResult.user_id == user_id,
+            FitDNAResult.is_current == 1
+        ).update({FitDNAResult.is_current: 0}, synchronize_session=False)
+
+        fitdna_result = FitDNAResult(
+            user_id=user_id,
+            measurement_id=measurement.id,
+            test_date=today,
+            fitdna_type=response['fitdna_type'],
+            fitdna_name=response['type_name'],
+            strength_score=response['scores']['strength'],
+            flexibility_score=response['scores']['flexibility'],
+            endurance_score=response['scores']['endurance'],
+            strengths=response['strengths'],
+            weaknesses=response['weaknesses'],
+            is_current=1
+        )
+        db.add(fitdna_result)
+
+        user.current_fitdna_type = response['fitdna_type']
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
     return {
-        "fitdna_type": "PFE",
-        "type_name": "파워 애슬리트",
-        "description": "근력과 지구력이 뛰어난 유형",
-        "message": "계산 로직 구현 예정"
+        "user_id": user_id,
+        "measurement_id": measurement.id,
+        "result_id": fitdna_result.id
     }
 
 
+def _same_measurements(measurement: FitnessMeasurement, measurements: Dict) -> bool:
+    """저장된 측정 기록과 입력 측정값이 같은지 비교"""
+    for field in FitnessMeasurementsInput.model_fields:
+        stored = getattr(measurement, field)
+        value = measurements.get(field)
+        if (stored is None) != (value is None):
+            return False
+        if stored is not None and float(stored) != float(value):
+            return False
+    return True
+
+
+@router.post("/calculate/bulk")
+async def calculate_fitdna_bulk(
+    request: Request,
+    format: Optional[str] = Query(None, description="'ndjson' 또는 'csv' (기본: Content-Type 기준)")
+):
+    """
+    FIT-DNA 일괄 계산 (제휴 체육관 단체 업로드)
+    - 요청 본문: NDJSON 또는 CSV (행마다 age, gender, 측정 항목, 선택적으로 id)
+    - 응답: NDJSON 스트리밍, 청크 단위로 계산이 끝날 때마다 전송
+    - 행 단위 오류(필수 측정값 누락 등)는 해당 행에 error로 표시하고 계속 진행
+    - 마지막 줄은 요약 {"summary": {"total", "scored", "errors"}}
+    """
+    if format is None:
+        content_type = request.headers.get('content-type', '')
+        format = 'csv' if 'csv' in content_type else 'ndjson'
+    if format not in ('ndjson', 'csv'):
+        raise HTTPException(status_code=400, detail="format은 'ndjson' 또는 'csv'여야 합니다")
+
+    # 업로드를 임시 파일에 받아 둔 뒤(일정 크기 이상은 디스크) 청크 단위로 읽음
+    upload = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    async for data in request.stream():
+        upload.write(data)
+    upload.seek(0)
+
+    return StreamingResponse(
+        _iter_bulk_results(upload, format),
+        media_type="application/x-ndjson"
+    )
+
+
+def _iter_bulk_records(upload, format: str) -> Iterator[Dict]:
+    """업로드 파일 → 행 레코드 (NDJSON 한 줄 / CSV 한 행씩)"""
+    text = io.TextIOWrapper(upload, encoding='utf-8-sig', newline='')
+
+    if format == 'csv':
+        for record in csv.DictReader(text):
+            yield record
+        return
+
+    for line in text:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            record = {'_error': f"JSON 파싱 실패: {e.msg}"}
+        if not isinstance(record, dict):
+            record = {'_error': "각 줄은 JSON 객체여야 합니다"}
+        yield record
+
+
+# 일괄 업로드 나이 허용 범위 (범위를 벗어난 값은 int64 변환 전에 행 오류로 처리)
+BULK_AGE_MIN = 0
+BULK_AGE_MAX = 150
+
+
+def _parse_bulk_record(record: Dict) -> Dict:
+    """업로드 레코드 → {'age', 'gender', 'measurements'} (잘못된 값은 ValueError)"""
+    if '_error' in record:
+        raise ValueError(record['_error'])
+
+    try:
+        age = float(record.get('age'))
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("age가 올바르지 않습니다")
+    if not math.isfinite(age) or not BULK_AGE_MIN <= age <= BULK_AGE_MAX:
+        raise ValueError(f"age는 {BULK_AGE_MIN}~{BULK_AGE_MAX} 사이여야 합니다")
+    if age != int(age):
+        raise ValueError("age는 정수여야 합니다")
+
+    gender = str(record.get('gender') or '').strip().upper()
+    if gender not in ('M', 'F'):
+        raise ValueError("gender는 'M' 또는 'F'여야 합니다")
+
+    values = record.get('measurements')
+    if not isinstance(values, dict):
+        values = record
+
+    measurements = {}
+    for field in FitnessMeasurementsInput.model_fields:
+        value = values.get(field)
+        if value is None or value == '':
+            continue
+        try:
+            value = float(value)
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError(f"{field} 값이 올바르지 않습니다: {value}")
+        if not math.isfinite(value):
+            raise ValueError(f"{field} 값이 올바르지 않습니다: {value}")
+        measurements[field] = value
+
+    return {'age': int(age), 'gender': gender, 'measurements': measurements}
+
+
+def _iter_bulk_results(upload, format: str) -> Iterator[str]:
+    """
+    레코드를 청크로 모아 일괄 계산하고 NDJSON 줄 생성
+    (동기 제너레이터 → StreamingResponse가 스레드풀에서 실행)
+    """
+    chunk_size = settings.FITDNA_BULK_CHUNK_SIZE
+    total = scored = errors = 0
+
+    def flush(chunk):
+        nonlocal scored, errors
+        parsed = [item for item in chunk if 'error' not in item['result']]
+        results = calculate_fitdna_rows([item['row'] for item in parsed])
+        for item, result in zip(parsed, results):
+            item['result'] = result
+
+        lines = []
+        for item in chunk:
+            output = {'row': item['row_no']}
+            if item['id'] is not None:
+                output['id'] = item['id']
+            output.update(item['result'])
+            if 'error' in output:
+                errors += 1
+            else:
+                scored += 1
+            lines.append(json.dumps(output, ensure_ascii=False) + '\n')
+        return ''.join(lines)
+
+    try:
+        chunk = []
+        for row_no, record in enumerate(_iter_bulk_records(upload, format), start=1):
+            total += 1
+            item = {'row_no': row_no, 'id': record.get('id'), 'row': None, 'result': {}}
+            try:
+                item['row'] = _parse_bulk_record(record)
+            except ValueError as e:
+                item['result'] = {'error': str(e)}
+            chunk.append(item)
+
+            if len(chunk) >= chunk_size:
+                yield flush(chunk)
+                chunk = []
+
+        if chunk:
+            yield flush(chunk)
+    finally:
+        upload.close()
+
+    yield json.dumps({'summary': {'total': total, 'scored': scored, 'errors': errors}}) + '\n'
+
+
 @router.get("/result/{user_id}")
 async def get_fitdna_result(user_id: int, db: Session = Depends(get_db)):
     """
@@ -224,3 +511,21 @@ async def get_all_fitdna_types():
             {"code": "LSQ", "name": "입문자형", "description": "균형 잡힌 발전 필요"}
         ]
     }
+
+
+@router.get("/cache-stats")
+async def get_cache_stats():
+    """FIT-DNA 계산 캐시 적중/미적중 통계"""
+    return get_fitdna_cache_stats()
+
+
+@router.post("/admin/reload-reference")
+async def reload_reference():
+    """
+    참조 테이블 다시 로드 (관리자)
+    - 새 테이블을 스레드에서 만든 뒤 한 번에 교체
+    """
+    try:
+        return await run_in_threadpool(reload_reference_table)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"참조 테이블 로드 실패: {e}")
@@ -10,7 +10,8 @@ from pydantic import BaseModel
 from typing import List, Optional
 from sqlalchemy.orm import Session
 from app.core.database import get_db
-from app.models import Match, User, MatchStatusEnum
+from app.models import Match, MatchingPreference, MatchRequest, User, MatchStatusEnum
+from app.services import matching_service
 
 router = APIRouter()
 
@@ -30,13 +31,42 @@ class MatchingPreferenceInput(BaseModel):
 # ===== API 엔드포인트 =====
 
 @router.post("/preferences")
-async def set_matching_preferences(data: MatchingPreferenceInput):
+async def set_matching_preferences(user_id: int, data: MatchingPreferenceInput, db: Session = Depends(get_db)):
     """
     매칭 선호도 설정
     - FIT-DNA 유사도 선택 (0~3개 차이)
     - 운동 종목 선택
     - 시간대 선택
+    - 나이 범위 / 성별 선호는 매칭 후보 하드 필터
     """
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    if not 0 <= data.fitdna_similarity <= 3:
+        raise HTTPException(status_code=400, detail="fitdna_similarity는 0~3이어야 합니다")
+
+    age_range = None
+    if data.age_range:
+        if len(data.age_range) != 2:
+            raise HTTPException(status_code=400, detail="age_range는 (min_age, max_age) 형식이어야 합니다")
+        age_range = {"min": data.age_range[0], "max": data.age_range[1]}
+
+    values = {
+        "fitdna_similarity": data.fitdna_similarity,
+        "exercise_types": data.exercise_types,
+        "preferred_times": data.preferred_times,
+        "location_radius_km": data.location_radius_km,
+        "age_range": age_range,
+        "gender_preference": data.gender_preference,
+    }
+    preference = db.query(MatchingPreference).filter(MatchingPreference.user_id == user_id).first()
+    if preference is None:
+        db.add(MatchingPreference(user_id=user_id, **values))
+    else:
+        for key, value in values.items():
+            setattr(preference, key, value)
+    db.commit()
+
     return {
         "message": "매칭 선호도 저장 완료",
         "preferences": data.dict(),
@@ -45,96 +75,72 @@ async def set_matching_preferences(data: MatchingPreferenceInput):
 
 
 @router.post("/request")
-async def request_matching(user_id: int):
+async def request_matching(
+    user_id: int,
+    latitude: Optional[float] = Query(None, ge=-90, le=90, description="활동 위치 위도 (주면 사용자 위치 갱신)"),
+    longitude: Optional[float] = Query(None, ge=-180, le=180, description="활동 위치 경도"),
+    db: Session = Depends(get_db)
+):
     """
     매칭 요청
-    - 사용자의 선호도 기반으로 매칭 시작
+    - 요청을 저장하고 매칭 워커 큐에 넣은 뒤 바로 응답 (후보 계산은 백그라운드)
+    - 위치가 등록된 사용자는 활동 반경(location_radius_km) 안의 회원만 후보
+    - 결과는 GET /request/{matching_id} 로 폴링
     """
-    # TODO: phase2_matching_algorithm.py 연동
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    if (latitude is None) != (longitude is None):
+        raise HTTPException(status_code=400, detail="latitude와 longitude를 함께 입력하세요")
+    if latitude is not None:
+        user.latitude = latitude
+        user.longitude = longitude
+        db.commit()
+
+    request = matching_service.enqueue_match_request(db, user_id)
     return {
         "user_id": user_id,
-        "status": "매칭 진행 중",
-        "estimated_time": "약 5분 소요",
-        "matching_id": "match_12345"
+        "status": matching_service.public_status(request.status),
+        "matching_id": request.id
     }
 
 
+@router.get("/request/{matching_id}")
+async def get_matching_request(matching_id: int, db: Session = Depends(get_db)):
+    """
+    매칭 요청 상태 조회 (폴링용)
+    - status: processing / completed / failed
+    """
+    request = matching_service.get_match_request(db, matching_id)
+    if not request:
+        raise HTTPException(status_code=404, detail="Matching request not found")
+
+    return _match_request_response(request)
+
+
 @router.get("/results")
-async def get_matching_results(user_id: int):
+async def get_matching_results(user_id: int, db: Session = Depends(get_db)):
     """
     매칭 결과 조회
-    - 매칭된 사용자 목록 제공
-    - 운동 스타일·시간대·위치 정보 비교
+    - 가장 최근 매칭 요청의 후보 목록 (점수 내림차순)
     """
+    request = matching_service.get_latest_match_request(db, user_id)
+    if not request:
+        raise HTTPException(status_code=404, detail="매칭 요청 기록이 없습니다")
+
+    return _match_request_response(request)
+
+
+def _match_request_response(request: MatchRequest) -> dict:
+    matches = request.candidates or []
     return {
-        "user_id": user_id,
-        "status": "매칭 완료",
-        "matches": [
-            {
-                "match_id": 1,
-                "user": {
-                    "nickname": "런너123",
-                    "age": 28,
-                    "gender": "M",
-                    "fitdna_type": "PFE",
-                    "profile_image": "/static/profiles/user_1.jpg"
-                },
-                "compatibility": {
-                    "total_score": 92,
-                    "fitdna_similarity": 100,  # 같은 유형
-                    "exercise_overlap": 80,  # 운동 종목 80% 일치
-                    "time_overlap": 90,  # 시간대 90% 일치
-                    "location_distance_km": 1.2
-                },
-                "common_exercises": ["러닝", "헬스", "수영"],
-                "preferred_times": ["아침", "저녁"],
-                "location": "서울 강남구",
-                "bio": "주 5회 러닝하는 직장인입니다. 함께 운동하실 분 찾습니다!"
-            },
-            {
-                "match_id": 2,
-                "user": {
-                    "nickname": "헬스매니아",
-                    "age": 26,
-                    "gender": "M",
-                    "fitdna_type": "PSE",
-                    "profile_image": "/static/profiles/user_2.jpg"
-                },
-                "compatibility": {
-                    "total_score": 85,
-                    "fitdna_similarity": 87,  # 1개 차이 (F vs S)
-                    "exercise_overlap": 66,
-                    "time_overlap": 100,
-                    "location_distance_km": 2.5
-                },
-                "common_exercises": ["헬스", "러닝"],
-                "preferred_times": ["저녁"],
-                "location": "서울 서초구",
-                "bio": "벤치프레스 120kg 찍는게 목표입니다. 같이 운동해요!"
-            },
-            {
-                "match_id": 3,
-                "user": {
-                    "nickname": "요가러버",
-                    "age": 30,
-                    "gender": "F",
-                    "fitdna_type": "LFE",
-                    "profile_image": "/static/profiles/user_3.jpg"
-                },
-                "compatibility": {
-                    "total_score": 78,
-                    "fitdna_similarity": 75,  # 2개 차이 (P vs L, F vs S)
-                    "exercise_overlap": 50,
-                    "time_overlap": 80,
-                    "location_distance_km": 3.8
-                },
-                "common_exercises": ["요가"],
-                "preferred_times": ["아침", "점심"],
-                "location": "서울 강동구",
-                "bio": "요가 5년차입니다. 초보자도 환영해요!"
-            }
-        ],
-        "total_matches": 3
+        "matching_id": request.id,
+        "user_id": request.user_id,
+        "status": matching_service.public_status(request.status),
+        "request_date": request.request_date.isoformat(),
+        "matches": matches,
+        "total_matches": len(matches)
     }
 
 
@@ -187,16 +193,22 @@ async def get_candidate_detail(candidate_id: int, current_user_id: int):
     }
 
 
-@router.post("/request/{match_id}")
-async def send_match_request(match_id: int, user_id: int):
+@router.post("/request/{candidate_id}")
+async def send_match_request(candidate_id: int, user_id: int, db: Session = Depends(get_db)):
     """
     매칭 신청
-    - 후보자에게 매칭 신청 전송
+    - 최근 매칭 결과의 후보에게 매칭 신청 전송 (점수 항목은 매칭 결과에서 복사)
     """
+    try:
+        match = matching_service.create_match_request(db, user_id, candidate_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
     return {
         "user_id": user_id,
-        "match_id": match_id,
+        "match_id": match.id,
         "status": "신청 완료",
+        "compatibility_score": match.compatibility_score,
         "message": "상대방이 수락하면 알림을 보내드립니다."
     }
 
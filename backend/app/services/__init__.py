@@ -4,6 +4,7 @@ Services package
 
 from .fitdna_service import (
     calculate_user_fitdna,
+    calculate_user_fitdna_cached,
     get_fitdna_strengths_weaknesses,
     zscore_to_score_0_10
 )
@@ -15,6 +16,7 @@ from .report_service import (
 
 __all__ = [
     'calculate_user_fitdna',
+    'calculate_user_fitdna_cached',
     'get_fitdna_strengths_weaknesses',
     'zscore_to_score_0_10',
     'generate_user_monthly_report',
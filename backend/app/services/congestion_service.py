@@ -0,0 +1,297 @@
+"""
+시설 혼잡도 서비스
+- facility_congestion (시설×요일×시간 행) → 시설당 168칸 uint8 프로필 (facility_congestion_profiles)
+- 프로필 하나 / 전체 프로필을 각각 쿼리 한 번으로 로드
+- 앞으로 N시간 중 가장 한산한 시간대 추천
+"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import FacilityCongestion, FacilityCongestionProfile
+
+DAYS = 7
+HOURS = 24
+SLOTS = DAYS * HOURS
+
+# 혼잡도 0-10 → uint8 0-100 (소수점 한 자리), 255 = 데이터 없음
+SCORE_SCALE = 10
+MISSING = 255
+
+DAY_NAMES = ['월', '화', '수', '목', '금', '토', '일']
+
+# 혼잡도 등급 (점수 상한, 등급)
+CONGESTION_LEVELS = [
+    (2.5, '낮음'),
+    (5.0, '보통'),
+    (7.5, '높음'),
+    (10.0, '매우높음'),
+]
+
+
+def pack_week_scores(scores: np.ndarray) -> bytes:
+    """(7, 24) 혼잡도 배열 (NaN = 데이터 없음) → 168바이트"""
+    scores = np.asarray(scores, dtype=float).reshape(SLOTS)
+    packed = np.full(SLOTS, MISSING, dtype=np.uint8)
+    valid = ~np.isnan(scores)
+    packed[valid] = np.clip(np.rint(scores[valid] * SCORE_SCALE), 0, 10 * SCORE_SCALE)
+    return packed.tobytes()
+
+
+def unpack_week_scores(blob: bytes) -> np.ndarray:
+    """168바이트 → (7, 24) 혼잡도 배열 (데이터 없음 = NaN)"""
+    packed = np.frombuffer(blob, dtype=np.uint8, count=SLOTS)
+    scores = packed / SCORE_SCALE
+    scores[packed == MISSING] = np.nan
+    return scores.reshape(DAYS, HOURS)
+
+
+def congestion_level(score: Optional[float]) -> Optional[str]:
+    """혼잡도 점수 → 등급 ('낮음', '보통', '높음', '매우높음')"""
+    if score is None or np.isnan(score):
+        return None
+    for upper, level in CONGESTION_LEVELS:
+        if score <= upper:
+            return level
+    return CONGESTION_LEVELS[-1][1]
+
+
+# ===== 프로필 집계 =====
+
+def rebuild_congestion_profiles(db: Session, chunk_size: int = 5000) -> int:
+    """
+    facility_congestion을 시설별 주간 프로필로 다시 집계 (한 트랜잭션으로 교체)
+
+    시설×요일×시간 평균은 DB에서 GROUP BY로 계산하고, 결과 튜플을
+    시설 ID 순으로 읽으면서 프로필을 만들어 chunk_size개씩 저장합니다.
+
+    Returns:
+        저장한 프로필 수
+    """
+    table = FacilityCongestionProfile.__table__
+    now = datetime.utcnow()
+
+    rows = []
+    total = 0
+    current_id = None
+    scores = None
+
+    def flush():
+        nonlocal rows, total
+        if rows:
+            db.execute(table.insert(), rows)
+            total += len(rows)
+            rows = []
+
+    try:
+        db.execute(table.delete())
+        result = db.execute(
+            select(
+                FacilityCongestion.facility_id,
+                FacilityCongestion.day_of_week,
+                FacilityCongestion.hour,
+                func.avg(FacilityCongestion.congestion_score),
+            )
+            .group_by(FacilityCongestion.facility_id, FacilityCongestion.day_of_week, FacilityCongestion.hour)
+            .order_by(FacilityCongestion.facility_id)
+        )
+        for facility_id, day, hour, score in result:
+            if facility_id != current_id:
+                if current_id is not None:
+                    rows.append({"facility_id": current_id, "scores": pack_week_scores(scores),
+                                 "created_at": now, "updated_at": now})
+                    if len(rows) >= chunk_size:
+                        flush()
+                current_id = facility_id
+                scores = np.full((DAYS, HOURS), np.nan)
+            if 0 <= day < DAYS and 0 <= hour < HOURS:
+                scores[day, hour] = score
+        if current_id is not None:
+            rows.append({"facility_id": current_id, "scores": pack_week_scores(scores),
+                         "created_at": now, "updated_at": now})
+        flush()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    invalidate_congestion_store()
+    return total
+
+
+async def refresh_congestion_profiles_periodically(interval: float):
+    """interval초마다 주간 혼잡도 프로필 재집계 (앱 시작 시 백그라운드 작업)"""
+
+    def _rebuild():
+        db = SessionLocal()
+        try:
+            return rebuild_congestion_profiles(db)
+        finally:
+            db.close()
+
+    while True:
+        try:
+            total = await asyncio.to_thread(_rebuild)
+            print(f"✅ 시설 혼잡도 프로필 집계 완료 ({total:,}개)")
+        except Exception as e:
+            print(f"❌ 시설 혼잡도 프로필 집계 실패: {e}")
+        await asyncio.sleep(interval)
+
+
+# ===== 조회 =====
+
+def get_week_profile(db: Session, facility_id: int) -> Optional[np.ndarray]:
+    """
+    시설의 (7, 24) 주간 혼잡도 (데이터 없음 = NaN)
+
+    프로필이 아직 집계되지 않았으면 facility_congestion에서 바로 계산합니다 (최대 168행).
+    둘 다 없으면 None.
+    """
+    blob = db.execute(
+        select(FacilityCongestionProfile.scores).where(FacilityCongestionProfile.facility_id == facility_id)
+    ).scalar()
+    if blob is not None:
+        return unpack_week_scores(blob)
+
+    rows = db.execute(
+        select(FacilityCongestion.day_of_week, FacilityCongestion.hour, func.avg(FacilityCongestion.congestion_score))
+        .where(FacilityCongestion.facility_id == facility_id)
+        .group_by(FacilityCongestion.day_of_week, FacilityCongestion.hour)
+    ).all()
+    if not rows:
+        return None
+
+    scores = np.full((DAYS, HOURS), np.nan)
+    for day, hour, score in rows:
+        if 0 <= day < DAYS and 0 <= hour < HOURS:
+            scores[day, hour] = score
+    return unpack_week_scores(pack_week_scores(scores))
+
+
+def least_crowded_slots(profile: np.ndarray, now: datetime, hours_ahead: int = 24, top: int = 3) -> List[Dict]:
+    """
+    지금부터 hours_ahead시간 안에서 가장 한산한 시간대 top개 (같은 점수면 빠른 시간 우선)
+
+    Args:
+        profile: (7, 24) 주간 혼잡도
+        now: 기준 시각 (이 시각이 속한 시간대부터 포함)
+        hours_ahead: 살펴볼 시간 수 (최대 168)
+        top: 결과 수
+
+    Returns:
+        [{"starts_at", "day_of_week", "day_name", "hour", "score", "level"}, ...]
+    """
+    hours_ahead = max(1, min(hours_ahead, SLOTS))
+    start = now.replace(minute=0, second=0, microsecond=0)
+    offsets = np.arange(hours_ahead)
+    slots = (start.weekday() * HOURS + start.hour + offsets) % SLOTS
+    scores = profile.reshape(SLOTS)[slots]
+
+    valid = ~np.isnan(scores)
+    offsets, scores = offsets[valid], scores[valid]
+    order = np.lexsort((offsets, scores))[:top]
+
+    results = []
+    for i in order:
+        starts_at = start + timedelta(hours=int(offsets[i]))
+        results.append({
+            "starts_at": starts_at.isoformat(),
+            "day_of_week": starts_at.weekday(),
+            "day_name": DAY_NAMES[starts_at.weekday()],
+            "hour": starts_at.hour,
+            "score": float(scores[i]),
+            "level": congestion_level(scores[i]),
+        })
+    return results
+
+
+# ===== 전체 프로필 (메모리) =====
+
+class CongestionStore:
+    """
+    전체 시설 주간 혼잡도 (facility_id 정렬 배열 + (n, 168) uint8 행렬)
+
+    시설 10만 개 기준 약 17MB이며, 쿼리 한 번으로 로드합니다.
+    """
+
+    def __init__(self, facility_ids: np.ndarray, packed: np.ndarray):
+        order = np.argsort(facility_ids, kind='stable')
+        self.facility_ids = np.asarray(facility_ids, dtype=np.int64)[order]
+        self.packed = np.asarray(packed, dtype=np.uint8).reshape(-1, SLOTS)[order]
+
+    @classmethod
+    def from_db(cls, db: Session) -> "CongestionStore":
+        rows = db.execute(
+            select(FacilityCongestionProfile.facility_id, FacilityCongestionProfile.scores)
+        ).all()
+        if not rows:
+            return cls(np.empty(0, dtype=np.int64), np.empty((0, SLOTS), dtype=np.uint8))
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        packed = np.frombuffer(b''.join(row[1] for row in rows), dtype=np.uint8)
+        return cls(ids, packed)
+
+    def __len__(self) -> int:
+        return len(self.facility_ids)
+
+    def scores_at(self, facility_ids, day_of_week: int, hour: int) -> np.ndarray:
+        """여러 시설의 특정 요일·시간 혼잡도 (데이터 없음 = NaN)"""
+        facility_ids = np.asarray(facility_ids, dtype=np.int64)
+        scores = np.full(len(facility_ids), np.nan)
+        if len(self) == 0 or len(facility_ids) == 0:
+            return scores
+
+        pos = np.minimum(np.searchsorted(self.facility_ids, facility_ids), len(self) - 1)
+        found = self.facility_ids[pos] == facility_ids
+        packed = self.packed[pos[found], day_of_week * HOURS + hour]
+        values = packed / SCORE_SCALE
+        values[packed == MISSING] = np.nan
+        scores[found] = values
+        return scores
+
+    def __repr__(self):
+        return f"<CongestionStore(facilities={len(self)})>"
+
+
+# (store, 마지막 확인 시각, 프로필 시그니처)
+_store_state = (None, 0.0, None)
+_store_lock = threading.Lock()
+
+
+def _profile_signature(db: Session):
+    return tuple(db.execute(
+        select(func.count(FacilityCongestionProfile.id), func.max(FacilityCongestionProfile.updated_at))
+    ).one())
+
+
+def invalidate_congestion_store():
+    """다음 조회 때 전체 프로필을 다시 로드"""
+    global _store_state
+    _store_state = (None, 0.0, None)
+
+
+def get_congestion_store(db: Session) -> CongestionStore:
+    """
+    전체 프로필 (settings.FACILITY_INDEX_REFRESH_SECONDS마다 변경 여부 확인)
+    """
+    global _store_state
+
+    store, checked_at, signature = _store_state
+    if store is not None and time.monotonic() - checked_at < settings.FACILITY_INDEX_REFRESH_SECONDS:
+        return store
+
+    with _store_lock:
+        store, checked_at, signature = _store_state
+        current = _profile_signature(db)
+        if store is None or current != signature:
+            store = CongestionStore.from_db(db)
+        _store_state = (store, time.monotonic(), current)
+    return store
@@ -0,0 +1,216 @@
+"""
+시설 추천 랭킹 서비스
+- 공간 후보(반경 내 시설)에 대해 거리·평점·현재 시간대 혼잡도·FIT-DNA 약점 종목 일치를 점수화
+- 가중 합으로 전체 후보를 정렬하지 않고 힙으로 상위 k개만 선택
+"""
+
+import heapq
+import os
+import sys
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import Facility
+from app.models.facility import sport_tokens
+from app.services.congestion_service import get_congestion_store
+from app.services.facility_search import nearby_candidates
+
+# 프로젝트 루트를 경로에 추가
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.insert(0, project_root)
+
+try:
+    from fitdna_calculator import FITDNA_INFO
+except ImportError as e:
+    print(f"⚠️  모델링 파일 import 실패: {e}")
+    FITDNA_INFO = {}
+
+AXES = ('strength', 'flexibility', 'endurance')
+
+# 종목 → (근력, 유연성, 지구력) 효과 점수 0-3
+# (phase2_classified_exercise_database.csv와 같은 척도, 위에서부터 키워드 포함 여부로 판정)
+SPORT_AXIS_KEYWORDS = [
+    (('스트레칭',), (0, 3, 0)),
+    (('요가', '필라테스'), (1, 2, 0)),
+    (('체조', '발레', '무용', '리듬'), (1, 3, 1)),
+    (('태권도', '검도', '유도', '합기도', '주짓수', '무술', '무예'), (2, 2, 1)),
+    (('헬스', '웨이트', '역도', '보디빌딩', '크로스핏', '파워리프팅'), (3, 0, 1)),
+    (('클라이밍', '암벽', '복싱', '레슬링', '씨름'), (3, 1, 2)),
+    (('수영', '아쿠아'), (1, 0, 3)),
+    (('달리기', '러닝', '조깅', '마라톤', '육상', '트랙'), (1, 0, 3)),
+    (('걷기', '산책', '등산', '트레킹'), (1, 0, 3)),
+    (('자전거', '사이클', '인라인', '스케이트', '줄넘기', '에어로빅', '댄스'), (1, 1, 3)),
+    (('축구', '풋살', '농구', '핸드볼', '하키'), (2, 0, 3)),
+    (('배드민턴', '테니스', '스쿼시', '탁구', '배구', '족구'), (1, 1, 2)),
+    (('야구', '소프트볼', '골프', '게이트볼'), (2, 1, 1)),
+]
+
+AXIS_SCORE_MAX = 3
+
+# 데이터가 없을 때 쓰는 중립 점수 (순위에 영향 없음)
+NEUTRAL_SCORE = 0.5
+
+
+@lru_cache(maxsize=4096)
+def sport_axis_scores(sport: str) -> Tuple[int, int, int]:
+    """종목 하나 → (근력, 유연성, 지구력) 효과 점수 (모르는 종목은 (0, 0, 0))"""
+    for keywords, scores in SPORT_AXIS_KEYWORDS:
+        if any(keyword in sport for keyword in keywords):
+            return scores
+    return (0, 0, 0)
+
+
+@lru_cache(maxsize=4096)
+def facility_axis_scores(sports: Optional[str]) -> Tuple[int, int, int]:
+    """시설 종목 문자열 → 축별로 가장 효과가 큰 종목의 점수"""
+    best = [0, 0, 0]
+    for token in sport_tokens(sports):
+        for i, score in enumerate(sport_axis_scores(token)):
+            best[i] = max(best[i], score)
+    return tuple(best)
+
+
+def weakness_axes(fitdna_type: Optional[str]) -> List[str]:
+    """FIT-DNA 유형 → 약점(Low) 축 목록 (모든 축이 High면 세 축 모두 유지 대상)"""
+    info = FITDNA_INFO.get((fitdna_type or '').upper())
+    if not info:
+        return []
+    weak = [axis for axis in AXES if info[axis] == 'Low']
+    return weak or list(AXES)
+
+
+def default_weights() -> Dict[str, float]:
+    """settings의 랭킹 가중치"""
+    return {
+        "distance": settings.FACILITY_RANK_WEIGHT_DISTANCE,
+        "rating": settings.FACILITY_RANK_WEIGHT_RATING,
+        "congestion": settings.FACILITY_RANK_WEIGHT_CONGESTION,
+        "fitdna": settings.FACILITY_RANK_WEIGHT_FITDNA,
+    }
+
+
+def score_components(
+    distances: np.ndarray,
+    radius_km: float,
+    ratings: np.ndarray,
+    review_counts: np.ndarray,
+    congestion: np.ndarray,
+    axis_scores: np.ndarray,
+    weak_axes: List[str]
+) -> Dict[str, np.ndarray]:
+    """
+    후보별 항목 점수 (0-1, 높을수록 좋음)
+
+    - distance: 1 - 거리/반경
+    - rating: 평균 평점/5 (리뷰가 없으면 중립)
+    - congestion: 1 - 현재 시간대 혼잡도/10 (데이터가 없으면 중립)
+    - fitdna: 약점 축에 대한 종목 효과 점수 평균/3 (FIT-DNA가 없으면 중립)
+    """
+    n = len(distances)
+    components = {
+        "distance": 1.0 - distances / radius_km if radius_km > 0 else np.ones(n),
+        "rating": np.where(review_counts > 0, ratings / 5.0, NEUTRAL_SCORE),
+        "congestion": np.where(np.isnan(congestion), NEUTRAL_SCORE, 1.0 - np.nan_to_num(congestion) / 10.0),
+    }
+    if weak_axes:
+        columns = [AXES.index(axis) for axis in weak_axes]
+        components["fitdna"] = axis_scores[:, columns].mean(axis=1) / AXIS_SCORE_MAX
+    else:
+        components["fitdna"] = np.full(n, NEUTRAL_SCORE)
+    return {name: np.clip(values, 0.0, 1.0) for name, values in components.items()}
+
+
+def recommend_facilities(
+    db: Session,
+    lat: float,
+    lon: float,
+    radius_km: float,
+    limit: int,
+    fitdna_type: Optional[str] = None,
+    sports: Optional[str] = None,
+    weights: Optional[Dict[str, float]] = None,
+    now: Optional[datetime] = None
+) -> List[Dict]:
+    """
+    반경 내 시설 추천 (가중 점수 상위 limit개)
+
+    Args:
+        db: DB 세션
+        lat, lon: 기준 위치
+        radius_km: 반경 (km)
+        limit: 결과 수
+        fitdna_type: 사용자 FIT-DNA 유형 (약점 종목 일치 점수에 사용)
+        sports: 운동 종목 필터
+        weights: 항목별 가중치 {"distance", "rating", "congestion", "fitdna"}
+            (없는 항목은 settings 값, 가중치 합으로 나눠 0-100점으로 환산)
+        now: 혼잡도 기준 시각 (기본값: 현재)
+
+    Returns:
+        [{"id", "name", "type", "address", "sports", "latitude", "longitude",
+          "distance_km", "score", "components": {...}}, ...] - 점수 내림차순
+    """
+    weights = {**default_weights(), **(weights or {})}
+    now = now or datetime.now()
+
+    ids, distances = nearby_candidates(db, lat, lon, radius_km, sports)
+    if len(ids) == 0:
+        return []
+
+    # 후보의 평점·종목 (후보 ID 순서대로 정렬)
+    rows = db.query(Facility.id, Facility.average_rating, Facility.total_reviews, Facility.sports).filter(
+        Facility.id.in_(ids.tolist()),
+        Facility.is_active == True  # noqa: E712
+    ).all()
+    position = {facility_id: i for i, facility_id in enumerate(ids.tolist())}
+    ratings = np.zeros(len(ids))
+    review_counts = np.zeros(len(ids), dtype=np.int64)
+    axis_scores = np.zeros((len(ids), len(AXES)))
+    active = np.zeros(len(ids), dtype=bool)
+    for facility_id, rating, review_count, facility_sports in rows:
+        i = position[facility_id]
+        active[i] = True
+        ratings[i] = rating or 0.0
+        review_counts[i] = review_count or 0
+        axis_scores[i] = facility_axis_scores(facility_sports)
+
+    congestion = get_congestion_store(db).scores_at(ids, now.weekday(), now.hour)
+    components = score_components(
+        distances, radius_km, ratings, review_counts, congestion, axis_scores, weakness_axes(fitdna_type)
+    )
+    total_weight = sum(weights[name] for name in components) or 1.0
+    scores = sum(weights[name] * values for name, values in components.items()) / total_weight
+
+    # 상위 limit개만 힙으로 선택 (같은 점수면 가까운 시설 우선)
+    candidates = np.flatnonzero(active)
+    top = heapq.nlargest(limit, candidates.tolist(), key=lambda i: (scores[i], -distances[i]))
+    if not top:
+        return []
+
+    details = {
+        row.id: row for row in db.query(
+            Facility.id, Facility.name, Facility.facility_type, Facility.address,
+            Facility.sports, Facility.latitude, Facility.longitude
+        ).filter(Facility.id.in_([int(ids[i]) for i in top]))
+    }
+
+    results = []
+    for i in top:
+        facility = details[int(ids[i])]
+        results.append({
+            "id": facility.id,
+            "name": facility.name,
+            "type": facility.facility_type,
+            "address": facility.address,
+            "sports": facility.sports,
+            "latitude": facility.latitude,
+            "longitude": facility.longitude,
+            "distance_km": round(float(distances[i]), 2),
+            "score": round(float(scores[i]) * 100, 1),
+            "components": {name: round(float(values[i]) * 100, 1) for name, values in components.items()},
+        })
+    return results
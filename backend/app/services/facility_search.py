@@ -0,0 +1,641 @@
+"""
+주변 시설 검색 서비스
+- 위도/경도 격자(grid cell) → 시설 ID 메모리 인덱스
+- 반경 검색은 반경 원을 덮는 격자만 조회한 뒤 정확한 Haversine 거리로 필터링
+- 단위 구면 xyz 좌표 KD-tree 인덱스 (반경 검색 + k-최근접 검색)
+- 인덱스가 준비되기 전에는 위도/경도 범위(BETWEEN) SQL 쿼리로 검색
+- 운동 종목 필터는 종목 역색인(facility_sports)과 공간 후보의 교집합
+"""
+
+import asyncio
+import copy
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import Facility, FacilitySport
+from app.models.facility import sport_tokens
+from app.utils.geo import (
+    GRID_CELL_DEG, GRID_N_LAT, GRID_N_LON,
+    chord_to_km, grid_cells, haversine_km_many, km_to_chord, radius_bounds, unit_xyz,
+)
+
+
+def _load_active_coordinates(db: Session, min_id: int = 0):
+    """활성 시설 (id, 위도, 경도) 배열 (min_id보다 큰 ID만)"""
+    rows = db.query(Facility.id, Facility.latitude, Facility.longitude).filter(
+        Facility.is_active == True,  # noqa: E712
+        Facility.id > min_id
+    ).all()
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+    ids, lats, lons = zip(*rows)
+    return np.asarray(ids, dtype=np.int64), np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)
+
+
+class FacilityGridIndex:
+    """
+    격자 키 → 시설 메모리 인덱스
+
+    시설을 격자 키 순으로 정렬해 배열(ids/lats/lons)에 보관합니다.
+    같은 위도 줄의 격자는 키가 연속이므로, 반경 검색은 위도 줄마다
+    키 구간 하나(날짜변경선을 넘으면 두 개)를 이분 탐색으로 잘라냅니다.
+    """
+
+    def __init__(self, ids: np.ndarray, lats: np.ndarray, lons: np.ndarray):
+        ids = np.asarray(ids, dtype=np.int64)
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        keys = grid_cells(lats, lons)
+
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.ids = ids[order]
+        self.lats = lats[order]
+        self.lons = lons[order]
+        self.max_id = int(ids.max()) if len(ids) else 0
+
+    @classmethod
+    def from_db(cls, db: Session) -> "FacilityGridIndex":
+        """활성 시설 좌표로 인덱스 생성"""
+        return cls(*_load_active_coordinates(db))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, ids: np.ndarray, lats: np.ndarray, lons: np.ndarray):
+        """새 시설 추가 (격자 키 정렬 위치에 삽입)"""
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) == 0:
+            return
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        keys = grid_cells(lats, lons)
+
+        order = np.argsort(keys, kind='stable')
+        keys, ids, lats, lons = keys[order], ids[order], lats[order], lons[order]
+        at = np.searchsorted(self.keys, keys, side='right')
+        self.keys = np.insert(self.keys, at, keys)
+        self.ids = np.insert(self.ids, at, ids)
+        self.lats = np.insert(self.lats, at, lats)
+        self.lons = np.insert(self.lons, at, lons)
+        self.max_id = max(self.max_id, int(ids.max()))
+
+    def _candidates(self, lat: float, lon: float, radius_km: float) -> np.ndarray:
+        """반경 원을 덮는 격자에 속한 시설의 배열 위치"""
+        lat_min, lat_max, lon_min, lon_max = radius_bounds(lat, lon, radius_km)
+
+        ilat_lo = min(max(int(np.floor((lat_min + 90.0) / GRID_CELL_DEG)), 0), GRID_N_LAT - 1)
+        ilat_hi = min(max(int(np.floor((lat_max + 90.0) / GRID_CELL_DEG)), 0), GRID_N_LAT - 1)
+        rows = np.arange(ilat_lo, ilat_hi + 1, dtype=np.int64) * GRID_N_LON
+
+        def ilon(value):
+            return int(np.floor((value + 180.0) / GRID_CELL_DEG)) % GRID_N_LON
+
+        if lon_min == -180.0 and lon_max == 180.0:
+            lon_ranges = [(0, GRID_N_LON - 1)]
+        elif lon_min <= lon_max:
+            lon_ranges = [(ilon(lon_min), ilon(lon_max))]
+        else:
+            # 날짜변경선을 넘는 경우
+            lon_ranges = [(ilon(lon_min), GRID_N_LON - 1), (0, ilon(lon_max))]
+
+        starts = []
+        ends = []
+        for lo, hi in lon_ranges:
+            starts.append(np.searchsorted(self.keys, rows + lo, side='left'))
+            ends.append(np.searchsorted(self.keys, rows + hi, side='right'))
+        starts = np.concatenate(starts)
+        lengths = np.concatenate(ends) - starts
+
+        # 구간들을 하나의 위치 배열로 펼치기
+        total = int(lengths.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64)
+        offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        return np.arange(total, dtype=np.int64) + offsets
+
+    def query_radius(self, lat: float, lon: float, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        반경 내 시설 (거리순)
+
+        Returns:
+            (시설 ID 배열, 거리(km) 배열)
+        """
+        if len(self) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        idx = self._candidates(lat, lon, radius_km)
+        distances = haversine_km_many(lat, lon, self.lats[idx], self.lons[idx])
+        inside = distances <= radius_km
+        idx, distances = idx[inside], distances[inside]
+
+        order = np.argsort(distances, kind='stable')
+        return self.ids[idx[order]], distances[order]
+
+    def __repr__(self):
+        return f"<FacilityGridIndex(facilities={len(self)}, cell={GRID_CELL_DEG}°)>"
+
+
+class FacilityKDTree:
+    """
+    단위 구면 xyz 좌표 KD-tree 시설 인덱스
+
+    구면 위 두 점의 현(chord) 길이는 대원 거리에 대해 단조 증가하므로,
+    유클리드 KD-tree 검색 결과가 그대로 대원 거리 순서가 됩니다.
+    날짜변경선·극점에서도 특별한 처리가 필요 없습니다.
+
+    add()로 들어온 시설은 작은 보조 배열에 쌓아 선형 탐색하고,
+    보조 배열이 rebuild_ratio × 트리 크기를 넘으면 트리를 다시 만듭니다.
+    """
+
+    def __init__(self, ids: np.ndarray, lats: np.ndarray, lons: np.ndarray,
+                 leaf_size: int = 40, rebuild_ratio: float = 0.05):
+        self.leaf_size = leaf_size
+        self.rebuild_ratio = rebuild_ratio
+        self.max_id = 0
+        self._build(np.asarray(ids, dtype=np.int64), unit_xyz(lats, lons))
+
+    def _build(self, ids: np.ndarray, xyz: np.ndarray):
+        from sklearn.neighbors import KDTree
+
+        self.ids = ids
+        self.xyz = xyz
+        self.tree = KDTree(xyz, leaf_size=self.leaf_size) if len(ids) else None
+        self.pending_ids = np.empty(0, dtype=np.int64)
+        self.pending_xyz = np.empty((0, 3))
+        if len(ids):
+            self.max_id = max(self.max_id, int(ids.max()))
+
+    @classmethod
+    def from_db(cls, db: Session) -> "FacilityKDTree":
+        """활성 시설 좌표로 인덱스 생성"""
+        return cls(*_load_active_coordinates(db))
+
+    def __len__(self) -> int:
+        return len(self.ids) + len(self.pending_ids)
+
+    def add(self, ids: np.ndarray, lats: np.ndarray, lons: np.ndarray):
+        """새 시설 추가 (보조 배열이 커지면 트리 재생성)"""
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) == 0:
+            return
+        self.pending_ids = np.concatenate([self.pending_ids, ids])
+        self.pending_xyz = np.concatenate([self.pending_xyz, unit_xyz(lats, lons)])
+        self.max_id = max(self.max_id, int(ids.max()))
+
+        if len(self.pending_ids) > max(self.rebuild_ratio * len(self.ids), self.leaf_size):
+            self._build(np.concatenate([self.ids, self.pending_ids]),
+                        np.concatenate([self.xyz, self.pending_xyz]))
+
+    def _pending_chords(self, point: np.ndarray) -> np.ndarray:
+        return np.sqrt(((self.pending_xyz - point) ** 2).sum(axis=1))
+
+    def query_radius(self, lat: float, lon: float, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        반경 내 시설 (거리순)
+
+        Returns:
+            (시설 ID 배열, 거리(km) 배열)
+        """
+        point = unit_xyz([lat], [lon])
+        chord = km_to_chord(radius_km)
+
+        ids = [np.empty(0, dtype=np.int64)]
+        chords = [np.empty(0)]
+        if self.tree is not None:
+            idx, dist = self.tree.query_radius(point, chord, return_distance=True)
+            ids.append(self.ids[idx[0]])
+            chords.append(dist[0])
+        if len(self.pending_ids):
+            pending = self._pending_chords(point[0])
+            inside = pending <= chord
+            ids.append(self.pending_ids[inside])
+            chords.append(pending[inside])
+
+        ids = np.concatenate(ids)
+        distances = chord_to_km(np.concatenate(chords))
+        # 현 길이 비교의 부동소수점 오차로 경계에 걸친 점 제외
+        inside = distances <= radius_km
+        ids, distances = ids[inside], distances[inside]
+
+        order = np.argsort(distances, kind='stable')
+        return ids[order], distances[order]
+
+    def query_nearest(self, lat: float, lon: float, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        가까운 순서로 k개 시설
+
+        Returns:
+            (시설 ID 배열, 거리(km) 배열)
+        """
+        point = unit_xyz([lat], [lon])
+
+        ids = [np.empty(0, dtype=np.int64)]
+        chords = [np.empty(0)]
+        if self.tree is not None and k > 0:
+            dist, idx = self.tree.query(point, k=min(k, len(self.ids)))
+            ids.append(self.ids[idx[0]])
+            chords.append(dist[0])
+        if len(self.pending_ids):
+            ids.append(self.pending_ids)
+            chords.append(self._pending_chords(point[0]))
+
+        ids = np.concatenate(ids)
+        chords = np.concatenate(chords)
+        order = np.argsort(chords, kind='stable')[:k]
+        return ids[order], chord_to_km(chords[order])
+
+    def __repr__(self):
+        return f"<FacilityKDTree(facilities={len(self)}, pending={len(self.pending_ids)})>"
+
+
+# ===== 인덱스 상태 (프로세스 전역) =====
+
+INDEX_CLASSES = {
+    "grid": FacilityGridIndex,
+    "kdtree": FacilityKDTree,
+}
+
+# 방식별 (인덱스, 테이블 시그니처, 마지막 확인 시각)
+_indexes: Dict[str, tuple] = {}
+_index_building = set()
+_index_lock = threading.Lock()
+
+
+def _facility_signature(db: Session):
+    """시설 테이블 변경 감지용 (활성 시설 수, 최대 ID, 최종 수정 시각)"""
+    return tuple(db.query(
+        func.count(Facility.id), func.max(Facility.id), func.max(Facility.updated_at)
+    ).filter(Facility.is_active == True).one())  # noqa: E712
+
+
+def rebuild_facility_index(db: Session, backend: str = "grid"):
+    """DB에서 인덱스를 새로 만들어 교체"""
+    with _index_lock:
+        signature = _facility_signature(db)
+        index = INDEX_CLASSES[backend].from_db(db)
+        _indexes[backend] = (index, signature, time.monotonic())
+
+    print(f"✅ 시설 검색 인덱스 생성 완료 ({backend}, {len(index):,}개)")
+    return index
+
+
+def _refresh_facility_index(db: Session, backend: str, index, old_signature, signature):
+    """
+    테이블이 바뀐 경우 인덱스 갱신
+
+    기존 시설은 그대로이고 새 시설만 추가된 경우(활성 수 증가분 = 새 ID 수,
+    기존 ID 범위의 최종 수정 시각 동일)에는 새 시설만 add() 하고,
+    그 밖의 변경(수정/삭제/비활성화)은 전체를 다시 만듭니다.
+
+    검색은 잠금 없이 현재 인덱스를 읽으므로, 사본에 add() 한 뒤
+    _indexes 항목을 한 번에 교체합니다. (add()는 배열을 제자리에서 바꾸지 않고
+    새 배열을 속성에 다시 대입하므로 얕은 복사로 충분합니다.)
+    """
+    old_count, _, old_updated = old_signature
+    new_ids, new_lats, new_lons = _load_active_coordinates(db, min_id=index.max_id)
+
+    existing_updated = db.query(func.max(Facility.updated_at)).filter(
+        Facility.is_active == True,  # noqa: E712
+        Facility.id <= index.max_id
+    ).scalar()
+
+    if len(new_ids) and old_count + len(new_ids) == signature[0] and existing_updated == old_updated:
+        with _index_lock:
+            index = copy.copy(index)
+            index.add(new_ids, new_lats, new_lons)
+            _indexes[backend] = (index, signature, time.monotonic())
+        print(f"✅ 시설 검색 인덱스 갱신 ({backend}, +{len(new_ids):,}개)")
+        return index
+
+    return rebuild_facility_index(db, backend)
+
+
+def get_facility_index(db: Session, backend: str = "grid"):
+    """
+    현재 인덱스 반환
+
+    settings.FACILITY_INDEX_REFRESH_SECONDS마다 시설 테이블 변경 여부를 확인하고,
+    바뀌었으면 갱신합니다.
+    """
+    state = _indexes.get(backend)
+    if state is None:
+        return rebuild_facility_index(db, backend)
+
+    index, signature, checked_at = state
+    if time.monotonic() - checked_at >= settings.FACILITY_INDEX_REFRESH_SECONDS:
+        _indexes[backend] = (index, signature, time.monotonic())
+        current = _facility_signature(db)
+        if current != signature:
+            return _refresh_facility_index(db, backend, index, signature, current)
+
+    return index
+
+
+async def build_facility_index_async(backend: Optional[str] = None):
+    """앱 시작 시 백그라운드에서 인덱스 생성 (종목 역색인이 비어 있으면 함께 생성)"""
+    backend = backend or settings.FACILITY_SEARCH_BACKEND
+
+    def _build():
+        db = SessionLocal()
+        try:
+            ensure_sport_index(db)
+            if backend in INDEX_CLASSES:
+                rebuild_facility_index(db, backend)
+        finally:
+            db.close()
+
+    try:
+        await asyncio.to_thread(_build)
+    except Exception as e:
+        print(f"❌ 시설 검색 인덱스 생성 실패: {e}")
+
+
+def _ensure_index_building(backend: str):
+    """메모리 인덱스가 아직 없으면 백그라운드 스레드에서 생성 시작"""
+    with _index_lock:
+        if backend in _index_building:
+            return
+        _index_building.add(backend)
+
+    def _build():
+        db = SessionLocal()
+        try:
+            rebuild_facility_index(db, backend)
+        except Exception as e:
+            print(f"❌ 시설 검색 인덱스 생성 실패: {e}")
+        finally:
+            db.close()
+            _index_building.discard(backend)
+
+    threading.Thread(target=_build, daemon=True).start()
+
+
+# ===== 종목 역색인 =====
+
+def rebuild_sport_index(db: Session, chunk_size: int = 10000) -> int:
+    """
+    facilities.sports로 종목 역색인(facility_sports)을 다시 만듦 (커밋은 호출한 쪽에서)
+
+    ORM으로 저장한 시설은 모델 이벤트가 역색인을 갱신하므로,
+    Core 일괄 적재(parse_facilities.upsert_facilities_to_db) 뒤나 기존 DB 이전 시 사용합니다.
+
+    Returns:
+        역색인 행 수
+    """
+    table = FacilitySport.__table__
+    db.execute(table.delete())
+
+    total = 0
+    rows = []
+    for facility_id, sports in db.execute(
+        select(Facility.id, Facility.sports).where(Facility.sports.isnot(None))
+    ):
+        rows.extend({"sport": token, "facility_id": facility_id} for token in sport_tokens(sports))
+        if len(rows) >= chunk_size:
+            db.execute(table.insert(), rows)
+            total += len(rows)
+            rows = []
+    if rows:
+        db.execute(table.insert(), rows)
+        total += len(rows)
+    return total
+
+
+def ensure_sport_index(db: Session):
+    """역색인이 비어 있는데 종목이 있는 시설이 있으면 새로 만듦 (기존 DB 이전용)"""
+    if db.query(FacilitySport.facility_id).first() is not None:
+        return
+    if db.query(Facility.id).filter(Facility.sports.isnot(None)).first() is None:
+        return
+
+    total = rebuild_sport_index(db)
+    db.commit()
+    print(f"✅ 시설 종목 역색인 생성 완료 ({total:,}행)")
+
+
+# 공간 후보가 이 수 이하면 후보 ID로 역색인을 조회하고, 더 많으면 종목 목록 전체를 받아 교집합
+SPORT_FILTER_IN_LIMIT = 1000
+
+
+def _sport_mask(db: Session, ids: np.ndarray, tokens: List[str]) -> np.ndarray:
+    """공간 후보 ids 중 종목 토큰 하나 이상을 가진 시설 (불리언 마스크)"""
+    query = db.query(FacilitySport.facility_id).filter(FacilitySport.sport.in_(tokens))
+    if len(ids) <= SPORT_FILTER_IN_LIMIT:
+        query = query.filter(FacilitySport.facility_id.in_(ids.tolist()))
+    posting = np.fromiter((facility_id for (facility_id,) in query), dtype=np.int64)
+    return np.isin(ids, posting)
+
+
+# ===== 검색 =====
+
+# 주변 시설 응답에 필요한 컬럼만 조회
+NEARBY_COLUMNS = (
+    Facility.id,
+    Facility.name,
+    Facility.facility_type,
+    Facility.address,
+    Facility.sports,
+    Facility.latitude,
+    Facility.longitude,
+)
+
+SEARCH_BACKENDS = ("grid", "kdtree", "sql")
+
+
+def _select_rows(db, ids, distances, limit, sports):
+    """거리순 후보 ID → (종목 역색인 교집합) → 필요한 컬럼만 조회"""
+    tokens = sport_tokens(sports)
+    if len(ids) and tokens:
+        mask = _sport_mask(db, ids, tokens)
+        ids, distances = ids[mask], distances[mask]
+    if len(ids) == 0:
+        return []
+
+    selected = list(zip(ids[:limit].tolist(), distances[:limit].tolist()))
+    rows = {
+        row.id: row for row in db.query(*NEARBY_COLUMNS).filter(
+            Facility.id.in_([i for i, _ in selected]),
+            Facility.is_active == True  # noqa: E712  인덱스 갱신 전에 비활성화된 시설 제외
+        )
+    }
+    return [(rows[i], d) for i, d in selected if i in rows]
+
+
+def _search_sql(db, lat, lon, radius_km, limit, sports):
+    """
+    위도/경도 BETWEEN 범위 조건(latitude/longitude 인덱스 사용) → 정확한 Haversine 필터
+
+    - 날짜변경선을 넘는 반경은 경도 조건을 (>= lon_min OR <= lon_max)로 나눔
+    - 극점을 포함하는 반경은 경도 조건 없이 위도 조건만 사용
+    """
+    lat_min, lat_max, lon_min, lon_max = radius_bounds(lat, lon, radius_km)
+
+    query = db.query(*NEARBY_COLUMNS).filter(
+        Facility.is_active == True,  # noqa: E712
+        Facility.latitude.between(lat_min, lat_max),
+    )
+    if lon_min > lon_max:
+        query = query.filter(or_(Facility.longitude >= lon_min, Facility.longitude <= lon_max))
+    elif lon_min > -180.0 or lon_max < 180.0:
+        query = query.filter(Facility.longitude.between(lon_min, lon_max))
+
+    tokens = sport_tokens(sports)
+    if tokens:
+        # 위도/경도 범위로 좁힌 행마다 (sport, facility_id) 기본 키로 확인
+        query = query.filter(
+            select(FacilitySport.facility_id).where(
+                FacilitySport.facility_id == Facility.id, FacilitySport.sport.in_(tokens)
+            ).exists()
+        )
+
+    rows = query.all()
+    if not rows:
+        return []
+
+    distances = haversine_km_many(
+        lat, lon,
+        np.fromiter((row.latitude for row in rows), dtype=float, count=len(rows)),
+        np.fromiter((row.longitude for row in rows), dtype=float, count=len(rows)),
+    )
+    inside = np.flatnonzero(distances <= radius_km)
+    order = inside[np.argsort(distances[inside], kind='stable')][:limit]
+    return [(rows[i], float(distances[i])) for i in order]
+
+
+def search_nearby_facilities(
+    db: Session,
+    lat: float,
+    lon: float,
+    radius_km: float,
+    limit: int,
+    sports: Optional[str] = None,
+    backend: Optional[str] = None
+) -> List[Tuple[object, float]]:
+    """
+    반경 내 시설 검색 (거리순)
+
+    Args:
+        db: DB 세션
+        lat, lon: 기준 위치
+        radius_km: 반경 (km)
+        limit: 최대 결과 수
+        sports: 운동 종목 필터 (쉼표로 여러 개, 하나라도 있으면 포함)
+        backend: "grid" (메모리 격자 인덱스), "kdtree" (메모리 KD-tree),
+            "sql" (위도/경도 범위 쿼리). 기본값은 settings.FACILITY_SEARCH_BACKEND.
+            메모리 인덱스가 아직 만들어지지 않았으면 만드는 동안 "sql"을 사용합니다.
+
+    Returns:
+        [(시설 행, 거리 km), ...] - 시설 행은 NEARBY_COLUMNS 속성(id, name, ...)을 가짐
+    """
+    backend = backend or settings.FACILITY_SEARCH_BACKEND
+    if backend not in SEARCH_BACKENDS:
+        raise ValueError(f"지원하지 않는 시설 검색 방식입니다: {backend}")
+
+    if backend in INDEX_CLASSES and backend not in _indexes:
+        _ensure_index_building(backend)
+        backend = "sql"
+
+    if backend == "sql":
+        return _search_sql(db, lat, lon, radius_km, limit, sports)
+
+    ids, distances = get_facility_index(db, backend).query_radius(lat, lon, radius_km)
+    return _select_rows(db, ids, distances, limit, sports)
+
+
+def nearby_candidates(
+    db: Session,
+    lat: float,
+    lon: float,
+    radius_km: float,
+    sports: Optional[str] = None,
+    backend: Optional[str] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    반경 내 모든 시설 ID와 거리 (랭킹 등 후처리용 공간 후보, 정렬 보장 없음)
+
+    메모리 인덱스가 있으면 인덱스로, 없으면 위도/경도 범위 쿼리로 찾고
+    종목 필터가 있으면 종목 역색인과 교집합을 구합니다.
+
+    Returns:
+        (시설 ID 배열, 거리(km) 배열)
+    """
+    backend = backend or settings.FACILITY_SEARCH_BACKEND
+    if backend in INDEX_CLASSES and backend not in _indexes:
+        _ensure_index_building(backend)
+        backend = "sql"
+
+    if backend in INDEX_CLASSES:
+        ids, distances = get_facility_index(db, backend).query_radius(lat, lon, radius_km)
+    else:
+        lat_min, lat_max, lon_min, lon_max = radius_bounds(lat, lon, radius_km)
+        query = db.query(Facility.id, Facility.latitude, Facility.longitude).filter(
+            Facility.is_active == True,  # noqa: E712
+            Facility.latitude.between(lat_min, lat_max),
+        )
+        if lon_min > lon_max:
+            query = query.filter(or_(Facility.longitude >= lon_min, Facility.longitude <= lon_max))
+        elif lon_min > -180.0 or lon_max < 180.0:
+            query = query.filter(Facility.longitude.between(lon_min, lon_max))
+
+        rows = query.all()
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        distances = haversine_km_many(
+            lat, lon,
+            np.fromiter((row[1] for row in rows), dtype=float, count=len(rows)),
+            np.fromiter((row[2] for row in rows), dtype=float, count=len(rows)),
+        )
+        inside = distances <= radius_km
+        ids, distances = ids[inside], distances[inside]
+
+    tokens = sport_tokens(sports)
+    if len(ids) and tokens:
+        mask = _sport_mask(db, ids, tokens)
+        ids, distances = ids[mask], distances[mask]
+    return ids, distances
+
+
+def search_nearest_facilities(
+    db: Session,
+    lat: float,
+    lon: float,
+    limit: int,
+    sports: Optional[str] = None,
+    max_distance_km: Optional[float] = None
+) -> List[Tuple[object, float]]:
+    """
+    가장 가까운 시설 limit개 (KD-tree k-최근접 검색)
+
+    종목 필터가 있으면 후보 수를 두 배씩 늘려 가며 limit개를 채웁니다.
+
+    Args:
+        db: DB 세션
+        lat, lon: 기준 위치
+        limit: 결과 수
+        sports: 운동 종목 필터 (쉼표로 여러 개, 하나라도 있으면 포함)
+        max_distance_km: 최대 거리 (없으면 제한 없음)
+
+    Returns:
+        [(시설 행, 거리 km), ...]
+    """
+    index = get_facility_index(db, "kdtree")
+    k = limit
+    while True:
+        ids, distances = index.query_nearest(lat, lon, k)
+        exhausted = len(ids) < k
+        if max_distance_km is not None:
+            inside = distances <= max_distance_km
+            exhausted = exhausted or not inside.all()
+            ids, distances = ids[inside], distances[inside]
+
+        results = _select_rows(db, ids, distances, limit, sports)
+        if len(results) >= limit or exhausted:
+            return results
+        k *= 2
@@ -5,8 +5,16 @@ FIT-DNA 계산 서비스
 
 import sys
 import os
+import copy
+import asyncio
 import pickle
-from typing import Dict, Tuple
+import threading
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.core.config import settings
 
 # 프로젝트 루트를 경로에 추가
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
@@ -16,8 +24,15 @@ sys.path.insert(0, project_root)
 try:
     from fitdna_from_measurements import (
         calculate_fitdna_from_measurements,
+        calculate_fitdna_batch,
+        CohortScorer,
         load_reference_table,
-        calculate_measurement_zscore
+        calculate_measurement_zscore,
+        STRENGTH_ITEMS,
+        FLEXIBILITY_ITEMS,
+        ENDURANCE_ITEMS,
+        STRENGTH_REQUIRED_MESSAGE,
+        ENDURANCE_REQUIRED_MESSAGE
     )
     from fitdna_calculator import get_fitdna_description
 except ImportError as e:
@@ -25,21 +40,107 @@ except ImportError as e:
     print(f"   프로젝트 루트: {project_root}")
 
 
-# 참조 테이블 로드 (전역 변수로 캐싱)
-_reference_table = None
+# 참조 테이블 파일
+# - .bin: mmap 로드 (같은 호스트의 워커들이 페이지 캐시 한 벌을 공유)
+# - .pkl: .bin이 없을 때 사용 (python fitdna_reference.py 로 .bin 생성)
+REFERENCE_TABLE_BIN = os.path.join(project_root, 'FITDNA_ref_new.bin')
+REFERENCE_TABLE_PKL = os.path.join(project_root, 'FITDNA_ref_new.pkl')
+
+# 참조 테이블 상태 (table, version, 파일 시그니처)
+# - 튜플 한 번의 대입으로 교체하므로 요청 처리 중에는 항상 완전한 테이블만 보임
+_reference_state = (None, 0, None)
+_reference_lock = threading.Lock()
+
+
+def get_reference_table_path() -> str:
+    """사용할 참조 테이블 파일 경로 (바이너리 우선)"""
+    if os.path.exists(REFERENCE_TABLE_BIN):
+        return REFERENCE_TABLE_BIN
+    return REFERENCE_TABLE_PKL
+
+
+def _file_signature(path: str) -> Tuple:
+    """파일 변경 감지용 (경로, inode, mtime, 크기)"""
+    stat = os.stat(path)
+    return path, stat.st_ino, stat.st_mtime_ns, stat.st_size
 
 
 def get_reference_table():
-    """참조 테이블 로드 (캐싱)"""
-    global _reference_table
-    if _reference_table is None:
+    """참조 테이블 반환 (시작 시 로드가 끝나지 않았으면 여기서 로드)"""
+    table = _reference_state[0]
+    if table is None:
+        with _reference_lock:
+            if _reference_state[0] is None:
+                _load_and_swap_reference_table()
+        table = _reference_state[0]
+    return table
+
+
+def get_reference_table_version() -> int:
+    """현재 참조 테이블 버전 (로드/교체할 때마다 1 증가, 미로드 시 0)"""
+    return _reference_state[1]
+
+
+def is_reference_table_ready() -> bool:
+    """참조 테이블 로드 완료 여부 (/health 준비 상태)"""
+    return _reference_state[0] is not None
+
+
+def _load_and_swap_reference_table() -> Dict:
+    """새 테이블을 끝까지 만든 뒤 전역 상태를 한 번에 교체 (_reference_lock 보유 상태에서 호출)"""
+    global _reference_state
+
+    path = get_reference_table_path()
+    try:
+        signature = _file_signature(path)
+        table = load_reference_table(path)
+    except Exception as e:
+        print(f"❌ 참조 테이블 로드 실패: {e}")
+        raise
+
+    version = _reference_state[1] + 1
+    _reference_state = (table, version, signature)
+
+    # 이전 테이블로 만든 계산기/결과 캐시 비우기
+    _get_cohort_scorer.cache_clear()
+    _calculate_user_fitdna_cached.cache_clear()
+
+    print(f"✅ FIT-DNA 참조 테이블 로드 완료 ({os.path.basename(path)}, v{version})")
+    return {'path': path, 'version': version, 'entries': len(table)}
+
+
+def reload_reference_table() -> Dict:
+    """
+    참조 테이블 다시 로드 (동기, 스레드에서 호출)
+
+    새 테이블을 모두 만든 뒤 교체하므로 처리 중인 요청은 이전 테이블을 그대로 사용합니다.
+    """
+    with _reference_lock:
+        return _load_and_swap_reference_table()
+
+
+async def load_reference_table_async() -> None:
+    """앱 시작 시 백그라운드 로드 (첫 요청이 로드 지연을 떠안지 않도록)"""
+    try:
+        await asyncio.to_thread(reload_reference_table)
+    except Exception:
+        # 실패 시 첫 요청에서 다시 로드 시도
+        pass
+
+
+async def watch_reference_table(interval: float) -> None:
+    """참조 테이블 파일 변경 감시 → 변경되면 백그라운드에서 다시 로드"""
+    while True:
+        await asyncio.sleep(interval)
         try:
-            _reference_table = load_reference_table()
-            print("✅ FIT-DNA 참조 테이블 로드 완료")
-        except Exception as e:
-            print(f"❌ 참조 테이블 로드 실패: {e}")
-            raise
-    return _reference_table
+            signature = _file_signature(get_reference_table_path())
+        except OSError:
+            continue
+        if is_reference_table_ready() and signature != _reference_state[2]:
+            try:
+                await asyncio.to_thread(reload_reference_table)
+            except Exception:
+                pass
 
 
 def calculate_user_fitdna(
@@ -82,16 +183,11 @@ def calculate_user_fitdna(
     """
 
     try:
-        ref_table = get_reference_table()
-
-        # FIT-DNA 계산
-        result = calculate_fitdna_from_measurements(
-            age=age,
-            gender=gender,
-            measurements=measurements,
-            ref_table=ref_table,
-            threshold=threshold
-        )
+        # FIT-DNA 계산 ((나이, 성별) 그룹별 계산기 재사용)
+        scorer = get_cohort_scorer(age, gender)
+        result = scorer.score(measurements, threshold=threshold)
+        # 측정 항목별 같은 나이·성별 내 백분위
+        result['percentiles'] = scorer.percentiles(measurements)
 
         # 타입 정보 추가
         type_info = get_fitdna_description(result['fitdna_type'])
@@ -104,6 +200,138 @@ def calculate_user_fitdna(
         raise
 
 
+def get_cohort_scorer(age: int, gender: str) -> "CohortScorer":
+    """
+    (나이, 성별) 그룹 계산기 (지연 생성 + LRU 캐시)
+
+    트래픽이 몰리는 연령대는 평균·표준편차 계수를 한 번만 뽑아 재사용합니다.
+    """
+    return _get_cohort_scorer(get_reference_table(), age, gender)
+
+
+@lru_cache(maxsize=settings.FITDNA_SCORER_CACHE_SIZE)
+def _get_cohort_scorer(ref_table, age: int, gender: str) -> "CohortScorer":
+    # ref_table도 키에 포함: 테이블 교체 후에는 이전 테이블의 계산기를 쓰지 않음
+    return CohortScorer(age, gender, ref_table, zscore_method=settings.FITDNA_ZSCORE_METHOD)
+
+
+def get_fitdna_cache_stats() -> Dict:
+    """FIT-DNA 캐시 적중/미적중 통계 (그룹 계산기 캐시, 결과 캐시)"""
+    stats = {}
+    for name, cached in [('cohort_scorer', _get_cohort_scorer),
+                         ('result', _calculate_user_fitdna_cached)]:
+        info = cached.cache_info()
+        stats[name] = {
+            'hits': info.hits,
+            'misses': info.misses,
+            'maxsize': info.maxsize,
+            'currsize': info.currsize
+        }
+    return stats
+
+
+def _canonical_fitdna_key(
+    age: int,
+    gender: str,
+    measurements: Dict[str, float],
+    threshold: float
+) -> Tuple:
+    """
+    캐시 키 정규화
+    - 성별 대문자, 측정값 float 변환 (35 == 35.0), 항목 이름순 정렬, None 제외
+    """
+    items = tuple(sorted(
+        (item, float(value)) for item, value in measurements.items() if value is not None
+    ))
+    return int(age), gender.upper(), items, float(threshold)
+
+
+@lru_cache(maxsize=settings.FITDNA_RESULT_CACHE_SIZE)
+def _calculate_user_fitdna_cached(
+    version: int, age: int, gender: str, items: Tuple, threshold: float
+) -> Dict:
+    # version: 참조 테이블 버전 (교체 전 결과가 섞이지 않도록 키에 포함)
+    return calculate_user_fitdna(age, gender, dict(items), threshold)
+
+
+def calculate_user_fitdna_cached(
+    age: int,
+    gender: str,
+    measurements: Dict[str, float],
+    threshold: float = 0.5
+) -> Dict:
+    """
+    calculate_user_fitdna() + LRU 캐시
+
+    키오스크 재시도처럼 같은 입력이 반복되면 캐시된 결과를 반환합니다.
+    캐시 크기: settings.FITDNA_RESULT_CACHE_SIZE
+    계산 실패(ValueError)는 캐시하지 않습니다.
+    """
+    key = _canonical_fitdna_key(age, gender, measurements, threshold)
+    # 캐시된 dict가 호출자 쪽에서 변경되지 않도록 복사본 반환
+    return copy.deepcopy(_calculate_user_fitdna_cached(get_reference_table_version(), *key))
+
+
+def calculate_fitdna_rows(rows: List[Dict], threshold: float = 0.5) -> List[Dict]:
+    """
+    여러 사용자 FIT-DNA 일괄 계산 (벡터화)
+
+    Args:
+        rows: [{'age': 25, 'gender': 'M', 'measurements': {...}}, ...]
+        threshold: FIT-DNA 분류 임계값
+
+    Returns:
+        행 순서대로 결과 목록
+        - 성공: {'fitdna_type', 'type_name', 'strength_level', ..., 'strength_z', ...}
+        - 실패: {'error': '근력 측정값이 필요합니다 ...'}
+    """
+    if not rows:
+        return []
+
+    ref_table = get_reference_table()
+
+    n = len(rows)
+    ages = np.fromiter((row['age'] for row in rows), dtype=np.int64, count=n)
+    genders = np.array([row['gender'] for row in rows], dtype=str)
+    columns = {}
+    for item in STRENGTH_ITEMS + FLEXIBILITY_ITEMS + ENDURANCE_ITEMS:
+        columns[item] = np.fromiter(
+            (row['measurements'].get(item, np.nan) for row in rows), dtype=float, count=n
+        )
+
+    batch = calculate_fitdna_batch(
+        ages, genders, columns, ref_table,
+        threshold=threshold, zscore_method=settings.FITDNA_ZSCORE_METHOD
+    )
+
+    type_names = {}
+    results = []
+    for i in range(n):
+        if not batch['strength_ok'][i]:
+            results.append({'error': STRENGTH_REQUIRED_MESSAGE})
+            continue
+        if not batch['endurance_ok'][i]:
+            results.append({'error': ENDURANCE_REQUIRED_MESSAGE})
+            continue
+
+        fitdna_type = str(batch['fitdna_type'][i])
+        if fitdna_type not in type_names:
+            type_names[fitdna_type] = get_fitdna_description(fitdna_type)['name']
+
+        results.append({
+            'fitdna_type': fitdna_type,
+            'type_name': type_names[fitdna_type],
+            'strength_level': str(batch['strength_level'][i]),
+            'flexibility_level': str(batch['flexibility_level'][i]),
+            'endurance_level': str(batch['endurance_level'][i]),
+            'strength_z': round(float(batch['strength_z'][i]), 2),
+            'flexibility_z': round(float(batch['flexibility_z'][i]), 2),
+            'endurance_z': round(float(batch['endurance_z'][i]), 2)
+        })
+
+    return results
+
+
 def get_fitdna_strengths_weaknesses(
     strength_z: float,
     flexibility_z: float,
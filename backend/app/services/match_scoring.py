@@ -0,0 +1,399 @@
+"""
+운동 메이트 다중 요소 매칭 점수
+- 하드 필터 (양방향): 나이 범위, 성별 선호, FIT-DNA 유형 허용 차이(fitdna_similarity), 활동 반경
+- 점수 (0-100): 체력 유사도(Z-Score 60% + 유형 40%), 선호 운동 일치, 선호 시간대 일치, 거리
+- 선호 운동·시간대는 비트셋으로 인코딩해 공통 항목 수를 popcount로 계산
+- 후보 전체를 배열로 한 번에 계산 (후보 수천 명 기준 수 ms)
+"""
+
+import os
+import sys
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import User, FitDNAResult, FitnessMeasurement, MatchingPreference
+from app.services.member_index import zscores_from_columns
+from app.utils.geo import haversine_km_many
+
+# 프로젝트 루트를 경로에 추가
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.insert(0, project_root)
+
+try:
+    from fitdna_matching import TYPE_CODES, matching_score_matrix, type_indices, type_letter_differences
+except ImportError as e:
+    print(f"⚠️  모델링 파일 import 실패: {e}")
+
+# 선호 시간대 (MatchingPreferenceInput.preferred_times)
+TIME_SLOTS = ('아침', '점심', '저녁', '심야')
+
+# 자주 쓰는 운동 종목 (먼저 비트를 배정, 그 밖의 종목은 처음 나올 때 배정)
+COMMON_EXERCISES = ('러닝', '헬스', '요가', '수영', '클라이밍')
+
+# 성별 선호 중 필터로 쓰는 값 ('any' / None은 필터 없음)
+GENDER_CODES = ('M', 'F')
+
+# 바이트 → 켜진 비트 수 (numpy 1.26에는 bitwise_count가 없어 uint8 뷰 + 조회표로 popcount)
+_POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+_WORD_MASK = (1 << 64) - 1
+
+
+def popcount(bits: np.ndarray) -> np.ndarray:
+    """
+    비트셋별 켜진 비트 수
+
+    Args:
+        bits: (n, words) uint64 비트셋
+
+    Returns:
+        (n,) int64
+    """
+    bits = np.ascontiguousarray(bits, dtype=np.uint64)
+    if len(bits) == 0:
+        return np.zeros(0, dtype=np.int64)
+    return _POPCOUNT_TABLE[bits.view(np.uint8)].reshape(len(bits), -1).sum(axis=1, dtype=np.int64)
+
+
+class BitsetVocabulary:
+    """
+    항목 문자열 → 비트 위치
+
+    처음 나온 항목에 다음 비트를 배정하며(프로세스 안에서 고정), 64개마다 uint64 한 워드씩 늘어납니다.
+    """
+
+    def __init__(self, items: Sequence[str] = ()):
+        self._bits: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._lock = threading.Lock()
+        self._register(items)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    @property
+    def words(self) -> int:
+        return max(1, -(-len(self._names) // 64))
+
+    def _register(self, items: Iterable[str]):
+        new = [item for item in items if item not in self._bits]
+        if not new:
+            return
+        with self._lock:
+            for item in new:
+                if item not in self._bits:
+                    self._bits[item] = len(self._names)
+                    self._names.append(item)
+
+    def encode_many(self, item_lists: Sequence[Optional[Sequence[str]]], words: Optional[int] = None) -> np.ndarray:
+        """
+        항목 목록들 → (n, words) uint64 비트셋
+
+        words를 주지 않으면 현재 어휘 크기에 맞춥니다
+        (같은 호출에서 만든 비트셋끼리, 또는 words를 맞춘 비트셋끼리 비교).
+        """
+        # 같은 조합은 한 번만 계산 (파이썬 정수 비트마스크)
+        masks = []
+        cache = {}
+        for items in item_lists:
+            key = tuple(items or ())
+            mask = cache.get(key)
+            if mask is None:
+                mask = 0
+                for item in key:
+                    position = self._bits.get(item)
+                    if position is None:
+                        self._register([item])
+                        position = self._bits[item]
+                    mask |= 1 << position
+                cache[key] = mask
+            masks.append(mask)
+
+        words = words or self.words
+        if words == 1:
+            return np.array(masks, dtype=np.uint64).reshape(-1, 1)
+        return np.array([[(mask >> (64 * w)) & _WORD_MASK for w in range(words)] for mask in masks],
+                        dtype=np.uint64).reshape(-1, words)
+
+    def decode(self, bits: np.ndarray) -> List[str]:
+        """비트셋 하나 → 항목 목록 (비트 순서)"""
+        bits = np.asarray(bits, dtype=np.uint64).reshape(-1)
+        flags = np.unpackbits(bits.view(np.uint8), bitorder='little')
+        return [self._names[i] for i in np.flatnonzero(flags[:len(self._names)])]
+
+
+EXERCISE_VOCABULARY = BitsetVocabulary(COMMON_EXERCISES)
+TIME_VOCABULARY = BitsetVocabulary(TIME_SLOTS)
+
+
+class MemberProfiles:
+    """
+    매칭 점수 계산용 회원 프로필 배열
+
+    행마다 회원 한 명: Z-Score·유형, 나이·성별, 위치, 선호 운동·시간대 비트셋,
+    선호도의 나이 범위·성별 선호·유형 허용 차이·활동 반경 (선호도가 없으면 필터 없음)
+    """
+
+    def __init__(self, user_ids, zscores, fitdna_types, ages, genders, lats, lons,
+                 exercise_types, preferred_times, age_ranges=None, gender_preferences=None,
+                 fitdna_similarity=None, radius_km=None, nicknames=None):
+        n = len(user_ids)
+        self.user_ids = np.asarray(user_ids, dtype=np.int64)
+        self.zscores = np.asarray(zscores, dtype=float).reshape(n, 3)
+        self.fitdna_types = list(fitdna_types)
+        self.types = type_indices(self.fitdna_types)
+        self.ages = np.array([np.nan if age is None else age for age in ages], dtype=float)
+        self.genders = np.array([g or '' for g in genders], dtype='<U1')
+        self.lats = np.array([np.nan if v is None else v for v in lats], dtype=float)
+        self.lons = np.array([np.nan if v is None else v for v in lons], dtype=float)
+        self.nicknames = list(nicknames) if nicknames is not None else [None] * n
+
+        self.exercise_bits = EXERCISE_VOCABULARY.encode_many(exercise_types)
+        self.time_bits = TIME_VOCABULARY.encode_many(preferred_times)
+        self.exercise_counts = popcount(self.exercise_bits)
+        self.time_counts = popcount(self.time_bits)
+
+        age_ranges = age_ranges if age_ranges is not None else [None] * n
+        self.age_min = np.array([_range_value(r, 'min', -np.inf) for r in age_ranges], dtype=float)
+        self.age_max = np.array([_range_value(r, 'max', np.inf) for r in age_ranges], dtype=float)
+        gender_preferences = gender_preferences if gender_preferences is not None else [None] * n
+        self.gender_prefs = np.array([g if g in GENDER_CODES else '' for g in gender_preferences], dtype='<U1')
+        fitdna_similarity = fitdna_similarity if fitdna_similarity is not None else [None] * n
+        self.max_type_diff = np.array([3 if d is None else d for d in fitdna_similarity], dtype=np.int64)
+        radius_km = radius_km if radius_km is not None else [None] * n
+        self.radius_km = np.array([np.nan if r is None else r for r in radius_km], dtype=float)
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def exercise_bits_words(self, words: int) -> np.ndarray:
+        return _pad_words(self.exercise_bits, words)
+
+    def time_bits_words(self, words: int) -> np.ndarray:
+        return _pad_words(self.time_bits, words)
+
+
+def _range_value(age_range, key, default):
+    if not age_range or age_range.get(key) is None:
+        return default
+    return float(age_range[key])
+
+
+def _pad_words(bits: np.ndarray, words: int) -> np.ndarray:
+    """나중에 어휘가 늘어 워드 수가 달라진 비트셋을 0으로 채워 맞춤"""
+    if bits.shape[1] >= words:
+        return bits
+    return np.pad(bits, ((0, 0), (0, words - bits.shape[1])))
+
+
+def load_member_profiles(db: Session, user_ids: Iterable[int]) -> MemberProfiles:
+    """
+    현재 FIT-DNA 결과가 있는 활성 회원 프로필 (한 번의 쿼리, user_ids 순서와 무관)
+
+    유형이 비어 있거나 8개 유형에 없는 결과는 점수를 계산할 수 없으므로 제외합니다.
+    """
+    rows = db.execute(
+        select(
+            User.id, User.nickname, User.age, User.gender, User.latitude, User.longitude,
+            FitDNAResult.fitdna_type,
+            FitnessMeasurement.strength_zscore, FitnessMeasurement.flexibility_zscore, FitnessMeasurement.endurance_zscore,
+            FitDNAResult.strength_score, FitDNAResult.flexibility_score, FitDNAResult.endurance_score,
+            MatchingPreference.exercise_types, MatchingPreference.preferred_times,
+            MatchingPreference.age_range, MatchingPreference.gender_preference,
+            MatchingPreference.fitdna_similarity, MatchingPreference.location_radius_km,
+        ).join(
+            User, User.id == FitDNAResult.user_id
+        ).outerjoin(
+            FitnessMeasurement, FitnessMeasurement.id == FitDNAResult.measurement_id
+        ).outerjoin(
+            MatchingPreference, MatchingPreference.user_id == FitDNAResult.user_id
+        ).where(
+            FitDNAResult.is_current == 1,
+            User.is_active == True,  # noqa: E712
+            FitDNAResult.user_id.in_(list(user_ids))
+        ).order_by(FitDNAResult.id)
+    ).all()
+
+    # 현재 결과가 여러 개인 회원은 마지막 결과만 사용
+    rows = [row for row in {row[0]: row for row in rows}.values() if row[6] in TYPE_CODES]
+
+    def column(i):
+        return [row[i] for row in rows]
+
+    def numbers(start):
+        return np.array([[np.nan if v is None else v for v in row[start:start + 3]] for row in rows],
+                        dtype=float).reshape(-1, 3)
+
+    return MemberProfiles(
+        user_ids=column(0),
+        zscores=zscores_from_columns(numbers(7), numbers(10)),
+        fitdna_types=column(6),
+        ages=column(2),
+        genders=[g.value if g else None for g in column(3)],
+        lats=column(4),
+        lons=column(5),
+        exercise_types=column(13),
+        preferred_times=column(14),
+        age_ranges=column(15),
+        gender_preferences=column(16),
+        fitdna_similarity=column(17),
+        radius_km=column(18),
+        nicknames=column(1),
+    )
+
+
+def default_weights() -> Dict[str, float]:
+    """요소별 가중치 (settings)"""
+    return {
+        "fitdna": settings.MATCHING_WEIGHT_FITDNA,
+        "exercise": settings.MATCHING_WEIGHT_EXERCISE,
+        "time": settings.MATCHING_WEIGHT_TIME,
+        "location": settings.MATCHING_WEIGHT_LOCATION,
+    }
+
+
+def _overlap_score(my_bits: np.ndarray, my_count: int, bits: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """공통 항목 수와 내 선택 대비 일치율 (0-100)"""
+    common_bits = bits & my_bits
+    common = popcount(common_bits)
+    return common_bits, common * (100.0 / max(my_count, 1))
+
+
+def score_candidates(me: MemberProfiles, candidates: MemberProfiles,
+                     weights: Optional[Dict[str, float]] = None) -> Dict[str, np.ndarray]:
+    """
+    요청자(me의 첫 행) 기준 후보 전체 점수
+
+    하드 필터 (양방향):
+    - 나이: 후보 나이가 내 age_range 안, 내 나이가 후보 age_range 안 (범위가 있는데 나이가 없으면 제외)
+    - 성별: 후보 성별이 내 gender_preference와 같고, 내 성별이 후보 gender_preference와 같음 ('any'면 통과)
+    - 유형: 다른 글자 수가 내 fitdna_similarity 이하
+    - 반경: 내 위치·활동 반경이 있으면 반경 안 (위치 없는 후보 제외)
+
+    점수 (0-100):
+    - fitdna_similarity: Z-Score 거리 60% + 유형 거리 40% (calculate_matching_score의 보너스 전 점수)
+    - exercise_overlap / time_overlap: 공통 항목 수 / 내가 고른 항목 수
+    - location: 1 - 거리 / 활동 반경
+    - compatibility: 가중 평균 (내 선택·위치가 없는 요소는 빼고 가중치 재정규화)
+
+    Returns:
+        {"eligible", "compatibility", "fitdna_similarity", "exercise_overlap", "time_overlap",
+         "distance_km", "common_exercise_bits", "common_time_bits"} - 각각 후보 순서 배열
+    """
+    weights = weights or default_weights()
+    n = len(candidates)
+
+    my_age = me.ages[0]
+    my_gender = me.genders[0]
+
+    # 1. 하드 필터
+    with np.errstate(invalid='ignore'):
+        if np.isinf(me.age_min[0]) and np.isinf(me.age_max[0]):
+            eligible = np.ones(n, dtype=bool)
+        else:
+            eligible = (candidates.ages >= me.age_min[0]) & (candidates.ages <= me.age_max[0])
+        has_range = ~(np.isinf(candidates.age_min) & np.isinf(candidates.age_max))
+        eligible &= ~has_range | ((candidates.age_min <= my_age) & (my_age <= candidates.age_max))
+
+    if me.gender_prefs[0]:
+        eligible &= candidates.genders == me.gender_prefs[0]
+    eligible &= (candidates.gender_prefs == '') | (candidates.gender_prefs == my_gender)
+
+    letter_diff = type_letter_differences()[me.types[0], candidates.types]
+    eligible &= letter_diff <= me.max_type_diff[0]
+
+    # 2. 거리
+    located = not (np.isnan(me.lats[0]) or np.isnan(me.lons[0]))
+    distance_km = np.full(n, np.nan)
+    location = np.zeros(n)
+    if located:
+        has_location = ~np.isnan(candidates.lats)
+        distance_km[has_location] = haversine_km_many(
+            me.lats[0], me.lons[0], candidates.lats[has_location], candidates.lons[has_location]
+        )
+        radius = me.radius_km[0]
+        if not np.isnan(radius):
+            with np.errstate(invalid='ignore'):
+                eligible &= distance_km <= radius
+            location = np.clip(1 - distance_km / radius, 0, 1) * 100
+            location[~has_location] = 0
+
+    # 3. 체력 유사도 (보너스 없는 60/40 점수)
+    fitdna = matching_score_matrix(me.zscores[:1], me.types[:1], candidates.zscores, candidates.types,
+                                   exercise_match=False)[0]
+
+    # 4. 선호 운동 / 시간대 일치 (popcount)
+    words = max(me.exercise_bits.shape[1], candidates.exercise_bits.shape[1])
+    common_exercise_bits, exercise = _overlap_score(
+        me.exercise_bits_words(words)[0], int(me.exercise_counts[0]), candidates.exercise_bits_words(words)
+    )
+    words = max(me.time_bits.shape[1], candidates.time_bits.shape[1])
+    common_time_bits, time_overlap = _overlap_score(
+        me.time_bits_words(words)[0], int(me.time_counts[0]), candidates.time_bits_words(words)
+    )
+
+    # 5. 가중 평균 (요청자에게 없는 요소는 제외)
+    parts = [("fitdna", fitdna)]
+    if me.exercise_counts[0]:
+        parts.append(("exercise", exercise))
+    if me.time_counts[0]:
+        parts.append(("time", time_overlap))
+    if located and not np.isnan(me.radius_km[0]):
+        parts.append(("location", location))
+    total_weight = sum(weights[name] for name, _ in parts) or 1.0
+    compatibility = sum(weights[name] * values for name, values in parts) / total_weight
+
+    return {
+        "eligible": eligible,
+        "compatibility": np.round(compatibility, 2),
+        "fitdna_similarity": fitdna,
+        "exercise_overlap": np.round(exercise, 2),
+        "time_overlap": np.round(time_overlap, 2),
+        "distance_km": np.round(distance_km, 2),
+        "common_exercise_bits": common_exercise_bits,
+        "common_time_bits": common_time_bits,
+    }
+
+
+def top_candidates(me: MemberProfiles, candidates: MemberProfiles, limit: int,
+                   weights: Optional[Dict[str, float]] = None) -> List[Dict]:
+    """
+    필터를 통과한 후보 중 종합 점수 상위 limit명
+
+    Returns:
+        [{"user_id", "nickname", "age", "gender", "fitdna_type", "score",
+          "compatibility": {...}, "common_exercises", "common_times"}, ...] (점수 내림차순)
+    """
+    scores = score_candidates(me, candidates, weights)
+    positions = np.flatnonzero(scores["eligible"] & (candidates.user_ids != me.user_ids[0]))
+    if len(positions) > limit:
+        top = np.argpartition(-scores["compatibility"][positions], limit - 1)[:limit]
+        positions = positions[top]
+    positions = positions[np.lexsort((candidates.user_ids[positions], -scores["compatibility"][positions]))]
+
+    results = []
+    for i in positions:
+        distance = scores["distance_km"][i]
+        results.append({
+            "user_id": int(candidates.user_ids[i]),
+            "nickname": candidates.nicknames[i],
+            "age": None if np.isnan(candidates.ages[i]) else int(candidates.ages[i]),
+            "gender": candidates.genders[i] or None,
+            "fitdna_type": candidates.fitdna_types[i],
+            "score": float(scores["compatibility"][i]),
+            "compatibility": {
+                "total_score": float(scores["compatibility"][i]),
+                "fitdna_similarity": float(scores["fitdna_similarity"][i]),
+                "exercise_overlap": float(scores["exercise_overlap"][i]),
+                "time_overlap": float(scores["time_overlap"][i]),
+                "location_distance_km": None if np.isnan(distance) else float(distance),
+            },
+            "common_exercises": EXERCISE_VOCABULARY.decode(scores["common_exercise_bits"][i]),
+            "common_times": TIME_VOCABULARY.decode(scores["common_time_bits"][i]),
+        })
+    return results
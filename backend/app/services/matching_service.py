@@ -0,0 +1,273 @@
+"""
+운동 메이트 매칭 서비스
+- 매칭 요청은 MatchRequest(status='processing')로 저장하고 큐에 넣은 뒤 바로 응답
+- 앱 프로세스 안의 비동기 워커들이 큐에서 꺼내 스레드에서 후보 계산
+  (요청 핸들러에서는 무거운 계산을 하지 않음)
+- 워커는 계산 전에 'processing' → 'running' 조건부 UPDATE로 요청을 선점하므로,
+  여러 uvicorn 워커 프로세스가 같은 요청을 큐에 넣어도 한 곳에서만 계산
+- 결과는 MatchRequest.candidates에 저장, 상태를 'completed' / 'failed'로 변경
+- 후보에게 매칭 신청 시 후보 계산 결과의 점수 항목으로 Match 생성
+"""
+
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import Match, MatchRequest, MatchStatusEnum
+from app.services.match_scoring import load_member_profiles, top_candidates
+from app.services.member_index import search_similar_members
+
+STATUS_PROCESSING = "processing"
+STATUS_RUNNING = "running"  # 워커가 선점해 계산 중 (API에는 'processing'으로 노출)
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+
+# 아직 결과가 없는 상태
+PENDING_STATUSES = (STATUS_PROCESSING, STATUS_RUNNING)
+
+# 매칭 요청 큐 (첫 사용 시 실행 중인 이벤트 루프에서 생성)
+_queue: Optional[asyncio.Queue] = None
+
+
+def _get_queue() -> asyncio.Queue:
+    global _queue
+    if _queue is None:
+        _queue = asyncio.Queue()
+    return _queue
+
+
+def compute_match_candidates(db: Session, user_id: int, limit: Optional[int] = None) -> List[Dict]:
+    """
+    매칭 후보 상위 limit명
+
+    회원 벡터 인덱스에서 Z-Score가 가까운 회원을 (위치·활동 반경이 있으면 반경 안에서)
+    settings.MATCHING_CANDIDATE_POOL명 가져온 뒤, 선호도 하드 필터와 다중 요소 점수
+    (match_scoring.score_candidates)로 다시 정렬합니다.
+
+    Args:
+        db: DB 세션
+        user_id: 매칭을 요청한 사용자 ID
+        limit: 후보 수 (기본 settings.MATCHING_MAX_CANDIDATES)
+
+    Returns:
+        match_scoring.top_candidates 결과 (점수 내림차순)
+    """
+    limit = limit or settings.MATCHING_MAX_CANDIDATES
+
+    me = load_member_profiles(db, [user_id])
+    if len(me) == 0:
+        raise ValueError("FIT-DNA 검사 결과가 없습니다")
+
+    lat, lon, radius_km = me.lats[0], me.lons[0], me.radius_km[0]
+    located = not (np.isnan(lat) or np.isnan(lon) or np.isnan(radius_km))
+    pool_ids, _ = search_similar_members(
+        db, me.zscores[0], settings.MATCHING_CANDIDATE_POOL,
+        lat=float(lat) if located else None, lon=float(lon) if located else None,
+        radius_km=float(radius_km) if located else None, exclude_user_id=user_id
+    )
+    if len(pool_ids) == 0:
+        return []
+
+    candidates = load_member_profiles(db, pool_ids.tolist())
+    return top_candidates(me, candidates, limit)
+
+
+def create_match_request(db: Session, user_id: int, candidate_id: int) -> Match:
+    """
+    최근 매칭 결과의 후보에게 매칭 신청 (Match 생성, 점수 항목은 후보 계산 결과에서 복사)
+
+    이미 대기 중이거나 진행 중인 매칭이 있으면 그 매칭을 반환합니다.
+
+    Raises:
+        LookupError: 최근 완료된 매칭 결과에 해당 후보가 없음
+    """
+    existing = db.query(Match).filter(
+        ((Match.user1_id == user_id) & (Match.user2_id == candidate_id)) |
+        ((Match.user1_id == candidate_id) & (Match.user2_id == user_id)),
+        Match.status.in_([MatchStatusEnum.PENDING, MatchStatusEnum.ACCEPTED, MatchStatusEnum.ACTIVE])
+    ).first()
+    if existing is not None:
+        return existing
+
+    request = db.query(MatchRequest).filter(
+        MatchRequest.user_id == user_id,
+        MatchRequest.status == STATUS_COMPLETED
+    ).order_by(MatchRequest.id.desc()).first()
+    candidate = next(
+        (c for c in (request.candidates or []) if c["user_id"] == candidate_id), None
+    ) if request else None
+    if candidate is None:
+        raise LookupError("매칭 결과에 없는 후보입니다")
+
+    compatibility = candidate["compatibility"]
+    match = Match(
+        user1_id=user_id,
+        user2_id=candidate_id,
+        requester_id=user_id,
+        compatibility_score=compatibility["total_score"],
+        fitdna_similarity_score=compatibility["fitdna_similarity"],
+        exercise_overlap_score=compatibility["exercise_overlap"],
+        time_overlap_score=compatibility["time_overlap"],
+        location_distance_km=compatibility["location_distance_km"],
+        common_exercises=candidate["common_exercises"],
+        status=MatchStatusEnum.PENDING,
+    )
+    db.add(match)
+    db.commit()
+    return match
+
+
+def public_status(status: str) -> str:
+    """API 응답용 상태 (processing / completed / failed)"""
+    return STATUS_PROCESSING if status == STATUS_RUNNING else status
+
+
+def _claim_match_request(db: Session, request_id: int) -> Optional[datetime]:
+    """
+    'processing' → 'running' 조건부 UPDATE로 요청 선점
+
+    Returns:
+        선점 시각 (결과 기록 시 선점 확인용), 다른 워커가 먼저 가져갔으면 None
+    """
+    claimed_at = datetime.utcnow()
+    result = db.execute(
+        update(MatchRequest).where(
+            MatchRequest.id == request_id,
+            MatchRequest.status == STATUS_PROCESSING
+        ).values(status=STATUS_RUNNING, updated_at=claimed_at),
+        execution_options={"synchronize_session": False}
+    )
+    db.commit()
+    return claimed_at if result.rowcount == 1 else None
+
+
+def _finish_match_request(db: Session, request_id: int, claimed_at: datetime, status: str, candidates):
+    """선점한 요청이 그대로일 때만 결과 기록 (오래 걸려 다시 큐에 들어간 경우 나중 결과를 버림)"""
+    result = db.execute(
+        update(MatchRequest).where(
+            MatchRequest.id == request_id,
+            MatchRequest.status == STATUS_RUNNING,
+            MatchRequest.updated_at == claimed_at
+        ).values(status=status, candidates=candidates, updated_at=datetime.utcnow()),
+        execution_options={"synchronize_session": False}
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def process_match_request(request_id: int) -> None:
+    """매칭 요청 하나 처리 (워커 스레드에서 실행, 선점한 요청만 계산해 결과·상태를 DB에 기록)"""
+    db = SessionLocal()
+    try:
+        claimed_at = _claim_match_request(db, request_id)
+        if claimed_at is None:
+            return
+
+        user_id = db.query(MatchRequest.user_id).filter(MatchRequest.id == request_id).scalar()
+        try:
+            candidates = compute_match_candidates(db, user_id)
+            status = STATUS_COMPLETED
+        except Exception as e:
+            db.rollback()
+            candidates = None
+            status = STATUS_FAILED
+            print(f"❌ 매칭 요청 {request_id} 처리 실패: {e}")
+
+        if not _finish_match_request(db, request_id, claimed_at, status, candidates):
+            print(f"⚠️  매칭 요청 {request_id}: 다른 워커가 다시 가져가 결과를 기록하지 않음")
+    finally:
+        db.close()
+
+
+def enqueue_match_request(db: Session, user_id: int) -> MatchRequest:
+    """
+    매칭 요청 저장 후 큐에 추가
+
+    이미 처리 중인 요청이 있으면 새로 만들지 않고 그 요청을 반환합니다.
+    """
+    pending = db.query(MatchRequest).filter(
+        MatchRequest.user_id == user_id,
+        MatchRequest.status.in_(PENDING_STATUSES)
+    ).order_by(MatchRequest.id.desc()).first()
+    if pending is not None:
+        return pending
+
+    request = MatchRequest(user_id=user_id, request_date=date.today(), status=STATUS_PROCESSING)
+    db.add(request)
+    db.commit()
+    _get_queue().put_nowait(request.id)
+    return request
+
+
+def get_match_request(db: Session, request_id: int) -> Optional[MatchRequest]:
+    """매칭 요청 조회 (기본키 조회, 폴링용)"""
+    return db.get(MatchRequest, request_id)
+
+
+def get_latest_match_request(db: Session, user_id: int) -> Optional[MatchRequest]:
+    """사용자의 가장 최근 매칭 요청"""
+    return db.query(MatchRequest).filter(
+        MatchRequest.user_id == user_id
+    ).order_by(MatchRequest.id.desc()).first()
+
+
+async def matching_worker():
+    """큐에서 요청 ID를 꺼내 스레드에서 처리하는 워커 (앱 시작 시 백그라운드 작업)"""
+    queue = _get_queue()
+    while True:
+        request_id = await queue.get()
+        try:
+            await asyncio.to_thread(process_match_request, request_id)
+        except Exception as e:
+            print(f"❌ 매칭 요청 {request_id} 처리 실패: {e}")
+        finally:
+            queue.task_done()
+
+
+async def requeue_processing_requests(interval: Optional[float] = None):
+    """
+    미처리 요청을 다시 큐에 넣기 (앱 시작 시 바로, 이후 interval초마다)
+
+    - 'running'으로 interval초 넘게 남은 요청(계산하던 워커 프로세스가 죽음)은 'processing'으로 되돌림
+    - 'processing' 요청은 다른 워커 프로세스의 큐에 이미 있을 수 있지만,
+      계산 전 선점(_claim_match_request)이 한 곳만 성공하므로 중복 계산되지 않음
+    """
+    interval = interval or settings.MATCHING_STALE_SECONDS
+
+    def _load_ids():
+        db = SessionLocal()
+        try:
+            stale = db.execute(
+                update(MatchRequest).where(
+                    MatchRequest.status == STATUS_RUNNING,
+                    MatchRequest.updated_at < datetime.utcnow() - timedelta(seconds=interval)
+                ).values(status=STATUS_PROCESSING),
+                execution_options={"synchronize_session": False}
+            ).rowcount
+            db.commit()
+            ids = [row.id for row in db.query(MatchRequest.id).filter(
+                MatchRequest.status == STATUS_PROCESSING
+            ).order_by(MatchRequest.id)]
+            return stale, ids
+        finally:
+            db.close()
+
+    queue = _get_queue()
+    while True:
+        try:
+            stale, ids = await asyncio.to_thread(_load_ids)
+            for request_id in ids:
+                queue.put_nowait(request_id)
+            if stale:
+                print(f"⚠️  중단된 매칭 요청 {stale}건을 다시 처리합니다")
+            if ids:
+                print(f"✅ 미처리 매칭 요청 {len(ids)}건 재등록")
+        except Exception as e:
+            print(f"❌ 미처리 매칭 요청 재등록 실패: {e}")
+        await asyncio.sleep(interval)
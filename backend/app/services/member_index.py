@@ -0,0 +1,465 @@
+"""
+운동 메이트 후보 검색용 회원 벡터 인덱스
+- 회원별 [근력, 유연성, 지구력] Z-Score KD-tree + 활동 위치(단위 구면 xyz) KD-tree
+- Z-Score 거리 상위 k명을 활동 반경 안에서 선형 탐색 없이 검색
+- FIT-DNA 결과 저장 / 위치 변경은 커밋 시 기록해 두었다가 다음 검색 전에 반영 (같은 프로세스)
+- settings.MEMBER_INDEX_REFRESH_SECONDS마다 DB 시그니처를 확인해 다른 워커 프로세스나
+  세션 밖에서 바뀐 회원도 반영 (바뀐 회원만 갱신, 맞지 않으면 전체 재생성)
+"""
+
+import asyncio
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import event, func, inspect, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import User, FitDNAResult, FitnessMeasurement
+from app.utils.geo import haversine_km_many, km_to_chord, unit_xyz
+
+# 반경 안 회원이 이 수 이하이면 위치로 먼저 거르고, 넘으면 Z-Score 최근접부터 넓혀 가며 위치 확인
+SPATIAL_FIRST_LIMIT = 20000
+
+
+def score_to_zscore(score: Optional[float]) -> float:
+    """0-10 점수 → Z-Score (zscore_to_score_0_10의 역변환, 점수가 없으면 평균 0)"""
+    if score is None:
+        return 0.0
+    return score / 10 * 6 - 3
+
+
+def zscores_from_columns(measured: np.ndarray, scores: np.ndarray) -> np.ndarray:
+    """
+    측정 기록 Z-Score / 0-10 점수 열 → 회원별 Z-Score (n, 3)
+
+    측정 기록의 근력 Z-Score가 있으면 측정 기록 값(빠진 값은 0), 없으면 0-10 점수에서 복원합니다
+    (없는 값은 NaN).
+    """
+    measured = np.asarray(measured, dtype=float).reshape(-1, 3)
+    scores = np.asarray(scores, dtype=float).reshape(-1, 3)
+    restored = np.nan_to_num(scores / 10 * 6 - 3, nan=0.0)
+    return np.where(np.isnan(measured[:, :1]), restored, np.nan_to_num(measured, nan=0.0))
+
+
+def _member_rows_query(user_ids: Optional[Iterable[int]] = None):
+    """활성 회원의 현재 FIT-DNA 결과 (user_id, 측정 Z-Score 3개, 0-10 점수 3개, 위도, 경도)"""
+    query = select(
+        FitDNAResult.user_id,
+        FitnessMeasurement.strength_zscore, FitnessMeasurement.flexibility_zscore, FitnessMeasurement.endurance_zscore,
+        FitDNAResult.strength_score, FitDNAResult.flexibility_score, FitDNAResult.endurance_score,
+        User.latitude, User.longitude,
+    ).join(
+        User, User.id == FitDNAResult.user_id
+    ).outerjoin(
+        FitnessMeasurement, FitnessMeasurement.id == FitDNAResult.measurement_id
+    ).where(
+        FitDNAResult.is_current == 1,
+        User.is_active == True  # noqa: E712
+    ).order_by(FitDNAResult.id)
+    if user_ids is not None:
+        query = query.where(FitDNAResult.user_id.in_(list(user_ids)))
+    return query
+
+
+def load_member_vectors(db: Session, user_ids: Optional[Iterable[int]] = None):
+    """
+    회원 벡터 배열 로드
+
+    Z-Score는 측정 기록 값을 쓰고, 측정 기록이 없으면 0-10 점수에서 복원합니다 (zscores_from_columns).
+
+    Returns:
+        (user_ids (n,), zscores (n, 3), lats (n,), lons (n,)) - 위치가 없으면 NaN
+    """
+    rows = db.execute(_member_rows_query(user_ids)).all()
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty((0, 3)), np.empty(0), np.empty(0)
+
+    data = np.array([[np.nan if v is None else v for v in row] for row in rows], dtype=float)
+    ids = data[:, 0].astype(np.int64)
+
+    # 현재 결과가 여러 개인 회원은 마지막 결과만 사용
+    _, last = np.unique(ids[::-1], return_index=True)
+    keep = np.sort(len(ids) - 1 - last)
+    data, ids = data[keep], ids[keep]
+
+    return ids, zscores_from_columns(data[:, 1:4], data[:, 4:7]), data[:, 7], data[:, 8]
+
+
+class MemberVectorIndex:
+    """
+    회원 Z-Score / 위치 인덱스
+
+    - z_tree: 전체 회원의 Z-Score 3차원 KD-tree
+    - geo_tree: 위치가 있는 회원의 단위 구면 xyz KD-tree (시설 KD-tree와 같은 현 거리 방식)
+
+    갱신된 회원은 트리 안의 기존 행을 삭제 표시하고 보조 배열에 추가해 선형 탐색합니다.
+    삭제 표시 + 보조 배열이 rebuild_ratio × 트리 크기를 넘으면 트리를 다시 만듭니다.
+    """
+
+    def __init__(self, user_ids: np.ndarray, zscores: np.ndarray, lats: np.ndarray, lons: np.ndarray,
+                 leaf_size: int = 40, rebuild_ratio: float = 0.05):
+        self.leaf_size = leaf_size
+        self.rebuild_ratio = rebuild_ratio
+        self._build(np.asarray(user_ids, dtype=np.int64), np.asarray(zscores, dtype=float).reshape(-1, 3),
+                    np.asarray(lats, dtype=float), np.asarray(lons, dtype=float))
+
+    def _build(self, ids: np.ndarray, zscores: np.ndarray, lats: np.ndarray, lons: np.ndarray):
+        from sklearn.neighbors import KDTree
+
+        self.ids = ids
+        self.zscores = zscores
+        self.lats = lats
+        self.lons = lons
+        self.alive = np.ones(len(ids), dtype=bool)
+        self.n_dead = 0
+        self.rows: Dict[int, int] = {int(user_id): row for row, user_id in enumerate(ids)}
+
+        self.z_tree = KDTree(zscores, leaf_size=self.leaf_size) if len(ids) else None
+        self.geo_rows = np.flatnonzero(~np.isnan(lats))
+        self.geo_tree = KDTree(unit_xyz(lats[self.geo_rows], lons[self.geo_rows]), leaf_size=self.leaf_size) \
+            if len(self.geo_rows) else None
+
+        self.pending_ids = np.empty(0, dtype=np.int64)
+        self.pending_zscores = np.empty((0, 3))
+        self.pending_lats = np.empty(0)
+        self.pending_lons = np.empty(0)
+
+    @classmethod
+    def from_db(cls, db: Session) -> "MemberVectorIndex":
+        """활성 회원의 현재 FIT-DNA 결과로 인덱스 생성"""
+        return cls(*load_member_vectors(db))
+
+    def __len__(self) -> int:
+        return len(self.ids) - self.n_dead + len(self.pending_ids)
+
+    def _remove(self, user_ids: np.ndarray):
+        """회원 삭제 (트리 행은 삭제 표시, 보조 배열에서는 제거)"""
+        for user_id in user_ids:
+            row = self.rows.pop(int(user_id), None)
+            if row is not None:
+                self.alive[row] = False
+                self.n_dead += 1
+        if len(self.pending_ids):
+            keep = ~np.isin(self.pending_ids, user_ids)
+            self.pending_ids = self.pending_ids[keep]
+            self.pending_zscores = self.pending_zscores[keep]
+            self.pending_lats = self.pending_lats[keep]
+            self.pending_lons = self.pending_lons[keep]
+
+    def remove(self, user_ids: Iterable[int]):
+        """회원 삭제 (FIT-DNA 결과 없음 / 비활성)"""
+        self._remove(np.asarray(list(user_ids), dtype=np.int64))
+        self._maybe_rebuild()
+
+    def upsert(self, user_ids: np.ndarray, zscores: np.ndarray, lats: np.ndarray, lons: np.ndarray):
+        """회원 추가 또는 갱신 (보조 배열에 추가)"""
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        if len(user_ids) == 0:
+            return
+        self._remove(user_ids)
+        self.pending_ids = np.concatenate([self.pending_ids, user_ids])
+        self.pending_zscores = np.concatenate([self.pending_zscores, np.asarray(zscores, dtype=float).reshape(-1, 3)])
+        self.pending_lats = np.concatenate([self.pending_lats, np.asarray(lats, dtype=float)])
+        self.pending_lons = np.concatenate([self.pending_lons, np.asarray(lons, dtype=float)])
+        self._maybe_rebuild()
+
+    def _maybe_rebuild(self):
+        if self.n_dead + len(self.pending_ids) > max(self.rebuild_ratio * len(self.ids), self.leaf_size):
+            alive = self.alive
+            self._build(np.concatenate([self.ids[alive], self.pending_ids]),
+                        np.concatenate([self.zscores[alive], self.pending_zscores]),
+                        np.concatenate([self.lats[alive], self.pending_lats]),
+                        np.concatenate([self.lons[alive], self.pending_lons]))
+
+    def _spatial_first(self, zscore: np.ndarray, point: np.ndarray, chord: float,
+                       k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """반경 안 회원을 위치 KD-tree로 모은 뒤 Z-Score 거리 상위 k개 (트리 행, Z-Score 거리)"""
+        rows = self.geo_rows[self.geo_tree.query_radius(point, chord)[0]]
+        rows = rows[self.alive[rows]]
+        distances = np.sqrt(((self.zscores[rows] - zscore) ** 2).sum(axis=1))
+        if len(rows) > k:
+            top = np.argpartition(distances, k)[:k]
+            rows, distances = rows[top], distances[top]
+        return rows, distances
+
+    def _zscore_first(self, zscore: np.ndarray, k: int, lat: Optional[float], lon: Optional[float],
+                      radius_km: Optional[float], expected_ratio: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Z-Score KD-tree 최근접을 k개가 찰 때까지 넓혀 가며 삭제·반경 조건 확인 (트리 행, Z-Score 거리)"""
+        n = len(self.ids)
+        fetch = min(n, int(k / max(expected_ratio, 1e-9) * 1.5) + self.leaf_size)
+        while True:
+            distances, rows = self.z_tree.query(zscore[None, :], k=fetch)
+            distances, rows = distances[0], rows[0]
+            keep = self.alive[rows]
+            if radius_km is not None:
+                keep &= ~np.isnan(self.lats[rows])
+                keep[keep] = haversine_km_many(lat, lon, self.lats[rows[keep]], self.lons[rows[keep]]) <= radius_km
+            if keep.sum() >= k or fetch >= n:
+                return rows[keep][:k], distances[keep][:k]
+            fetch = min(n, fetch * 4)
+
+    def query(self, zscore, k: int, lat: Optional[float] = None, lon: Optional[float] = None,
+              radius_km: Optional[float] = None,
+              exclude_user_id: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Z-Score 거리가 가까운 회원 k명 (활동 반경 조건 선택)
+
+        Args:
+            zscore: 기준 [근력, 유연성, 지구력] Z-Score
+            k: 회원 수
+            lat, lon, radius_km: 주어지면 이 반경 안에 위치가 등록된 회원만
+            exclude_user_id: 제외할 회원 (요청자 본인)
+
+        Returns:
+            (회원 ID 배열, Z-Score 유클리드 거리 배열) - 거리순
+        """
+        zscore = np.asarray(zscore, dtype=float).reshape(3)
+        located = radius_km is not None and lat is not None and lon is not None
+        if not located:
+            radius_km = None
+        want = k + (1 if exclude_user_id is not None else 0)
+
+        rows = np.empty(0, dtype=np.int64)
+        distances = np.empty(0)
+        if self.z_tree is not None and want > 0:
+            if located:
+                if self.geo_tree is not None:
+                    point = unit_xyz([lat], [lon])
+                    # 현 길이 비교의 부동소수점 오차 여유
+                    chord = km_to_chord(radius_km) * (1 + 1e-9)
+                    in_radius = int(self.geo_tree.query_radius(point, chord, count_only=True)[0])
+                    if in_radius <= SPATIAL_FIRST_LIMIT:
+                        rows, distances = self._spatial_first(zscore, point, chord, want)
+                        inside = haversine_km_many(lat, lon, self.lats[rows], self.lons[rows]) <= radius_km
+                        rows, distances = rows[inside], distances[inside]
+                    else:
+                        rows, distances = self._zscore_first(
+                            zscore, want, lat, lon, radius_km, in_radius / len(self.ids)
+                        )
+            else:
+                rows, distances = self._zscore_first(
+                    zscore, want, None, None, None, 1 - self.n_dead / len(self.ids)
+                )
+
+        ids = [self.ids[rows]]
+        dists = [distances]
+        if len(self.pending_ids):
+            pending = np.sqrt(((self.pending_zscores - zscore) ** 2).sum(axis=1))
+            keep = np.ones(len(pending), dtype=bool)
+            if located:
+                keep = ~np.isnan(self.pending_lats)
+                keep[keep] = haversine_km_many(
+                    lat, lon, self.pending_lats[keep], self.pending_lons[keep]
+                ) <= radius_km
+            ids.append(self.pending_ids[keep])
+            dists.append(pending[keep])
+
+        ids = np.concatenate(ids)
+        dists = np.concatenate(dists)
+        if exclude_user_id is not None:
+            keep = ids != exclude_user_id
+            ids, dists = ids[keep], dists[keep]
+
+        order = np.argsort(dists, kind='stable')[:k]
+        return ids[order], dists[order]
+
+    def __repr__(self):
+        return f"<MemberVectorIndex(members={len(self)}, pending={len(self.pending_ids)}, deleted={self.n_dead})>"
+
+
+# ===== 인덱스 상태 (프로세스 전역) =====
+
+_index: Optional[MemberVectorIndex] = None
+_index_lock = threading.Lock()
+# 동시에 처음 검색이 들어와도 인덱스는 한 번만 생성
+_build_lock = threading.RLock()
+
+# 인덱스를 만들거나 마지막으로 맞춘 시점의 DB 시그니처, 마지막 확인 시각
+_signature: Optional[tuple] = None
+_checked_at = 0.0
+
+# 커밋됐지만 인덱스에 아직 반영하지 않은 회원 ID
+_dirty_users = set()
+_dirty_lock = threading.Lock()
+
+
+def _member_signature(db: Session) -> tuple:
+    """
+    회원 테이블 변경 감지용
+    (현재 결과가 있는 활성 회원 수, 최대 결과 ID, 결과 최종 수정 시각, 회원 최종 수정 시각)
+    """
+    count = db.query(func.count(func.distinct(FitDNAResult.user_id))).join(
+        User, User.id == FitDNAResult.user_id
+    ).filter(
+        FitDNAResult.is_current == 1,
+        User.is_active == True  # noqa: E712
+    ).scalar()
+    max_id, result_updated = db.query(func.max(FitDNAResult.id), func.max(FitDNAResult.updated_at)).one()
+    user_updated = db.query(func.max(User.updated_at)).scalar()
+    return count, max_id, result_updated, user_updated
+
+
+def rebuild_member_index(db: Session) -> MemberVectorIndex:
+    """DB에서 회원 인덱스를 새로 만들어 교체"""
+    global _index, _signature, _checked_at
+    with _build_lock:
+        with _dirty_lock:
+            _dirty_users.clear()
+        signature = _member_signature(db)
+        index = MemberVectorIndex.from_db(db)
+        with _index_lock:
+            _index = index
+        _signature, _checked_at = signature, time.monotonic()
+
+    print(f"✅ 회원 벡터 인덱스 생성 완료 ({len(index):,}명)")
+    return index
+
+
+def _apply_user_changes(db: Session, index: MemberVectorIndex, user_ids):
+    """회원들의 현재 벡터를 다시 읽어 인덱스에 반영 (결과가 없거나 비활성이면 삭제)"""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    ids, zscores, lats, lons = load_member_vectors(db, user_ids)
+    with _index_lock:
+        index.remove(set(user_ids) - set(ids.tolist()))
+        index.upsert(ids, zscores, lats, lons)
+
+
+def _apply_dirty_users(db: Session, index: MemberVectorIndex):
+    """커밋된 FIT-DNA 결과 저장 / 위치 변경을 인덱스에 반영 (같은 프로세스의 세션 이벤트)"""
+    with _dirty_lock:
+        user_ids = list(_dirty_users)
+        _dirty_users.clear()
+    _apply_user_changes(db, index, user_ids)
+
+
+def _refresh_member_index(db: Session, index: MemberVectorIndex) -> MemberVectorIndex:
+    """
+    DB 시그니처가 바뀌었으면 인덱스 갱신
+
+    이전 시그니처 이후 추가·수정된 결과(ID / 수정 시각)와 수정된 회원만 다시 읽어 반영하고,
+    반영 후 회원 수가 DB와 다르면(행 삭제 등) 전체를 다시 만듭니다.
+    """
+    global _signature, _checked_at
+    with _build_lock:
+        if _index is not index or time.monotonic() - _checked_at < settings.MEMBER_INDEX_REFRESH_SECONDS:
+            return _index
+        _checked_at = time.monotonic()
+
+        signature = _member_signature(db)
+        if signature == _signature:
+            return index
+
+        _, old_max_id, old_result_updated, old_user_updated = _signature
+        if old_max_id is None or old_result_updated is None or old_user_updated is None:
+            return rebuild_member_index(db)
+
+        changed = {user_id for (user_id,) in db.query(FitDNAResult.user_id).filter(or_(
+            FitDNAResult.id > old_max_id,
+            FitDNAResult.updated_at >= old_result_updated
+        ))}
+        changed.update(user_id for (user_id,) in db.query(User.id).filter(User.updated_at >= old_user_updated))
+        if len(changed) > max(index.rebuild_ratio * len(index), index.leaf_size):
+            return rebuild_member_index(db)
+
+        _apply_user_changes(db, index, changed)
+        if len(index) != signature[0]:
+            return rebuild_member_index(db)
+
+        _signature = signature
+        print(f"✅ 회원 벡터 인덱스 갱신 ({len(changed):,}명)")
+        return index
+
+
+def get_member_index(db: Session) -> MemberVectorIndex:
+    """
+    현재 회원 인덱스 (없으면 생성)
+
+    같은 프로세스에서 커밋된 변경은 바로 반영하고,
+    settings.MEMBER_INDEX_REFRESH_SECONDS마다 DB 시그니처로 그 밖의 변경을 확인합니다.
+    """
+    index = _index
+    if index is None:
+        with _build_lock:
+            if _index is None:
+                return rebuild_member_index(db)
+            index = _index
+    _apply_dirty_users(db, index)
+    if time.monotonic() - _checked_at >= settings.MEMBER_INDEX_REFRESH_SECONDS:
+        index = _refresh_member_index(db, index)
+    return index
+
+
+def search_similar_members(db: Session, zscore, k: int,
+                           lat: Optional[float] = None, lon: Optional[float] = None,
+                           radius_km: Optional[float] = None,
+                           exclude_user_id: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Z-Score가 가까운 회원 k명 (MemberVectorIndex.query, 인덱스 갱신과 동시에 실행되지 않도록 잠금)
+
+    Returns:
+        (회원 ID 배열, Z-Score 유클리드 거리 배열) - 거리순
+    """
+    index = get_member_index(db)
+    with _index_lock:
+        return index.query(zscore, k, lat=lat, lon=lon, radius_km=radius_km, exclude_user_id=exclude_user_id)
+
+
+async def build_member_index_async():
+    """앱 시작 시 백그라운드에서 인덱스 생성"""
+
+    def _build():
+        db = SessionLocal()
+        try:
+            rebuild_member_index(db)
+        finally:
+            db.close()
+
+    try:
+        await asyncio.to_thread(_build)
+    except Exception as e:
+        print(f"❌ 회원 벡터 인덱스 생성 실패: {e}")
+
+
+# ===== 변경 추적 (ORM 세션 이벤트) =====
+
+_USER_INDEX_FIELDS = ("latitude", "longitude", "is_active")
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_member_changes(session: Session, flush_context):
+    """플러시된 FIT-DNA 결과 / 회원 위치·활성 변경을 세션에 기록"""
+    changed = session.info.setdefault("member_index_users", set())
+    for obj in session.new:
+        if isinstance(obj, FitDNAResult):
+            changed.add(obj.user_id)
+    for obj in session.dirty:
+        if isinstance(obj, FitDNAResult):
+            changed.add(obj.user_id)
+        elif isinstance(obj, User):
+            state = inspect(obj)
+            if any(state.attrs[name].history.has_changes() for name in _USER_INDEX_FIELDS):
+                changed.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, FitDNAResult):
+            changed.add(obj.user_id)
+        elif isinstance(obj, User):
+            changed.add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_members_dirty(session: Session):
+    changed = session.info.pop("member_index_users", None)
+    if changed:
+        with _dirty_lock:
+            _dirty_users.update(changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_member_changes(session: Session):
+    session.info.pop("member_index_users", None)
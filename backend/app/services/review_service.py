@@ -0,0 +1,223 @@
+"""
+시설 리뷰 서비스
+- 리뷰 작성/삭제 시 시설의 리뷰 수·평점 합계·세부 항목 합계를 증분 갱신 (UPDATE 한 번)
+- 상세 화면/랭킹은 facilities 행의 집계값만 읽음 (AVG() 재계산 없음)
+- 주기적으로 facility_reviews 전체를 다시 집계해 어긋난 시설만 보정
+"""
+
+import asyncio
+from typing import Dict, Optional
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models import Facility, FacilityReview
+
+# 세부 평가 항목 (FacilityReview.<항목>_rating ↔ Facility.<항목>_sum / <항목>_count)
+REVIEW_DIMENSIONS = ('cleanliness', 'equipment', 'staff', 'value')
+
+# 보정 시 허용 오차 (부동소수점 누적 오차)
+RECONCILE_TOLERANCE = 1e-6
+
+
+def _average(total: float, count: int) -> Optional[float]:
+    return round(total / count, 2) if count else None
+
+
+def review_summary(facility) -> Dict:
+    """
+    시설 행의 집계값 → 평점 요약 (O(1))
+
+    Returns:
+        {"average_rating", "total_reviews", "scores": {"cleanliness": 4.5, ...}}
+    """
+    return {
+        "average_rating": round(facility.average_rating or 0.0, 2),
+        "total_reviews": facility.total_reviews or 0,
+        "scores": {
+            dimension: _average(getattr(facility, f"{dimension}_sum") or 0.0,
+                                getattr(facility, f"{dimension}_count") or 0)
+            for dimension in REVIEW_DIMENSIONS
+        },
+    }
+
+
+def _apply_review_delta(db: Session, review: FacilityReview, sign: int):
+    """
+    리뷰 하나를 시설 집계에 더하거나(sign=1) 빼기(sign=-1)
+
+    SET 절의 우변은 갱신 전 값을 참조하므로 UPDATE 한 번으로 원자적으로 반영되고,
+    같은 트랜잭션 안에서 갱신된 합계로 review_scores를 채웁니다.
+    """
+    count = Facility.total_reviews + sign
+    rating_sum = Facility.rating_sum + sign * review.overall_rating
+    values = {
+        "total_reviews": count,
+        "rating_sum": rating_sum,
+        "average_rating": case((count > 0, rating_sum / count), else_=0.0),
+    }
+    for dimension in REVIEW_DIMENSIONS:
+        rating = getattr(review, f"{dimension}_rating")
+        if rating is not None:
+            values[f"{dimension}_sum"] = getattr(Facility, f"{dimension}_sum") + sign * rating
+            values[f"{dimension}_count"] = getattr(Facility, f"{dimension}_count") + sign
+
+    db.execute(
+        update(Facility).where(Facility.id == review.facility_id).values(**values),
+        execution_options={"synchronize_session": False}
+    )
+    _refresh_review_scores(db, review.facility_id)
+
+
+def _refresh_review_scores(db: Session, facility_id: int):
+    """세부 항목 합계 → review_scores (항목별 평균) 갱신"""
+    columns = [getattr(Facility, f"{dimension}_{part}") for dimension in REVIEW_DIMENSIONS for part in ("sum", "count")]
+    row = db.execute(select(*columns).where(Facility.id == facility_id)).one()
+    scores = {
+        dimension: _average(row[2 * i], row[2 * i + 1])
+        for i, dimension in enumerate(REVIEW_DIMENSIONS)
+    }
+    db.execute(
+        update(Facility).where(Facility.id == facility_id).values(review_scores=scores),
+        execution_options={"synchronize_session": False}
+    )
+
+
+def add_review(db: Session, facility_id: int, user_id: int, overall_rating: float,
+               comment: Optional[str] = None, **dimension_ratings) -> FacilityReview:
+    """
+    리뷰 저장 + 시설 집계 증분 갱신 (한 트랜잭션)
+
+    Args:
+        db: DB 세션
+        facility_id: 시설 ID
+        user_id: 작성자 ID
+        overall_rating: 종합 평점 (1.0-5.0)
+        comment: 리뷰 내용
+        **dimension_ratings: cleanliness/equipment/staff/value 평점 (선택)
+
+    Returns:
+        저장된 FacilityReview
+    """
+    review = FacilityReview(
+        facility_id=facility_id,
+        user_id=user_id,
+        overall_rating=overall_rating,
+        comment=comment,
+        **{f"{dimension}_rating": dimension_ratings.get(dimension) for dimension in REVIEW_DIMENSIONS}
+    )
+    try:
+        db.add(review)
+        db.flush()
+        _apply_review_delta(db, review, 1)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    db.refresh(review)
+    return review
+
+
+def delete_review(db: Session, review: FacilityReview):
+    """리뷰 삭제 + 시설 집계에서 빼기 (한 트랜잭션)"""
+    try:
+        _apply_review_delta(db, review, -1)
+        db.delete(review)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+# ===== 보정 =====
+
+def reconcile_review_aggregates(db: Session) -> int:
+    """
+    facility_reviews 전체를 GROUP BY로 다시 집계해 시설 집계값과 비교하고,
+    어긋난 시설만 고침 (리뷰가 없는데 집계값이 남은 시설은 0으로)
+
+    리뷰 수·합계/개수뿐 아니라 그로부터 계산되는 average_rating과
+    review_scores도 비교하므로, 합계는 맞는데 평균만 틀린 행도 고칩니다.
+
+    Returns:
+        보정한 시설 수
+    """
+    aggregates = [func.count(FacilityReview.id), func.coalesce(func.sum(FacilityReview.overall_rating), 0.0)]
+    for dimension in REVIEW_DIMENSIONS:
+        rating = getattr(FacilityReview, f"{dimension}_rating")
+        aggregates += [func.coalesce(func.sum(rating), 0.0), func.count(rating)]
+
+    actual = {
+        row[0]: tuple(row[1:])
+        for row in db.execute(select(FacilityReview.facility_id, *aggregates).group_by(FacilityReview.facility_id))
+    }
+
+    stored_columns = [Facility.total_reviews, Facility.rating_sum]
+    for dimension in REVIEW_DIMENSIONS:
+        stored_columns += [getattr(Facility, f"{dimension}_sum"), getattr(Facility, f"{dimension}_count")]
+    empty = (0, 0.0) + (0.0, 0) * len(REVIEW_DIMENSIONS)
+
+    corrected = 0
+    try:
+        rows = db.execute(
+            select(Facility.id, Facility.average_rating, Facility.review_scores, *stored_columns)
+        ).all()
+        for row in rows:
+            facility_id, average, scores = row[0], row[1] or 0.0, row[2]
+            stored = tuple(value or 0 for value in row[3:])
+            expected = actual.pop(facility_id, empty)
+
+            count, rating_sum = expected[0], expected[1]
+            expected_average = rating_sum / count if count else 0.0
+            expected_scores = {
+                dimension: _average(expected[2 + 2 * i], expected[3 + 2 * i])
+                for i, dimension in enumerate(REVIEW_DIMENSIONS)
+            }
+            # 리뷰가 없는 시설은 review_scores가 비어 있어도 일치로 봄
+            scores_ok = scores == expected_scores or (scores is None and count == 0)
+            if (all(abs(a - b) <= RECONCILE_TOLERANCE for a, b in zip(stored, expected))
+                    and abs(average - expected_average) <= RECONCILE_TOLERANCE and scores_ok):
+                continue
+
+            values = {
+                "total_reviews": count,
+                "rating_sum": rating_sum,
+                "average_rating": expected_average,
+            }
+            for i, dimension in enumerate(REVIEW_DIMENSIONS):
+                values[f"{dimension}_sum"] = expected[2 + 2 * i]
+                values[f"{dimension}_count"] = expected[3 + 2 * i]
+            db.execute(
+                update(Facility).where(Facility.id == facility_id).values(**values),
+                execution_options={"synchronize_session": False}
+            )
+            _refresh_review_scores(db, facility_id)
+            corrected += 1
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return corrected
+
+
+async def reconcile_review_aggregates_periodically(interval: float):
+    """시작 직후 한 번, 이후 interval초마다 리뷰 집계 보정 (앱 시작 시 백그라운드 작업)"""
+
+    def _reconcile():
+        db = SessionLocal()
+        try:
+            return reconcile_review_aggregates(db)
+        finally:
+            db.close()
+
+    while True:
+        try:
+            corrected = await asyncio.to_thread(_reconcile)
+            if corrected:
+                print(f"✅ 시설 리뷰 집계 보정 ({corrected:,}개 시설)")
+        except Exception as e:
+            print(f"❌ 시설 리뷰 집계 보정 실패: {e}")
+        await asyncio.sleep(interval)
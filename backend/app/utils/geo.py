@@ -0,0 +1,129 @@
+"""
+위치 계산 유틸리티
+- Haversine 거리 (km) - 스칼라 / 한 지점→배열 / 배열 간 행렬 (numpy 벡터화)
+- 단위 구면 xyz 좌표 ↔ 현(chord) 거리 (KD-tree 검색용)
+- 위도/경도 격자(grid cell) 키
+"""
+
+import math
+from typing import Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+# 격자 크기 (도 단위, 0.01° ≈ 위도 방향 1.1km)
+GRID_CELL_DEG = 0.01
+GRID_N_LAT = int(round(180 / GRID_CELL_DEG))
+GRID_N_LON = int(round(360 / GRID_CELL_DEG))
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """두 지점 사이의 거리 (Haversine formula, km 단위)"""
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    delta_lat = math.radians(lat2 - lat1)
+    delta_lon = math.radians(lon2 - lon1)
+
+    a = math.sin(delta_lat / 2) ** 2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon / 2) ** 2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+    return EARTH_RADIUS_KM * c
+
+
+def _haversine_km(lat1_rad, lon1_rad, lat2_rad, lon2_rad) -> np.ndarray:
+    """라디안 배열 간 Haversine 거리 (numpy 브로드캐스팅)"""
+    a = np.sin((lat2_rad - lat1_rad) / 2) ** 2 + \
+        np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin((lon2_rad - lon1_rad) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def haversine_km_many(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """한 지점 → 여러 지점 거리 배열 (km)"""
+    return _haversine_km(
+        math.radians(lat), math.radians(lon),
+        np.radians(np.asarray(lats, dtype=float)), np.radians(np.asarray(lons, dtype=float))
+    )
+
+
+def haversine_km_pairwise(lats1: np.ndarray, lons1: np.ndarray,
+                          lats2: np.ndarray, lons2: np.ndarray) -> np.ndarray:
+    """
+    두 지점 배열 간 거리 행렬 (km)
+
+    Returns:
+        (len(lats1), len(lats2)) 행렬 - [i, j]는 i번째 지점과 j번째 지점 사이 거리
+    """
+    lat1 = np.radians(np.asarray(lats1, dtype=float))[:, None]
+    lon1 = np.radians(np.asarray(lons1, dtype=float))[:, None]
+    lat2 = np.radians(np.asarray(lats2, dtype=float))[None, :]
+    lon2 = np.radians(np.asarray(lons2, dtype=float))[None, :]
+    return _haversine_km(lat1, lon1, lat2, lon2)
+
+
+def unit_xyz(lats, lons) -> np.ndarray:
+    """위도/경도 → 단위 구면 xyz 좌표 (n, 3)"""
+    lat_rad = np.radians(np.asarray(lats, dtype=float))
+    lon_rad = np.radians(np.asarray(lons, dtype=float))
+    cos_lat = np.cos(lat_rad)
+    return np.column_stack([cos_lat * np.cos(lon_rad), cos_lat * np.sin(lon_rad), np.sin(lat_rad)])
+
+
+def chord_to_km(chord: np.ndarray) -> np.ndarray:
+    """단위 구면 직선(현) 거리 → 대원 거리 (km)"""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0.0, 1.0))
+
+
+def km_to_chord(distance_km: float) -> float:
+    """대원 거리 (km) → 단위 구면 직선(현) 거리"""
+    return 2 * math.sin(min(distance_km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+def grid_cell(lat: float, lon: float) -> int:
+    """
+    위도/경도 → 격자 키 (ilat * GRID_N_LON + ilon)
+
+    같은 위도 줄의 격자는 키가 연속이므로 경도 범위를 키 구간 하나로 조회할 수 있습니다.
+    """
+    ilat = min(max(int(math.floor((lat + 90.0) / GRID_CELL_DEG)), 0), GRID_N_LAT - 1)
+    ilon = int(math.floor((lon + 180.0) / GRID_CELL_DEG)) % GRID_N_LON
+    return ilat * GRID_N_LON + ilon
+
+
+def grid_cells(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """grid_cell()의 배열 버전"""
+    ilat = np.clip(np.floor((np.asarray(lats) + 90.0) / GRID_CELL_DEG), 0, GRID_N_LAT - 1).astype(np.int64)
+    ilon = np.floor((np.asarray(lons) + 180.0) / GRID_CELL_DEG).astype(np.int64) % GRID_N_LON
+    return ilat * GRID_N_LON + ilon
+
+
+def radius_bounds(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    반경 원을 감싸는 위도/경도 범위 (lat_min, lat_max, lon_min, lon_max)
+
+    - 극점이 원 안에 들어오면 경도는 전체(-180~180)
+    - 경도 범위가 날짜변경선을 넘으면 lon_min > lon_max (둘로 나눠 조회)
+    """
+    angular = radius_km / EARTH_RADIUS_KM
+    dlat = math.degrees(angular)
+    lat_min = max(lat - dlat, -90.0)
+    lat_max = min(lat + dlat, 90.0)
+
+    if lat_min <= -90.0 or lat_max >= 90.0:
+        return lat_min, lat_max, -180.0, 180.0
+
+    # 원의 최대 경도 폭: asin(sin(r/R) / cos(lat))
+    ratio = math.sin(angular) / math.cos(math.radians(lat))
+    if ratio >= 1.0:
+        return lat_min, lat_max, -180.0, 180.0
+    dlon = math.degrees(math.asin(ratio))
+
+    lon_min = lon - dlon
+    lon_max = lon + dlon
+    if dlon >= 180.0:
+        return lat_min, lat_max, -180.0, 180.0
+    if lon_min < -180.0:
+        lon_min += 360.0
+    if lon_max > 180.0:
+        lon_max -= 360.0
+    return lat_min, lat_max, lon_min, lon_max
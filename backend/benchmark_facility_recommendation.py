@@ -0,0 +1,94 @@
+"""
+시설 추천 랭킹 벤치마크
+합성 시설 N개(서울 근방)와 주간 혼잡도 프로필을 임시 SQLite DB에 만들고
+recommend_facilities() 지연 시간(p50/p95)을 반경별로 측정합니다.
+
+사용법 (backend 디렉토리에서):
+    python benchmark_facility_recommendation.py [시설 수] [쿼리 수]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+# 앱 설정보다 먼저 임시 DB 지정
+_db_dir = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_db_dir, 'benchmark.db')}"
+
+from app.core.database import SessionLocal, engine  # noqa: E402
+from app.models import Base, Facility, FacilityCongestionProfile  # noqa: E402
+from app.services import facility_search  # noqa: E402
+from app.services.congestion_service import SLOTS, get_congestion_store  # noqa: E402
+from app.services.facility_recommendation import recommend_facilities  # noqa: E402
+from app.utils.geo import grid_cells  # noqa: E402
+
+SPORTS = ['헬스', '수영', '요가', '필라테스', '농구', '축구', '배드민턴', '테니스', '클라이밍', '러닝']
+
+
+def seed(n, rng):
+    """합성 시설 + 혼잡도 프로필 적재"""
+    Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+    lats = rng.uniform(37.4, 37.7, n)
+    lons = rng.uniform(126.8, 127.2, n)
+    cells = grid_cells(lats, lons)
+    reviews = rng.integers(0, 50, n)
+
+    facilities = [
+        {
+            'id': i + 1, 'name': f'시설{i + 1}', 'facility_type': 'gym', 'address': '서울',
+            'latitude': float(lats[i]), 'longitude': float(lons[i]), 'grid_cell': int(cells[i]),
+            'sports': ','.join(rng.choice(SPORTS, size=rng.integers(1, 4), replace=False)),
+            'average_rating': float(rng.uniform(1, 5)) if reviews[i] else 0.0,
+            'total_reviews': int(reviews[i]), 'is_active': True,
+            'created_at': now, 'updated_at': now,
+        }
+        for i in range(n)
+    ]
+    profiles = rng.integers(0, 101, (n, SLOTS), dtype=np.uint8)
+    with engine.begin() as conn:
+        conn.execute(Facility.__table__.insert(), facilities)
+        conn.execute(FacilityCongestionProfile.__table__.insert(), [
+            {'facility_id': i + 1, 'scores': profiles[i].tobytes(), 'created_at': now, 'updated_at': now}
+            for i in range(n)
+        ])
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    rng = np.random.default_rng(0)
+    print("=" * 70)
+    print(f"시설 추천 랭킹 벤치마크 (시설 {n:,}개, 쿼리 {n_queries}개, top 10)")
+    print("=" * 70)
+
+    start = time.perf_counter()
+    seed(n, rng)
+    print(f"\n합성 데이터 적재: {time.perf_counter() - start:.1f}초")
+
+    db = SessionLocal()
+    try:
+        facility_search.rebuild_facility_index(db, "grid")
+        get_congestion_store(db)
+
+        queries = list(zip(rng.uniform(37.4, 37.7, n_queries), rng.uniform(126.8, 127.2, n_queries)))
+        for radius_km in (1.0, 2.0, 5.0):
+            candidates = []
+            latencies = []
+            for lat, lon in queries:
+                ids, _ = facility_search.nearby_candidates(db, lat, lon, radius_km)
+                candidates.append(len(ids))
+
+                start = time.perf_counter()
+                recommend_facilities(db, lat, lon, radius_km, 10, fitdna_type='PSQ')
+                latencies.append((time.perf_counter() - start) * 1000)
+
+            print(f"\n반경 {radius_km}km (평균 후보 {np.mean(candidates):,.0f}개)")
+            print(f"  p50 {np.percentile(latencies, 50):7.2f} ms / p95 {np.percentile(latencies, 95):7.2f} ms")
+    finally:
+        db.close()
@@ -0,0 +1,93 @@
+"""
+주변 시설 검색 벤치마크
+선형 탐색(시설마다 Haversine) vs 격자 인덱스 vs KD-tree (반경 / k-최근접)
+
+서울 근방에 합성 시설 N개를 뿌리고 무작위 위치에서 검색해 쿼리당 시간을 비교합니다.
+DB 없이 메모리 인덱스만 측정합니다.
+
+사용법 (backend 디렉토리에서):
+    python benchmark_facility_search.py [시설 수] [쿼리 수]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from app.services.facility_search import FacilityGridIndex, FacilityKDTree
+from app.utils.geo import haversine_km
+
+
+def linear_radius(ids, lats, lons, lat, lon, radius_km):
+    """기존 방식: 모든 시설의 거리를 계산해 반경 필터 후 정렬"""
+    results = []
+    for facility_id, facility_lat, facility_lon in zip(ids, lats, lons):
+        distance = haversine_km(lat, lon, facility_lat, facility_lon)
+        if distance <= radius_km:
+            results.append((distance, facility_id))
+    results.sort()
+    return [facility_id for _, facility_id in results]
+
+
+def timed(fn, queries):
+    """쿼리당 평균 시간 (ms)"""
+    start = time.perf_counter()
+    for lat, lon in queries:
+        fn(lat, lon)
+    return (time.perf_counter() - start) * 1000 / len(queries)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    radius_km = 2.0
+    k = 10
+
+    rng = np.random.default_rng(0)
+    ids = np.arange(1, n + 1, dtype=np.int64)
+    lats = rng.uniform(37.4, 37.7, n)
+    lons = rng.uniform(126.8, 127.2, n)
+    queries = list(zip(rng.uniform(37.4, 37.7, n_queries), rng.uniform(126.8, 127.2, n_queries)))
+
+    print("=" * 70)
+    print(f"주변 시설 검색 벤치마크 (시설 {n:,}개, 쿼리 {n_queries}개, 반경 {radius_km}km, k={k})")
+    print("=" * 70)
+
+    start = time.perf_counter()
+    grid = FacilityGridIndex(ids, lats, lons)
+    grid_build = (time.perf_counter() - start) * 1000
+
+    from sklearn.neighbors import KDTree  # noqa: F401  임포트 시간 제외
+
+    start = time.perf_counter()
+    kdtree = FacilityKDTree(ids, lats, lons)
+    kdtree_build = (time.perf_counter() - start) * 1000
+
+    # 정확성 확인 (선형 탐색과 같은 결과)
+    id_list, lat_list, lon_list = ids.tolist(), lats.tolist(), lons.tolist()
+    for lat, lon in queries[:20]:
+        expected = linear_radius(id_list, lat_list, lon_list, lat, lon, radius_km)
+        assert set(grid.query_radius(lat, lon, radius_km)[0].tolist()) == set(expected)
+        assert set(kdtree.query_radius(lat, lon, radius_km)[0].tolist()) == set(expected)
+        assert kdtree.query_nearest(lat, lon, k)[0].tolist() == expected[:k]
+
+    linear_queries = queries[:max(n_queries // 20, 5)]
+    results = [
+        ('선형 탐색 (반경)', timed(lambda lat, lon: linear_radius(id_list, lat_list, lon_list, lat, lon, radius_km), linear_queries)),
+        ('격자 인덱스 (반경)', timed(lambda lat, lon: grid.query_radius(lat, lon, radius_km), queries)),
+        ('KD-tree (반경)', timed(lambda lat, lon: kdtree.query_radius(lat, lon, radius_km), queries)),
+        (f'KD-tree (k-최근접, k={k})', timed(lambda lat, lon: kdtree.query_nearest(lat, lon, k), queries)),
+    ]
+
+    print(f"\n인덱스 생성: 격자 {grid_build:.1f} ms / KD-tree {kdtree_build:.1f} ms")
+    print()
+    for label, ms in results:
+        print(f"  {label:<24}: {ms:8.3f} ms/쿼리")
+
+    # 증분 추가: 보조 배열에 쌓였다가 일정 비율을 넘으면 재생성
+    start = time.perf_counter()
+    extra = 1000
+    for i in range(extra):
+        kdtree.add([n + 1 + i], [lats[i]], [lons[i]])
+    print(f"\nKD-tree 시설 {extra}개 개별 추가: {(time.perf_counter() - start) * 1000:.1f} ms "
+          f"(보조 배열 {len(kdtree.pending_ids)}개)")
@@ -0,0 +1,74 @@
+"""
+Haversine 거리 계산 벤치마크
+스칼라 함수(math) 반복 vs numpy 벡터화 (한 지점→배열, 배열 간 행렬)
+
+벡터화 결과가 스칼라 haversine_km()과 같은지(허용 오차 1e-6 km) 먼저 확인한 뒤
+쿼리당 시간을 비교합니다.
+
+사용법 (backend 디렉토리에서):
+    python benchmark_haversine.py [지점 수]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from app.utils.geo import haversine_km, haversine_km_many, haversine_km_pairwise
+
+TOLERANCE_KM = 1e-6
+
+
+def check_accuracy(rng):
+    """무작위 지점 + 경계 사례(날짜변경선, 극점, 대척점, 같은 지점)에서 스칼라와 비교"""
+    lats = np.concatenate([rng.uniform(-90, 90, 2000), [0.0, 0.0, 90.0, -90.0, 37.5, 37.5]])
+    lons = np.concatenate([rng.uniform(-180, 180, 2000), [179.999, -179.999, 0.0, 45.0, 127.0, 127.0]])
+    origins = [(37.5, 127.0), (0.0, 180.0), (89.999, -30.0), (-37.5, -53.0)]
+
+    max_error = 0.0
+    for lat, lon in origins:
+        expected = np.array([haversine_km(lat, lon, a, b) for a, b in zip(lats, lons)])
+        max_error = max(max_error, float(np.abs(haversine_km_many(lat, lon, lats, lons) - expected).max()))
+
+    matrix = haversine_km_pairwise(lats[:300], lons[:300], lats[-300:], lons[-300:])
+    for i in range(0, 300, 7):
+        expected = np.array([haversine_km(lats[i], lons[i], a, b) for a, b in zip(lats[-300:], lons[-300:])])
+        max_error = max(max_error, float(np.abs(matrix[i] - expected).max()))
+
+    assert max_error < TOLERANCE_KM, f"벡터화 Haversine 오차 {max_error} km"
+    return max_error
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    rng = np.random.default_rng(0)
+    lats = rng.uniform(33.0, 38.6, n)
+    lons = rng.uniform(126.0, 129.6, n)
+    lat_list, lon_list = lats.tolist(), lons.tolist()
+
+    print("=" * 70)
+    print(f"Haversine 벤치마크 (지점 {n:,}개)")
+    print("=" * 70)
+
+    max_error = check_accuracy(rng)
+    print(f"\n정확도: 스칼라 대비 최대 오차 {max_error:.2e} km (허용 {TOLERANCE_KM:.0e} km)")
+
+    scalar_ms = timed(lambda: [haversine_km(37.5, 127.0, a, b) for a, b in zip(lat_list, lon_list)], 3)
+    many_ms = timed(lambda: haversine_km_many(37.5, 127.0, lats, lons), 20)
+
+    m = 1000
+    pairwise_ms = timed(lambda: haversine_km_pairwise(lats[:m], lons[:m], lats[:m], lons[:m]), 5)
+
+    print(f"\n한 지점 → {n:,}개")
+    print(f"  스칼라 반복 : {scalar_ms:9.2f} ms")
+    print(f"  벡터화      : {many_ms:9.2f} ms  ({scalar_ms / many_ms:.0f}배)")
+    print(f"\n{m:,} × {m:,} 거리 행렬")
+    print(f"  벡터화      : {pairwise_ms:9.2f} ms  (스칼라 예상 {scalar_ms * m * m / n:.0f} ms)")
@@ -0,0 +1,104 @@
+"""
+운동 메이트 다중 요소 매칭 점수 벤치마크
+후보마다 파이썬으로 계산 (set 교집합 + calculate_matching_score + Haversine) vs
+비트셋 popcount·배열 벡터화 (match_scoring.score_candidates)
+
+요청자 1명과 합성 후보 N명(선호 운동·시간대·나이 범위·성별 선호 무작위)의
+점수를 계산하는 시간을 비교합니다. DB 없이 메모리 배열만 측정합니다.
+
+사용법 (backend 디렉토리에서):
+    python benchmark_match_scoring.py [후보 수] [반복 횟수]
+"""
+
+import random
+import sys
+import time
+
+from app.services.match_scoring import MemberProfiles, score_candidates, top_candidates, TIME_SLOTS
+from app.utils.geo import haversine_km
+from fitdna_matching import TYPE_CODES, calculate_matching_score
+
+EXERCISES = ['러닝', '헬스', '요가', '수영', '클라이밍', '자전거', '등산', '테니스', '배드민턴', '축구', '농구', '필라테스']
+
+
+def random_profiles(n, rng):
+    """합성 회원 프로필 (생성자 인자 dict)"""
+    return dict(
+        user_ids=list(range(1, n + 1)),
+        zscores=[[rng.gauss(0, 1) for _ in range(3)] for _ in range(n)],
+        fitdna_types=[rng.choice(TYPE_CODES) for _ in range(n)],
+        ages=[rng.randint(20, 50) for _ in range(n)],
+        genders=[rng.choice('MF') for _ in range(n)],
+        lats=[37.5 + rng.uniform(-0.05, 0.05) for _ in range(n)],
+        lons=[127.0 + rng.uniform(-0.05, 0.05) for _ in range(n)],
+        exercise_types=[rng.sample(EXERCISES, rng.randint(1, 4)) for _ in range(n)],
+        preferred_times=[rng.sample(TIME_SLOTS, rng.randint(1, 3)) for _ in range(n)],
+        age_ranges=[{"min": 20, "max": 45} if rng.random() < 0.3 else None for _ in range(n)],
+        gender_preferences=[rng.choice(['M', 'F', 'any', None]) for _ in range(n)],
+        fitdna_similarity=[3] * n,
+        radius_km=[10.0] * n,
+    )
+
+
+def python_scores(me, candidates, weights):
+    """기존 방식: 후보마다 파이썬 반복"""
+    my_exercises = set(me["exercise_types"][0])
+    my_times = set(me["preferred_times"][0])
+    results = []
+    for i in range(len(candidates["user_ids"])):
+        age = candidates["ages"][i]
+        if not 25 <= age <= 40 or candidates["genders"][i] != 'F':
+            continue
+        distance = haversine_km(me["lats"][0], me["lons"][0], candidates["lats"][i], candidates["lons"][i])
+        if distance > 10.0:
+            continue
+        fitdna = calculate_matching_score(me["zscores"][0], candidates["zscores"][i],
+                                          me["fitdna_types"][0], candidates["fitdna_types"][i], False)
+        exercise = len(my_exercises & set(candidates["exercise_types"][i])) / len(my_exercises) * 100
+        time_overlap = len(my_times & set(candidates["preferred_times"][i])) / len(my_times) * 100
+        location = (1 - distance / 10.0) * 100
+        results.append(weights["fitdna"] * fitdna + weights["exercise"] * exercise +
+                       weights["time"] * time_overlap + weights["location"] * location)
+    return results
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    weights = {"fitdna": 0.4, "exercise": 0.25, "time": 0.2, "location": 0.15}
+
+    rng = random.Random(0)
+    me_args = random_profiles(1, rng)
+    me_args.update(age_ranges=[{"min": 25, "max": 40}], gender_preferences=['F'])
+    candidate_args = random_profiles(n, rng)
+
+    print("=" * 70)
+    print(f"다중 요소 매칭 점수 벤치마크 (후보 {n:,}명, 반복 {repeat}회)")
+    print("=" * 70)
+
+    start = time.perf_counter()
+    me = MemberProfiles(**me_args)
+    candidates = MemberProfiles(**candidate_args)
+    build = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for _ in range(max(repeat // 10, 1)):
+        python_scores(me_args, candidate_args, weights)
+    python_ms = (time.perf_counter() - start) * 1000 / max(repeat // 10, 1)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        scores = score_candidates(me, candidates, weights)
+    vector_ms = (time.perf_counter() - start) * 1000 / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        top = top_candidates(me, candidates, 20, weights)
+    top_ms = (time.perf_counter() - start) * 1000 / repeat
+
+    eligible = int(scores["eligible"].sum())
+    print(f"\n  프로필 배열 생성 (비트셋 인코딩 포함): {build:8.2f} ms")
+    print(f"  파이썬 반복                          : {python_ms:8.2f} ms/요청")
+    print(f"  벡터화 (score_candidates)            : {vector_ms:8.2f} ms/요청 ({python_ms / vector_ms:.1f}배)")
+    print(f"  벡터화 + 상위 20명 (top_candidates)  : {top_ms:8.2f} ms/요청")
+    print(f"\n  필터 통과 후보: {eligible:,}명 / 상위 1명 점수 {top[0]['score'] if top else '-'}")
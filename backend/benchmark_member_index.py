@@ -0,0 +1,94 @@
+"""
+운동 메이트 후보 검색 벤치마크
+선형 탐색(전체 회원 Z-Score 거리 계산) vs 회원 벡터 인덱스 (Z-Score KD-tree + 위치 KD-tree)
+
+합성 회원 N명(절반은 서울 근방, 나머지는 전국)에 Z-Score를 뿌리고
+무작위 회원 기준으로 활동 반경 안 Z-Score 상위 k명을 검색해 쿼리당 시간을 비교합니다.
+DB 없이 메모리 인덱스만 측정합니다.
+
+사용법 (backend 디렉토리에서):
+    python benchmark_member_index.py [회원 수] [쿼리 수]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from app.services.member_index import MemberVectorIndex
+from app.utils.geo import haversine_km_many
+
+
+def linear_top_k(ids, zscores, lats, lons, zscore, k, lat, lon, radius_km):
+    """기존 방식: 모든 회원의 Z-Score 거리(와 위치 거리)를 계산한 뒤 상위 k명"""
+    distances = np.sqrt(((zscores - zscore) ** 2).sum(axis=1))
+    if radius_km is not None:
+        with np.errstate(invalid='ignore'):
+            outside = ~(haversine_km_many(lat, lon, lats, lons) <= radius_km)
+        distances = np.where(outside, np.inf, distances)
+    order = np.argsort(distances, kind='stable')[:k]
+    order = order[np.isfinite(distances[order])]
+    return ids[order], distances[order]
+
+
+def timed(fn, queries):
+    """쿼리당 평균 시간 (ms)"""
+    start = time.perf_counter()
+    for query in queries:
+        fn(*query)
+    return (time.perf_counter() - start) * 1000 / len(queries)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    k = 100
+
+    rng = np.random.default_rng(0)
+    ids = np.arange(1, n + 1, dtype=np.int64)
+    zscores = rng.normal(size=(n, 3))
+    seoul = rng.random(n) < 0.5
+    lats = np.where(seoul, rng.uniform(37.4, 37.7, n), rng.uniform(34.5, 38.3, n))
+    lons = np.where(seoul, rng.uniform(126.8, 127.2, n), rng.uniform(126.5, 129.4, n))
+    # 10%는 위치 미등록
+    missing = rng.random(n) < 0.1
+    lats[missing] = np.nan
+    lons[missing] = np.nan
+
+    picks = rng.integers(0, n, n_queries)
+    picks = picks[~missing[picks]]
+
+    print("=" * 70)
+    print(f"운동 메이트 후보 검색 벤치마크 (회원 {n:,}명, 쿼리 {len(picks)}개, k={k})")
+    print("=" * 70)
+
+    from sklearn.neighbors import KDTree  # noqa: F401  임포트 시간 제외
+
+    start = time.perf_counter()
+    index = MemberVectorIndex(ids, zscores, lats, lons)
+    build = (time.perf_counter() - start) * 1000
+    print(f"\n인덱스 생성: {build:.0f} ms")
+
+    for radius_km in (None, 1.0, 5.0, 30.0):
+        queries = [(zscores[i], k, lats[i], lons[i], radius_km, int(ids[i])) for i in picks]
+
+        # 정확성 확인 (선형 탐색과 같은 결과)
+        for zscore, _, lat, lon, _, user_id in queries[:10]:
+            expected_ids, expected = linear_top_k(ids, zscores, lats, lons, zscore, k + 1, lat, lon, radius_km)
+            expected = expected[expected_ids != user_id][:k]
+            got = index.query(zscore, k, lat, lon, radius_km, exclude_user_id=user_id)[1]
+            assert np.allclose(got, expected)
+
+        linear = timed(lambda z, kk, lat, lon, r, _: linear_top_k(ids, zscores, lats, lons, z, kk, lat, lon, r),
+                       queries[:max(len(queries) // 10, 5)])
+        indexed = timed(lambda z, kk, lat, lon, r, user_id: index.query(z, kk, lat, lon, r, exclude_user_id=user_id),
+                        queries)
+        label = "반경 없음" if radius_km is None else f"반경 {radius_km:g}km"
+        print(f"  {label:<10}: 선형 {linear:8.2f} ms/쿼리 → 인덱스 {indexed:7.3f} ms/쿼리 ({linear / indexed:6.1f}배)")
+
+    # FIT-DNA 결과 저장 반영: 보조 배열에 쌓였다가 일정 비율을 넘으면 재생성
+    extra = 1000
+    start = time.perf_counter()
+    for i in range(extra):
+        index.upsert([ids[i]], rng.normal(size=(1, 3)), [lats[i]], [lons[i]])
+    print(f"\n회원 {extra}명 개별 갱신: {(time.perf_counter() - start) * 1000:.1f} ms ({index!r})")
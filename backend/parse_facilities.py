@@ -1,81 +1,169 @@
 """
 map_2k.html에서 시설 데이터 파싱
+- 파일을 조금씩 읽으며 마커와 자기 팝업을 짝지어 시설을 하나씩 생성 (스트리밍)
+- DB에는 시설 식별 키(source_key) 기준으로 일괄 upsert
 """
 
 import re
 import json
-from bs4 import BeautifulSoup
+import time
+import hashlib
+import argparse
+from datetime import datetime
+from itertools import islice
+
+
+# 시설 유형 매핑
+TYPE_MAPPING = {
+    '학교': 'school',
+    '체육관': 'gym',
+    '수영장': 'pool',
+    '공원': 'park',
+    '헬스장': 'fitness_center'
+}
+
+# 지도 HTML(folium) 스크립트 토큰
+# - 마커 선언:        var marker_x = L.marker([lat, lon], ...)
+# - 팝업 HTML 선언:   var html_x = $(`<div ...><b>[유형]</b><br>운동종목: ...<br>주소: ...<br></div>`)[0];
+# - 팝업 ← HTML 연결: popup_x.setContent(html_x);
+# - 마커 ← 팝업 연결: marker_x.bindPopup(popup_x);
+# 각 토큰은 한 줄 안에서 MAX_TOKEN_CHARS자 이내라고 가정합니다.
+MAX_TOKEN_CHARS = 8192
+POPUP_PATTERN = re.compile(r'<b>\[([^\n]*?)\]</b><br>\s*운동종목:\s*([^\n]*?)<br>\s*주소:\s*([^\n]*?)<br>')
+TOKEN_PATTERN = re.compile(
+    r'var\s+(?P<marker>marker_\w+)\s*=\s*L\.marker\(\s*\[\s*(?P<lat>-?[0-9.]+)\s*,\s*(?P<lon>-?[0-9.]+)\s*\]'
+    r'|var\s+(?P<html>html_\w+)\s*='
+    r'|(?P<popup><b>\[[^\n]*?\]</b><br>\s*운동종목:[^\n]*?<br>\s*주소:[^\n]*?<br>)'
+    r'|(?P<set_popup>popup_\w+)\.setContent\(\s*(?P<set_html>html_\w+)\s*\)'
+    r'|(?P<bind_marker>marker_\w+)\.bindPopup\(\s*(?P<bind_popup>popup_\w+)\s*\)'
+)
+
+
+def iter_facility_html(html_path='../map_2k.html', chunk_chars=1 << 20, stats=None):
+    """
+    HTML 파일에서 시설 데이터를 하나씩 추출 (스트리밍)
+
+    파일을 chunk_chars 단위로 읽으면서 스크립트 토큰을 나온 순서대로 처리하고,
+    각 마커를 자기 팝업(bindPopup → setContent → html 변수)과 짝지어
+    시설 딕셔너리를 바로 yield 합니다. 짝을 찾은 마커/팝업은 즉시 버리므로
+    파일 크기와 관계없이 메모리 사용량이 일정합니다.
+
+    팝업 형식이 깨졌거나 팝업이 없는 마커는 그 마커만 건너뜁니다 (다른 시설에 영향 없음).
+    stats 딕셔너리를 넘기면 {'parsed', 'skipped_markers'} 개수를 채웁니다.
+
+    Args:
+        html_path: 지도 HTML 경로
+        chunk_chars: 한 번에 읽을 문자 수
+        stats: 집계를 받을 딕셔너리 (선택)
+
+    Yields:
+        시설 딕셔너리 (build_facility 형식)
+    """
+    if stats is None:
+        stats = {}
+    stats.update(parsed=0, skipped_markers=0)
+
+    markers = {}         # marker 변수 → (lat, lon)
+    html_popups = {}     # html 변수 → 팝업 필드 (None = 형식 오류)
+    popups = {}          # popup 변수 → 팝업 필드
+    current_html = None  # 내용을 기다리는 html 변수
+
+    def handle(match):
+        """토큰 하나 처리, 마커와 팝업이 짝지어지면 ((lat, lon), 팝업 필드) 반환"""
+        nonlocal current_html
+
+        if match.group('marker'):
+            markers[match.group('marker')] = (float(match.group('lat')), float(match.group('lon')))
+        elif match.group('html'):
+            current_html = match.group('html')
+            html_popups[current_html] = None
+        elif match.group('popup'):
+            if current_html is not None:
+                html_popups[current_html] = POPUP_PATTERN.match(match.group('popup')).groups()
+                current_html = None
+        elif match.group('set_popup'):
+            popups[match.group('set_popup')] = html_popups.pop(match.group('set_html'), None)
+        else:
+            coords = markers.pop(match.group('bind_marker'), None)
+            fields = popups.pop(match.group('bind_popup'), None)
+            if coords is None or fields is None:
+                stats['skipped_markers'] += 1
+                return None
+            return coords, fields
+        return None
+
+    buffer = ''
+    with open(html_path, 'r', encoding='utf-8') as f:
+        while True:
+            chunk = f.read(chunk_chars)
+            eof = not chunk
+            buffer += chunk
+
+            # 버퍼 끝 MAX_TOKEN_CHARS 안에서 시작하는 토큰은 잘렸을 수 있으므로 다음 청크와 합쳐서 처리
+            limit = len(buffer) if eof else len(buffer) - MAX_TOKEN_CHARS
+            consumed = 0
+            for match in TOKEN_PATTERN.finditer(buffer):
+                if match.start() >= limit:
+                    break
+                consumed = match.end()
+                paired = handle(match)
+                if paired is not None:
+                    (lat, lon), (facility_type_raw, sports, address) = paired
+                    yield build_facility(stats['parsed'], lat, lon, facility_type_raw, sports, address)
+                    stats['parsed'] += 1
+
+            if eof:
+                break
+            buffer = buffer[max(consumed, limit, 0):]
+
+    # 팝업과 연결되지 않은 채 남은 마커
+    stats['skipped_markers'] += len(markers)
 
 
 def parse_facility_html(html_path='../map_2k.html'):
-    """HTML 파일에서 시설 데이터 추출"""
-
-    with open(html_path, 'r', encoding='utf-8') as f:
-        html_content = f.read()
-
-    # 마커 패턴 찾기
-    marker_pattern = r'var marker_\w+ = L\.marker\(\s*\[([0-9.]+),\s*([0-9.]+)\]'
-    popup_pattern = r'<b>\[(.*?)\]</b><br>\s*운동종목:\s*(.*?)<br>\s*주소:\s*(.*?)<br>'
-
-    markers = re.findall(marker_pattern, html_content)
-    popups = re.findall(popup_pattern, html_content)
-
-    facilities = []
-
-    for i, (marker, popup) in enumerate(zip(markers, popups)):
-        lat, lon = marker
-        facility_type_raw, sports, address = popup
-
-        # 시설 유형 매핑
-        type_mapping = {
-            '학교': 'school',
-            '체육관': 'gym',
-            '수영장': 'pool',
-            '공원': 'park',
-            '헬스장': 'fitness_center'
-        }
-
-        facility_type = type_mapping.get(facility_type_raw, 'other')
-
-        # 운동 종목 리스트로 변환
-        sports_list = [s.strip() for s in sports.split(',')]
-
-        facility = {
-            'id': i + 1,
-            'name': extract_facility_name(address),
-            'facility_type': facility_type,
-            'facility_type_kr': facility_type_raw,
-            'address': address.strip(),
-            'latitude': float(lat),
-            'longitude': float(lon),
-            'sports': sports_list,
-            'phone': None,
-            'website': None,
-            'has_parking': True if facility_type in ['gym', 'school'] else False,
-            'has_shower': True if facility_type in ['gym', 'pool'] else False,
-            'has_locker': True if facility_type in ['gym', 'pool'] else False,
-            'operating_hours': {
-                'weekday': '06:00-22:00' if facility_type == 'gym' else '09:00-18:00',
-                'weekend': '08:00-20:00' if facility_type == 'gym' else '09:00-17:00',
-                'holiday': '휴무'
-            },
-            'pricing': {
-                'day_pass': 0 if facility_type in ['school', 'park'] else 5000,
-                'month_pass': 0 if facility_type in ['school', 'park'] else 30000
-            },
-            'programs': [
-                {'name': sport, 'available': True}
-                for sport in sports_list
-            ],
-            'average_rating': round(4.0 + (i % 10) / 10, 1),
-            'total_reviews': (i % 50) + 10,
-            'thumbnail': f'/static/facilities/facility_{i+1}.jpg',
-            'is_active': True
-        }
-
-        facilities.append(facility)
-
-    return facilities
+    """HTML 파일에서 시설 데이터 추출 (리스트)"""
+    return list(iter_facility_html(html_path))
+
+
+def build_facility(i, lat, lon, facility_type_raw, sports, address):
+    """마커 좌표 + 팝업 필드 → 시설 딕셔너리 (i: 0부터 시작하는 순번)"""
+    facility_type = TYPE_MAPPING.get(facility_type_raw, 'other')
+
+    # 운동 종목 리스트로 변환
+    sports_list = [s.strip() for s in sports.split(',')]
+
+    return {
+        'id': i + 1,
+        'name': extract_facility_name(address),
+        'facility_type': facility_type,
+        'facility_type_kr': facility_type_raw,
+        'address': address.strip(),
+        'latitude': float(lat),
+        'longitude': float(lon),
+        'sports': sports_list,
+        'phone': None,
+        'website': None,
+        'has_parking': True if facility_type in ['gym', 'school'] else False,
+        'has_shower': True if facility_type in ['gym', 'pool'] else False,
+        'has_locker': True if facility_type in ['gym', 'pool'] else False,
+        'operating_hours': {
+            'weekday': '06:00-22:00' if facility_type == 'gym' else '09:00-18:00',
+            'weekend': '08:00-20:00' if facility_type == 'gym' else '09:00-17:00',
+            'holiday': '휴무'
+        },
+        'pricing': {
+            'day_pass': 0 if facility_type in ['school', 'park'] else 5000,
+            'month_pass': 0 if facility_type in ['school', 'park'] else 30000
+        },
+        'programs': [
+            {'name': sport, 'available': True}
+            for sport in sports_list
+        ],
+        'average_rating': round(4.0 + (i % 10) / 10, 1),
+        'total_reviews': (i % 50) + 10,
+        'thumbnail': f'/static/facilities/facility_{i+1}.jpg',
+        'is_active': True
+    }
 
 
 def extract_facility_name(address):
@@ -90,49 +178,130 @@ def extract_facility_name(address):
 
 
 def save_facilities_json(facilities, output_path='facilities_data.json'):
-    """시설 데이터를 JSON 파일로 저장"""
+    """시설 데이터를 JSON 파일로 저장 (이터레이터도 한 건씩 기록)"""
+    count = 0
     with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(facilities, f, ensure_ascii=False, indent=2)
+        f.write('[')
+        for facility in facilities:
+            f.write(',\n' if count else '\n')
+            f.write(json.dumps(facility, ensure_ascii=False))
+            count += 1
+        f.write('\n]\n' if count else ']\n')
 
     print(f"✅ 시설 데이터가 '{output_path}'에 저장되었습니다.")
-    print(f"   총 시설 수: {len(facilities)}개")
-
-
-def insert_facilities_to_db(facilities):
-    """시설 데이터를 DB에 삽입"""
-    from app.core.database import SessionLocal
+    print(f"   총 시설 수: {count}개")
+    return count
+
+
+def facility_source_key(facility):
+    """시설 식별 키 (주소 + 좌표 소수점 5자리) - 같은 시설은 다시 수집해도 같은 키"""
+    raw = f"{facility['address'].strip()}|{facility['latitude']:.5f}|{facility['longitude']:.5f}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+# 재적재 시 덮어쓸 컬럼 (평점/리뷰 집계는 app.services.review_service가 관리하므로 제외)
+UPSERT_UPDATE_COLUMNS = (
+    'name', 'facility_type', 'address', 'latitude', 'longitude', 'grid_cell', 'sports',
+    'phone', 'website', 'has_parking', 'has_shower', 'has_locker',
+    'operating_hours', 'pricing', 'programs', 'thumbnail', 'is_active', 'updated_at',
+)
+
+
+def _facility_row(facility, loaded_at):
+    """시설 딕셔너리 → facilities 테이블 행"""
+    from app.utils.geo import grid_cell
+
+    return {
+        'source_key': facility_source_key(facility),
+        'name': facility['name'],
+        'facility_type': facility['facility_type'],
+        'address': facility['address'],
+        'latitude': facility['latitude'],
+        'longitude': facility['longitude'],
+        'grid_cell': grid_cell(facility['latitude'], facility['longitude']),
+        'sports': ','.join(facility['sports']),
+        'phone': facility['phone'],
+        'website': facility['website'],
+        'has_parking': facility['has_parking'],
+        'has_shower': facility['has_shower'],
+        'has_locker': facility['has_locker'],
+        'operating_hours': facility['operating_hours'],
+        'pricing': facility['pricing'],
+        'programs': facility['programs'],
+        'thumbnail': facility['thumbnail'],
+        'is_active': facility['is_active'],
+        'created_at': loaded_at,
+        'updated_at': loaded_at,
+    }
+
+
+def upsert_facilities_to_db(facilities, chunk_size=5000):
+    """
+    시설 데이터를 DB에 일괄 upsert
+
+    - chunk_size개씩 INSERT ... ON CONFLICT (source_key) DO UPDATE 로 executemany
+    - 이번 데이터에 없는 기존 시설은 비활성화 (삭제하지 않으므로 리뷰 등 ID 참조 유지)
+    - 종목 역색인(facility_sports)을 같은 트랜잭션에서 다시 만듦
+    - 전체를 한 트랜잭션으로 처리해, 커밋 전까지는 기존 데이터가 그대로 조회되고
+      실패하면 롤백되어 기존 데이터가 남음
+
+    Args:
+        facilities: 시설 딕셔너리 이터러블 (iter_facility_html 결과)
+        chunk_size: executemany 한 번에 보낼 행 수
+
+    Returns:
+        {'rows': 적재 행 수, 'deactivated': 비활성화 수, 'seconds': 소요 시간, 'rows_per_sec': 초당 행 수}
+    """
+    from sqlalchemy import or_, update
+    from app.core.database import SessionLocal, engine
     from app.models import Facility
-
+    from app.services.facility_search import rebuild_sport_index
+
+    if engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif engine.dialect.name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise ValueError(f"upsert를 지원하지 않는 DB입니다: {engine.dialect.name}")
+
+    table = Facility.__table__
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.source_key],
+        set_={column: stmt.excluded[column] for column in UPSERT_UPDATE_COLUMNS}
+    )
+
+    loaded_at = datetime.utcnow()
+    started = time.perf_counter()
     db = SessionLocal()
 
     try:
-        # 기존 시설 데이터 삭제 (재생성용)
-        db.query(Facility).delete()
-
-        for fac_data in facilities:
-            facility = Facility(
-                name=fac_data['name'],
-                facility_type=fac_data['facility_type'],
-                address=fac_data['address'],
-                latitude=fac_data['latitude'],
-                longitude=fac_data['longitude'],
-                phone=fac_data['phone'],
-                website=fac_data['website'],
-                has_parking=fac_data['has_parking'],
-                has_shower=fac_data['has_shower'],
-                has_locker=fac_data['has_locker'],
-                operating_hours=fac_data['operating_hours'],
-                pricing=fac_data['pricing'],
-                programs=fac_data['programs'],
-                average_rating=fac_data['average_rating'],
-                total_reviews=fac_data['total_reviews'],
-                thumbnail=fac_data['thumbnail'],
-                is_active=fac_data['is_active']
-            )
-            db.add(facility)
+        rows = 0
+        chunk = {}  # source_key → 행 (같은 청크 안의 중복 키는 마지막 값 사용)
+        for facility in facilities:
+            row = _facility_row(facility, loaded_at)
+            chunk[row['source_key']] = row
+            if len(chunk) >= chunk_size:
+                db.execute(stmt, list(chunk.values()))
+                rows += len(chunk)
+                chunk = {}
+                print(f"   {rows:,}행 적재 ({rows / (time.perf_counter() - started):,.0f} rows/s)")
+        if chunk:
+            db.execute(stmt, list(chunk.values()))
+            rows += len(chunk)
+
+        # 이번 적재에서 갱신되지 않은 시설 비활성화
+        deactivated = db.execute(
+            update(table)
+            .where(table.c.is_active == True,  # noqa: E712
+                   or_(table.c.source_key.is_(None), table.c.updated_at != loaded_at))
+            .values(is_active=False, updated_at=loaded_at)
+        ).rowcount
+
+        # 종목 역색인 (종목 → 시설 ID)
+        postings = rebuild_sport_index(db)
 
         db.commit()
-        print(f"✅ {len(facilities)}개 시설이 DB에 저장되었습니다.")
 
     except Exception as e:
         print(f"❌ DB 저장 중 에러: {e}")
@@ -141,28 +310,42 @@ def insert_facilities_to_db(facilities):
     finally:
         db.close()
 
+    seconds = time.perf_counter() - started
+    rows_per_sec = rows / seconds if seconds > 0 else 0.0
+    print(f"✅ {rows:,}개 시설이 DB에 저장되었습니다. ({seconds:.2f}초, {rows_per_sec:,.0f} rows/s)")
+    if deactivated:
+        print(f"   이번 데이터에 없는 기존 시설 {deactivated:,}개 비활성화")
+    print(f"   종목 역색인 {postings:,}행")
 
-if __name__ == "__main__":
-    print("🗺️  map_2k.html에서 시설 데이터 파싱 시작...\n")
+    return {'rows': rows, 'deactivated': deactivated, 'seconds': seconds, 'rows_per_sec': rows_per_sec}
 
-    # 1. HTML 파싱
-    facilities = parse_facility_html()
 
-    print(f"✅ {len(facilities)}개 시설 데이터 파싱 완료\n")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='지도 HTML에서 시설 데이터를 파싱해 JSON/DB에 저장')
+    parser.add_argument('html_path', nargs='?', default='../map_2k.html', help='지도 HTML 경로')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='DB upsert 배치 크기')
+    args = parser.parse_args()
+    html_path = args.html_path
+
+    print(f"🗺️  {html_path}에서 시설 데이터 파싱 시작...\n")
 
     # 샘플 출력
     print("📋 샘플 데이터 (첫 3개):")
-    for fac in facilities[:3]:
+    for fac in islice(iter_facility_html(html_path), 3):
         print(f"  - {fac['name']} ({fac['facility_type_kr']})")
         print(f"    위치: {fac['address']}")
         print(f"    좌표: {fac['latitude']}, {fac['longitude']}")
         print(f"    운동: {', '.join(fac['sports'])}\n")
 
-    # 2. JSON 저장
-    save_facilities_json(facilities)
+    # 1. HTML 파싱 + JSON 저장 (스트리밍)
+    stats = {}
+    save_facilities_json(iter_facility_html(html_path, stats=stats))
+    print(f"✅ {stats['parsed']}개 시설 데이터 파싱 완료")
+    if stats['skipped_markers']:
+        print(f"⚠️  팝업과 짝지을 수 없는 마커 {stats['skipped_markers']}개 건너뜀")
 
-    # 3. DB에 저장
+    # 2. DB에 저장 (파일을 다시 스트리밍)
     print("\n💾 DB에 저장 중...")
-    insert_facilities_to_db(facilities)
+    upsert_facilities_to_db(iter_facility_html(html_path), chunk_size=args.chunk_size)
 
     print("\n✅ 완료!")
@@ -0,0 +1,68 @@
+"""
+전체 쌍 매칭 점수 벤치마크
+쌍마다 calculate_matching_score 호출 vs 타일 벡터화 (matching_score_matrix / top_k_matches)
+
+합성 회원 N명(Z-Score 정규분포, 유형·선호 운동 비트마스크 무작위)의
+회원별 상위 k명을 계산하는 야간 매칭 갱신과 같은 조건으로 측정합니다.
+
+사용법:
+    python benchmark_matching_scores.py [회원 수] [k] [프로세스 수]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from fitdna_matching import TYPE_CODES, calculate_matching_score, matching_score_matrix, top_k_matches
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+
+    rng = np.random.default_rng(0)
+    zscores = rng.normal(size=(n, 3))
+    types = rng.integers(0, len(TYPE_CODES), n)
+    codes = [TYPE_CODES[t] for t in types]
+    masks = rng.integers(0, 32, n).astype(np.uint64)
+
+    print("=" * 70)
+    print(f"전체 쌍 매칭 점수 벤치마크 (회원 {n:,}명, 쌍 {n * (n - 1):,}개, k={k})")
+    print("=" * 70)
+
+    # 1. 스칼라: 쌍마다 함수 호출 (일부만 측정해 환산)
+    sample = 20_000
+    pairs = rng.integers(0, n, (sample, 2))
+    start = time.perf_counter()
+    scalar = [
+        calculate_matching_score(zscores[i], zscores[j], codes[i], codes[j], bool(int(masks[i]) & int(masks[j])))
+        for i, j in pairs
+    ]
+    scalar_rate = sample / (time.perf_counter() - start)
+
+    # 같은 쌍을 행렬 계산으로 확인
+    rows = np.unique(pairs[:200, 0])
+    matrix = matching_score_matrix(zscores[rows], types[rows], zscores, types,
+                                   exercise_masks1=masks[rows], exercise_masks2=masks)
+    position = {row: i for i, row in enumerate(rows)}
+    for (i, j), score in zip(pairs[:200], scalar[:200]):
+        assert matrix[position[i], j] == score
+
+    # 2. 타일 벡터화 (단일 프로세스 / 프로세스 풀)
+    start = time.perf_counter()
+    indices, scores = top_k_matches(zscores, types, k=k, exercise_masks=masks)
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pool_indices, pool_scores = top_k_matches(zscores, types, k=k, exercise_masks=masks, workers=workers)
+    pooled = time.perf_counter() - start
+    assert np.array_equal(scores, pool_scores)
+
+    total_pairs = n * (n - 1)
+    print(f"\n  스칼라 (쌍마다 호출)       : {scalar_rate:14,.0f} 쌍/초 → 전체 예상 {total_pairs / scalar_rate:10,.1f} 초")
+    print(f"  타일 벡터화 (1 프로세스)   : {total_pairs / single:14,.0f} 쌍/초 → 전체 {single:10,.1f} 초")
+    print(f"  타일 벡터화 ({workers} 프로세스)   : {total_pairs / pooled:14,.0f} 쌍/초 → 전체 {pooled:10,.1f} 초")
+    print(f"\n  결과 메모리: {(indices.nbytes + scores.nbytes) / 1024 ** 2:.1f} MB "
+          f"(전체 점수 행렬이면 {total_pairs * 8 / 1024 ** 3:.1f} GB)")
@@ -0,0 +1,78 @@
+"""
+참조 테이블 로드 벤치마크
+pickle(딕셔너리) vs 바이너리(mmap) 로드 시간 및 워커 메모리(RSS) 비교
+
+각 형식을 새 파이썬 프로세스에서 로드해 uvicorn 워커 시작과 같은 조건으로 측정합니다.
+- 로드 시간: load_reference_table() 호출 시간
+- RssAnon: 워커 전용 힙 메모리 (워커 수만큼 늘어남)
+- RssFile: 파일 매핑 메모리 (같은 호스트의 워커들이 페이지 캐시를 공유)
+"""
+
+import json
+import subprocess
+import sys
+
+
+WORKER_SCRIPT = r'''
+import json, sys, time
+
+def rss():
+    fields = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('VmRSS', 'RssAnon', 'RssFile'):
+                fields[key] = int(value.split()[0])
+    return fields
+
+import pickle
+import numpy as np
+from fitdna_from_measurements import load_reference_table
+
+before = rss()
+start = time.perf_counter()
+table = load_reference_table(sys.argv[1])
+elapsed = time.perf_counter() - start
+after = rss()
+
+print(json.dumps({
+    'load_ms': elapsed * 1000,
+    'entries': len(table),
+    'rss_kb': {k: after[k] - before[k] for k in after},
+}))
+'''
+
+
+def measure(path, repeat=5):
+    """새 프로세스에서 참조 테이블을 로드하고 측정값 평균 반환"""
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.check_output([sys.executable, '-c', WORKER_SCRIPT, path])
+        runs.append(json.loads(output))
+
+    return {
+        'load_ms': sum(r['load_ms'] for r in runs) / len(runs),
+        'entries': runs[0]['entries'],
+        'rss_kb': {
+            k: sum(r['rss_kb'][k] for r in runs) / len(runs)
+            for k in runs[0]['rss_kb']
+        },
+    }
+
+
+if __name__ == "__main__":
+    pkl_path = sys.argv[1] if len(sys.argv) > 1 else 'FITDNA_ref_new.pkl'
+    bin_path = sys.argv[2] if len(sys.argv) > 2 else 'FITDNA_ref_new.bin'
+
+    print("=" * 70)
+    print("참조 테이블 로드 벤치마크 (워커 1개 기준)")
+    print("=" * 70)
+
+    for label, path in [('pickle', pkl_path), ('binary(mmap)', bin_path)]:
+        result = measure(path)
+        rss_kb = result['rss_kb']
+        print(f"\n[{label}] {path}")
+        print(f"  항목 수   : {result['entries']}")
+        print(f"  로드 시간 : {result['load_ms']:.2f} ms")
+        print(f"  VmRSS 증가: {rss_kb['VmRSS']:.0f} KB "
+              f"(RssAnon {rss_kb['RssAnon']:.0f} KB / RssFile {rss_kb['RssFile']:.0f} KB)")
@@ -4,6 +4,75 @@ FIT-DNA 계산 모듈
 """
 
 
+# FIT-DNA 유형별 상세 정보
+FITDNA_INFO = {
+    'PFE': {
+        'name': '완벽 균형형',
+        'strength': 'High',
+        'flexibility': 'High',
+        'endurance': 'High',
+        'description': '근력, 유연성, 지구력 모두 우수한 이상적인 체력 상태입니다.'
+    },
+    'PFQ': {
+        'name': '근력·유연성 우수형',
+        'strength': 'High',
+        'flexibility': 'High',
+        'endurance': 'Low',
+        'description': '근력과 유연성은 우수하나 지구력 개선이 필요합니다.'
+    },
+    'PSE': {
+        'name': '근력·지구력 우수형',
+        'strength': 'High',
+        'flexibility': 'Low',
+        'endurance': 'High',
+        'description': '근력과 지구력은 우수하나 유연성 개선이 필요합니다.'
+    },
+    'PSQ': {
+        'name': '근력 특화형',
+        'strength': 'High',
+        'flexibility': 'Low',
+        'endurance': 'Low',
+        'description': '근력은 우수하나 유연성과 지구력 개선이 필요합니다.'
+    },
+    'LFE': {
+        'name': '유연성·지구력 우수형',
+        'strength': 'Low',
+        'flexibility': 'High',
+        'endurance': 'High',
+        'description': '유연성과 지구력은 우수하나 근력 개선이 필요합니다.'
+    },
+    'LFQ': {
+        'name': '유연성 특화형',
+        'strength': 'Low',
+        'flexibility': 'High',
+        'endurance': 'Low',
+        'description': '유연성은 우수하나 근력과 지구력 개선이 필요합니다.'
+    },
+    'LSE': {
+        'name': '지구력 특화형',
+        'strength': 'Low',
+        'flexibility': 'Low',
+        'endurance': 'High',
+        'description': '지구력은 우수하나 근력과 유연성 개선이 필요합니다.'
+    },
+    'LSQ': {
+        'name': '전체 개선 필요형',
+        'strength': 'Low',
+        'flexibility': 'Low',
+        'endurance': 'Low',
+        'description': '근력, 유연성, 지구력 모두 개선이 필요합니다. 균형잡힌 운동을 시작하세요.'
+    }
+}
+
+UNKNOWN_FITDNA_INFO = {
+    'name': '알 수 없는 유형',
+    'strength': 'Unknown',
+    'flexibility': 'Unknown',
+    'endurance': 'Unknown',
+    'description': '유효하지 않은 FIT-DNA 코드입니다.'
+}
+
+
 def classify_axis_levels(strength_z, flex_z, endurance_z, threshold=0.25):
     """
     각 축(근력/유연성/지구력)의 High/Low 여부를 반환
@@ -110,72 +179,7 @@ def get_fitdna_description(fitdna_code):
     >>> print(info['name'])
     '완벽 균형형'
     """
-    fitdna_info = {
-        'PFE': {
-            'name': '완벽 균형형',
-            'strength': 'High',
-            'flexibility': 'High',
-            'endurance': 'High',
-            'description': '근력, 유연성, 지구력 모두 우수한 이상적인 체력 상태입니다.'
-        },
-        'PFQ': {
-            'name': '근력·유연성 우수형',
-            'strength': 'High',
-            'flexibility': 'High',
-            'endurance': 'Low',
-            'description': '근력과 유연성은 우수하나 지구력 개선이 필요합니다.'
-        },
-        'PSE': {
-            'name': '근력·지구력 우수형',
-            'strength': 'High',
-            'flexibility': 'Low',
-            'endurance': 'High',
-            'description': '근력과 지구력은 우수하나 유연성 개선이 필요합니다.'
-        },
-        'PSQ': {
-            'name': '근력 특화형',
-            'strength': 'High',
-            'flexibility': 'Low',
-            'endurance': 'Low',
-            'description': '근력은 우수하나 유연성과 지구력 개선이 필요합니다.'
-        },
-        'LFE': {
-            'name': '유연성·지구력 우수형',
-            'strength': 'Low',
-            'flexibility': 'High',
-            'endurance': 'High',
-            'description': '유연성과 지구력은 우수하나 근력 개선이 필요합니다.'
-        },
-        'LFQ': {
-            'name': '유연성 특화형',
-            'strength': 'Low',
-            'flexibility': 'High',
-            'endurance': 'Low',
-            'description': '유연성은 우수하나 근력과 지구력 개선이 필요합니다.'
-        },
-        'LSE': {
-            'name': '지구력 특화형',
-            'strength': 'Low',
-            'flexibility': 'Low',
-            'endurance': 'High',
-            'description': '지구력은 우수하나 근력과 유연성 개선이 필요합니다.'
-        },
-        'LSQ': {
-            'name': '전체 개선 필요형',
-            'strength': 'Low',
-            'flexibility': 'Low',
-            'endurance': 'Low',
-            'description': '근력, 유연성, 지구력 모두 개선이 필요합니다. 균형잡힌 운동을 시작하세요.'
-        }
-    }
-
-    return fitdna_info.get(fitdna_code.upper(), {
-        'name': '알 수 없는 유형',
-        'strength': 'Unknown',
-        'flexibility': 'Unknown',
-        'endurance': 'Unknown',
-        'description': '유효하지 않은 FIT-DNA 코드입니다.'
-    })
+    return dict(FITDNA_INFO.get(fitdna_code.upper(), UNKNOWN_FITDNA_INFO))
 
 
 def calculate_zscore(value, age, gender, measurement_type, reference_data=None):
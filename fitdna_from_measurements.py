@@ -3,17 +3,60 @@
 원본 측정값(kg, cm) → Z-Score → FIT-DNA
 """
 
+import os
 import pickle
+import numpy as np
 from fitdna_calculator import calculate_fitdna, get_fitdna_description, classify_axis_levels
+from fitdna_reference import (
+    ReferenceTable, MAD_SCALE, ZSCORE_METHODS, percentile_from_quantiles, normal_percentile
+)
+
+
+# 3축별 측정 항목
+STRENGTH_ITEMS = ['grip_right', 'grip_left', 'standing_long_jump', 'sit_up']
+FLEXIBILITY_ITEMS = ['sit_and_reach']
+ENDURANCE_ITEMS = ['vo2max', 'shuttle_run']
+
+# 필수 축 누락 메시지
+STRENGTH_REQUIRED_MESSAGE = "근력 측정값이 필요합니다 (grip_right, grip_left, standing_long_jump, sit_up 중 1개 이상)"
+ENDURANCE_REQUIRED_MESSAGE = "지구력 측정값이 필요합니다 (vo2max 또는 shuttle_run 중 1개 이상)"
 
 
 def load_reference_table(pkl_path='FITDNA_ref_new.pkl'):
-    """참조 테이블 로드"""
+    """
+    참조 테이블 로드 (배열 기반 ReferenceTable)
+
+    .bin 파일은 mmap으로 바로 열고, .pkl 파일은 딕셔너리를 읽어 변환합니다.
+    """
+    if os.path.splitext(pkl_path)[1] == '.bin':
+        return ReferenceTable.load_binary(pkl_path)
+
     with open(pkl_path, 'rb') as f:
-        return pickle.load(f)
+        return ReferenceTable.from_dict(pickle.load(f))
 
 
-def calculate_measurement_zscore(value, age, gender, measurement_type, ref_table):
+def _reference_center_scale(age, gender, measurement_type, ref_table, method='mean'):
+    """
+    Z-Score 계산용 (중심, 척도) 조회, 참조값이 없으면 None
+
+    method='robust'이면 (중앙값, 1.4826 × MAD)를 사용하고,
+    중앙값/MAD가 없는 참조 테이블이거나 MAD가 0이면 (평균, 표준편차)를 사용합니다.
+    """
+    if method not in ZSCORE_METHODS:
+        raise ValueError(f"지원하지 않는 Z-Score 방식입니다: {method} ({', '.join(ZSCORE_METHODS)})")
+
+    if isinstance(ref_table, ReferenceTable):
+        return ref_table.center_scale(age, gender, measurement_type, method)
+
+    ref = ref_table.get((age, gender, measurement_type))
+    if ref is None:
+        return None
+    if method == 'robust' and 'median' in ref and ref.get('mad', 0) * MAD_SCALE > 0:
+        return ref['median'], ref['mad'] * MAD_SCALE
+    return ref['mean'], ref['std']
+
+
+def calculate_measurement_zscore(value, age, gender, measurement_type, ref_table, method='mean'):
     """
     개인 측정값 → Z-Score 변환
 
@@ -27,22 +70,20 @@ def calculate_measurement_zscore(value, age, gender, measurement_type, ref_table
         성별 ('M' 또는 'F')
     measurement_type : str
         측정 항목 ('grip_right', 'sit_and_reach', 'vo2max' 등)
-    ref_table : dict
+    ref_table : ReferenceTable or dict
         참조 테이블
+    method : str
+        'mean' (평균·표준편차) 또는 'robust' (중앙값·MAD)
 
     Returns:
     --------
     float
         Z-Score 값
     """
-    key = (age, gender, measurement_type)
-
-    if key not in ref_table:
+    ref = _reference_center_scale(age, gender, measurement_type, ref_table, method)
+    if ref is None:
         raise ValueError(f"참조 데이터에 ({age}세, {gender}, {measurement_type}) 정보가 없습니다.")
-
-    ref = ref_table[key]
-    mean = ref['mean']
-    std = ref['std']
+    mean, std = ref
 
     if std == 0:
         raise ValueError(f"표준편차가 0입니다. ({age}세, {gender}, {measurement_type})")
@@ -51,13 +92,37 @@ def calculate_measurement_zscore(value, age, gender, measurement_type, ref_table
     return zscore
 
 
+def calculate_measurement_percentile(value, age, gender, measurement_type, ref_table):
+    """
+    개인 측정값 → 같은 (나이, 성별) 그룹 내 백분위 (0~100)
+
+    참조 테이블에 분위수 배열이 있으면 이분 탐색으로 계산하고,
+    없으면 평균·표준편차 기준 정규분포로 근사합니다.
+
+    Returns:
+    --------
+    float or None
+        백분위, 참조값이 없으면 None
+    """
+    if isinstance(ref_table, ReferenceTable):
+        return ref_table.percentile(age, gender, measurement_type, value)
+
+    ref = ref_table.get((age, gender, measurement_type))
+    if ref is None:
+        return None
+    if 'quantiles' in ref:
+        return percentile_from_quantiles(ref['quantiles'], value)
+    return normal_percentile(value, ref['mean'], ref['std'])
+
+
 def calculate_fitdna_from_measurements(
     age,
     gender,
     measurements,
     ref_table,
     threshold=0.25,
-    debug=False
+    debug=False,
+    zscore_method='mean'
 ):
     """
     사용자 측정값에서 FIT-DNA 계산
@@ -79,12 +144,14 @@ def calculate_fitdna_from_measurements(
             'sit_up': 30.0,        # 윗몸일으키기 회/분 (선택)
             'shuttle_run': 50.0,   # 왕복오래달리기 회 (선택)
         }
-    ref_table : dict
+    ref_table : ReferenceTable or dict
         참조 테이블
     threshold : float
         High/Low 기준값 (기본: 0.0 → Z-Score 0 기준)
     debug : bool
         디버깅 로그 출력 여부
+    zscore_method : str
+        'mean' (평균·표준편차) 또는 'robust' (중앙값·MAD)
 
     Returns:
     --------
@@ -102,14 +169,14 @@ def calculate_fitdna_from_measurements(
     # 1. 3축별 Z-Score 계산
 
     # 근력 축 (여러 측정값의 평균)
-    strength_items = ['grip_right', 'grip_left', 'standing_long_jump', 'sit_up']
+    strength_items = STRENGTH_ITEMS
     strength_zscores = []
 
     for item in strength_items:
         if item in measurements:
             try:
                 z = calculate_measurement_zscore(
-                    measurements[item], age, gender, item, ref_table
+                    measurements[item], age, gender, item, ref_table, zscore_method
                 )
                 strength_zscores.append(z)
             except ValueError as e:
@@ -119,7 +186,7 @@ def calculate_fitdna_from_measurements(
                 pass
 
     if not strength_zscores:
-        raise ValueError("근력 측정값이 필요합니다 (grip_right, grip_left, standing_long_jump, sit_up 중 1개 이상)")
+        raise ValueError(STRENGTH_REQUIRED_MESSAGE)
 
     strength_z = sum(strength_zscores) / len(strength_zscores)
 
@@ -127,7 +194,8 @@ def calculate_fitdna_from_measurements(
     if 'sit_and_reach' in measurements:
         try:
             flex_z = calculate_measurement_zscore(
-                measurements['sit_and_reach'], age, gender, 'sit_and_reach', ref_table
+                measurements['sit_and_reach'], age, gender, 'sit_and_reach', ref_table,
+                zscore_method
             )
         except ValueError as e:
             # 참조 데이터 없으면 중립값(0) 사용
@@ -141,14 +209,14 @@ def calculate_fitdna_from_measurements(
             print("[FITDNA DEBUG] sit_and_reach 측정값 없음 → flex_z=0.0 사용")
 
     # 지구력 축
-    endurance_items = ['vo2max', 'shuttle_run']
+    endurance_items = ENDURANCE_ITEMS
     endurance_zscores = []
 
     for item in endurance_items:
         if item in measurements:
             try:
                 z = calculate_measurement_zscore(
-                    measurements[item], age, gender, item, ref_table
+                    measurements[item], age, gender, item, ref_table, zscore_method
                 )
                 endurance_zscores.append(z)
             except ValueError as e:
@@ -157,17 +225,13 @@ def calculate_fitdna_from_measurements(
                 pass
 
     if not endurance_zscores:
-        raise ValueError("지구력 측정값이 필요합니다 (vo2max 또는 shuttle_run 중 1개 이상)")
+        raise ValueError(ENDURANCE_REQUIRED_MESSAGE)
 
     endurance_z = sum(endurance_zscores) / len(endurance_zscores)
 
     # 2. FIT-DNA 계산
-    fitdna_type = calculate_fitdna(strength_z, flex_z, endurance_z, threshold)
-    info = get_fitdna_description(fitdna_type)
-
-    # 실제 Z-Score 기준으로 각 축 High/Low 재계산
-    strength_level, flexibility_level, endurance_level = classify_axis_levels(
-        strength_z, flex_z, endurance_z, threshold
+    result = _build_fitdna_result(
+        age, gender, measurements, strength_z, flex_z, endurance_z, threshold
     )
 
     if debug:
@@ -175,12 +239,25 @@ def calculate_fitdna_from_measurements(
         print(f"age={age}, gender={gender}")
         print(f"measurements={measurements}")
         print(f"Z-scores → strength={strength_z:.2f}, flex={flex_z:.2f}, endurance={endurance_z:.2f}")
-        print(f"levels   → strength={strength_level}, flex={flexibility_level}, endurance={endurance_level}")
+        print(f"levels   → strength={result['strength_level']}, flex={result['flexibility_level']}, endurance={result['endurance_level']}")
         print(f"threshold={threshold}")
-        print(f"FIT-DNA  → {fitdna_type} ({info['name']})")
+        print(f"FIT-DNA  → {result['fitdna_type']} ({result['type_name']})")
         print("[FITDNA DEBUG] ===============================\n")
 
     # 3. 결과 반환
+    return result
+
+
+def _build_fitdna_result(age, gender, measurements, strength_z, flex_z, endurance_z, threshold):
+    """3축 Z-Score → FIT-DNA 결과 딕셔너리"""
+    fitdna_type = calculate_fitdna(strength_z, flex_z, endurance_z, threshold)
+    info = get_fitdna_description(fitdna_type)
+
+    # 실제 Z-Score 기준으로 각 축 High/Low 재계산
+    strength_level, flexibility_level, endurance_level = classify_axis_levels(
+        strength_z, flex_z, endurance_z, threshold
+    )
+
     return {
         'fitdna_type': fitdna_type,
         'type_name': info['name'],
@@ -192,15 +269,292 @@ def calculate_fitdna_from_measurements(
         'flexibility_z': round(flex_z, 2),
         'endurance_z': round(endurance_z, 2),
         'measurements_used': {
-            'strength_items': [k for k in strength_items if k in measurements],
+            'strength_items': [k for k in STRENGTH_ITEMS if k in measurements],
             'flexibility_items': ['sit_and_reach'] if 'sit_and_reach' in measurements else [],
-            'endurance_items': [k for k in endurance_items if k in measurements]
+            'endurance_items': [k for k in ENDURANCE_ITEMS if k in measurements]
         },
         'age': age,
         'gender': gender
     }
 
 
+# ============================================================
+# (나이, 성별) 고정 계산기
+# ============================================================
+
+class CohortScorer:
+    """
+    (나이, 성별) 한 그룹 전용 FIT-DNA 계산기
+
+    축별로 참조값이 있는 항목의 (항목, 평균, 표준편차) 계수를 미리 뽑아 두어,
+    사용자 한 명 계산은 축마다 계수 벡터를 한 번 순회하는 것으로 끝납니다.
+    결과는 calculate_fitdna_from_measurements()와 동일합니다.
+    """
+
+    def __init__(self, age, gender, ref_table, zscore_method='mean'):
+        self.age = age
+        self.gender = gender
+        self.zscore_method = zscore_method
+        self.ref_table = ref_table
+        self.strength_coefs = self._coefficients(STRENGTH_ITEMS, ref_table)
+        self.flexibility_coefs = self._coefficients(FLEXIBILITY_ITEMS, ref_table)
+        self.endurance_coefs = self._coefficients(ENDURANCE_ITEMS, ref_table)
+
+    def _coefficients(self, items, ref_table):
+        """참조값이 있고 표준편차가 0이 아닌 항목의 (item, mean, std) 튜플"""
+        coefs = []
+        for item in items:
+            ref = _reference_center_scale(self.age, self.gender, item, ref_table, self.zscore_method)
+            if ref is None or ref[1] == 0:
+                continue
+            coefs.append((item,) + ref)
+        return tuple(coefs)
+
+    def zscores(self, measurements):
+        """
+        측정값 → (strength_z, flex_z, endurance_z)
+
+        근력/지구력 항목이 하나도 없으면 ValueError
+        """
+        strength = [(measurements[item] - mean) / std
+                    for item, mean, std in self.strength_coefs if item in measurements]
+        if not strength:
+            raise ValueError(STRENGTH_REQUIRED_MESSAGE)
+
+        flex_z = 0.0
+        for item, mean, std in self.flexibility_coefs:
+            if item in measurements:
+                flex_z = (measurements[item] - mean) / std
+
+        endurance = [(measurements[item] - mean) / std
+                     for item, mean, std in self.endurance_coefs if item in measurements]
+        if not endurance:
+            raise ValueError(ENDURANCE_REQUIRED_MESSAGE)
+
+        return sum(strength) / len(strength), flex_z, sum(endurance) / len(endurance)
+
+    def score(self, measurements, threshold=0.25):
+        """측정값 → FIT-DNA 결과 (calculate_fitdna_from_measurements()와 같은 형식)"""
+        strength_z, flex_z, endurance_z = self.zscores(measurements)
+        return _build_fitdna_result(
+            self.age, self.gender, measurements, strength_z, flex_z, endurance_z, threshold
+        )
+
+    def percentiles(self, measurements):
+        """측정 항목별 그룹 내 백분위 {item: 0~100} (참조값이 없는 항목 제외)"""
+        result = {}
+        for item, value in measurements.items():
+            pct = calculate_measurement_percentile(value, self.age, self.gender, item, self.ref_table)
+            if pct is not None:
+                result[item] = round(pct, 1)
+        return result
+
+    def __repr__(self):
+        return (f"<CohortScorer(age={self.age}, gender={self.gender}, "
+                f"items={len(self.strength_coefs) + len(self.flexibility_coefs) + len(self.endurance_coefs)})>")
+
+
+# ============================================================
+# 배치(벡터화) 계산
+# ============================================================
+
+def _batch_reference_lookup(ages, genders, ref_table, method='mean'):
+    """
+    측정 항목 → 행별 (mean, std) 배열을 돌려주는 조회 함수 생성
+
+    ReferenceTable이면 배열 인덱스 연산으로 바로 조회하고,
+    일반 딕셔너리면 (나이, 성별) 조합마다 한 번씩만 조회합니다.
+    참조값이 없거나 표준편차가 0인 행은 NaN입니다.
+    """
+    if isinstance(ref_table, ReferenceTable):
+        gender_idx = ref_table.gender_indices(genders)
+
+        def lookup(item):
+            mean, std, _ = ref_table.lookup(ages, gender_idx, item, method)
+            return mean, std
+
+        return lookup
+
+    gender_values, gender_idx = np.unique(genders, return_inverse=True)
+    n_genders = max(len(gender_values), 1)
+    codes = ages * n_genders + gender_idx.reshape(-1)
+    unique_codes, inverse = np.unique(codes, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    cohorts = [
+        (int(code // n_genders), str(gender_values[code % n_genders]))
+        for code in unique_codes
+    ]
+
+    def lookup(item):
+        cohort_mean = np.full(len(cohorts), np.nan)
+        cohort_std = np.full(len(cohorts), np.nan)
+        for i, (age, gender) in enumerate(cohorts):
+            ref = _reference_center_scale(age, gender, item, ref_table, method)
+            if ref is not None and ref[1] != 0:
+                cohort_mean[i], cohort_std[i] = ref
+        return cohort_mean[inverse], cohort_std[inverse]
+
+    return lookup
+
+
+def _batch_item_zscores(values, lookup, item):
+    """
+    한 측정 항목의 Z-Score를 전체 행에 대해 한 번에 계산
+
+    Returns:
+    --------
+    (np.ndarray, np.ndarray)
+        (Z-Score 배열, 사용 가능 여부 마스크)
+        측정값이 NaN이거나 참조값이 없거나 표준편차가 0이면 False
+    """
+    mean, std = lookup(item)
+
+    ok = ~np.isnan(values) & ~np.isnan(mean)
+    zscores = np.zeros(len(values))
+    np.divide(values - mean, std, out=zscores, where=ok)
+    return zscores, ok
+
+
+def _batch_axis_mean(items, n, lookup, measurements):
+    """
+    여러 항목 Z-Score의 행별 평균 (스칼라 버전과 동일한 순서로 누적)
+
+    Returns:
+    --------
+    (np.ndarray, np.ndarray)
+        (축 Z-Score 배열, 사용된 항목 수 배열)
+    """
+    total = np.zeros(n)
+    count = np.zeros(n, dtype=np.int64)
+
+    for item in items:
+        if item not in measurements:
+            continue
+        values = np.asarray(measurements[item], dtype=float)
+        z, ok = _batch_item_zscores(values, lookup, item)
+        total = np.where(ok, total + z, total)
+        count += ok
+
+    axis_z = np.full(n, np.nan)
+    np.divide(total, count, out=axis_z, where=count > 0)
+    return axis_z, count
+
+
+def calculate_fitdna_batch(
+    ages,
+    genders,
+    measurements,
+    ref_table,
+    threshold=0.25,
+    zscore_method='mean'
+):
+    """
+    여러 사용자의 측정값에서 FIT-DNA를 한 번에 계산 (벡터화)
+
+    calculate_fitdna_from_measurements()와 동일한 규칙을 따릅니다.
+    - 참조값이 없는 근력/지구력 항목은 스킵
+    - 유연성 측정값 또는 참조값이 없으면 flex_z = 0.0
+
+    Parameters:
+    -----------
+    ages : array-like of int
+        나이 배열
+    genders : array-like of str
+        성별 배열 ('M' 또는 'F')
+    measurements : dict
+        측정 항목별 열 배열 (결측은 NaN)
+        {
+            'grip_right': [35.0, 22.0, ...],
+            'sit_and_reach': [15.0, np.nan, ...],
+            'vo2max': [45.0, 38.0, ...],
+            ...
+        }
+        딕셔너리에 없는 항목은 전체 결측으로 처리
+    ref_table : ReferenceTable or dict
+        참조 테이블
+    threshold : float
+        High/Low 기준값
+    zscore_method : str
+        'mean' (평균·표준편차) 또는 'robust' (중앙값·MAD)
+
+    Returns:
+    --------
+    dict of np.ndarray
+        {
+            'fitdna_type': ['PFE', 'LSQ', ...],   # 계산 불가 행은 ''
+            'strength_level': ['High', ...],       # 계산 불가 행은 ''
+            'flexibility_level': [...],
+            'endurance_level': [...],
+            'strength_z': [...],                   # 반올림 전 값, 계산 불가 행은 NaN
+            'flexibility_z': [...],
+            'endurance_z': [...],
+            'strength_ok': [...],                  # 근력 항목 1개 이상 사용 여부
+            'endurance_ok': [...],                 # 지구력 항목 1개 이상 사용 여부
+            'valid': [...]                         # strength_ok & endurance_ok
+        }
+        round(x, 2)를 적용하면 스칼라 버전의 Z-Score와 일치합니다.
+    """
+    ages = np.asarray(ages, dtype=np.int64)
+    genders = np.asarray(genders, dtype=str)
+    n = len(ages)
+    if zscore_method not in ZSCORE_METHODS:
+        raise ValueError(f"지원하지 않는 Z-Score 방식입니다: {zscore_method} ({', '.join(ZSCORE_METHODS)})")
+    lookup = _batch_reference_lookup(ages, genders, ref_table, zscore_method)
+
+    # 1. 3축별 Z-Score 계산
+    strength_z, strength_n = _batch_axis_mean(
+        STRENGTH_ITEMS, n, lookup, measurements
+    )
+
+    # 유연성 축 (측정값 또는 참조값이 없으면 0으로 처리)
+    flex_z = np.zeros(n)
+    if 'sit_and_reach' in measurements:
+        values = np.asarray(measurements['sit_and_reach'], dtype=float)
+        z, ok = _batch_item_zscores(values, lookup, 'sit_and_reach')
+        flex_z = np.where(ok, z, 0.0)
+
+    endurance_z, endurance_n = _batch_axis_mean(
+        ENDURANCE_ITEMS, n, lookup, measurements
+    )
+
+    strength_ok = strength_n > 0
+    endurance_ok = endurance_n > 0
+    valid = strength_ok & endurance_ok
+
+    strength_z = np.where(valid, strength_z, np.nan)
+    flex_z = np.where(valid, flex_z, np.nan)
+    endurance_z = np.where(valid, endurance_z, np.nan)
+
+    # 2. 축별 High/Low 및 FIT-DNA 코드
+    strength_high = strength_z >= threshold
+    flex_high = flex_z >= threshold
+    endurance_high = endurance_z >= threshold
+
+    fitdna_type = np.char.add(
+        np.char.add(
+            np.where(strength_high, 'P', 'L'),
+            np.where(flex_high, 'F', 'S')
+        ),
+        np.where(endurance_high, 'E', 'Q')
+    )
+
+    def _levels(high):
+        return np.where(valid, np.where(high, 'High', 'Low'), '')
+
+    return {
+        'fitdna_type': np.where(valid, fitdna_type, ''),
+        'strength_level': _levels(strength_high),
+        'flexibility_level': _levels(flex_high),
+        'endurance_level': _levels(endurance_high),
+        'strength_z': strength_z,
+        'flexibility_z': flex_z,
+        'endurance_z': endurance_z,
+        'strength_ok': strength_ok,
+        'endurance_ok': endurance_ok,
+        'valid': valid
+    }
+
+
 # ============================================================
 # 사용 예시
 # ============================================================
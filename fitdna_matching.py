@@ -0,0 +1,421 @@
+"""
+FIT-DNA 운동 메이트 매칭 점수 (백엔드에서 import하는 순수 모듈)
+
+매칭 점수 식을 데이터 로드·시각화 없이 제공합니다 (phase2_matching_algorithm.py 분석 스크립트도 이 모듈을 사용).
+- 유형 간 거리 행렬은 처음 사용할 때 matching_euclidean_distance_matrix.csv에서 로드
+  (pandas 없이 csv 모듈로 읽어 8×8 numpy 배열로 보관, 미리 계산한 배열 주입 가능)
+- 유형 코드 ↔ 행렬 인덱스 변환
+- calculate_matching_score: Z-Score 거리 60% + 유형 거리 40% + 운동 선호 일치 보너스
+- matching_score_matrix / top_k_matches: 같은 식의 회원 전체 쌍 점수를 타일 단위로 벡터화
+  (야간 매칭 갱신용, 회원별 상위 k명만 보관해 메모리 O(n·k), 선택적으로 프로세스 풀 분산)
+"""
+
+import csv
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+# 유형 코드 (거리 행렬 CSV의 행/열 순서)
+TYPE_CODES = ('LFE', 'LFQ', 'LSE', 'LSQ', 'PFE', 'PFQ', 'PSE', 'PSQ')
+
+TYPE_DISTANCE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                  'matching_euclidean_distance_matrix.csv')
+
+# 거리 → 점수 환산: 거리 0~MAX_DISTANCE를 100~0점으로
+MAX_DISTANCE = 3.0
+
+# 가중치 (Z-Score 60%, FIT-DNA 유형 40%), 운동 선호도 일치 보너스 10%
+ZSCORE_WEIGHT = 0.6
+FITDNA_WEIGHT = 0.4
+EXERCISE_BONUS = 1.1
+
+# 전체 쌍 점수 타일 크기 (행 × 열): float64 타일 하나가 약 1MB로 L2 캐시에 들어가는 크기
+TILE_ROWS = 256
+TILE_COLS = 512
+
+# 유사도 레벨 경계 (유클리드 거리)
+LEVEL1_DISTANCE = 1.2
+LEVEL2_DISTANCE = 2.0
+
+_type_index = {code: i for i, code in enumerate(TYPE_CODES)}
+_type_distance = None
+_load_lock = threading.Lock()
+
+
+def load_type_distance_matrix(path=None):
+    """
+    유형 간 거리 행렬 로드 (TYPE_CODES 순서의 (8, 8) 배열)
+
+    Parameters:
+    -----------
+    path : str, optional
+        .csv (utf-8-sig, 첫 열이 행 유형, 첫 행이 열 유형) 또는
+        TYPE_CODES 순서로 저장한 .npy 파일 (기본 TYPE_DISTANCE_FILE)
+
+    Returns:
+    --------
+    np.ndarray : (8, 8) float64
+    """
+    path = path or TYPE_DISTANCE_FILE
+    n = len(TYPE_CODES)
+
+    if path.endswith('.npy'):
+        matrix = np.load(path)
+        if matrix.shape != (n, n):
+            raise ValueError(f"유형 거리 행렬 크기가 {(n, n)}가 아닙니다: {matrix.shape}")
+        return matrix.astype(float)
+
+    matrix = np.full((n, n), np.nan)
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        columns = [_type_index.get(code.strip()) for code in next(reader)[1:]]
+        for row in reader:
+            if not row:
+                continue
+            i = _type_index.get(row[0].strip())
+            if i is None:
+                continue
+            for j, value in zip(columns, row[1:]):
+                if j is not None:
+                    matrix[i, j] = float(value)
+
+    if np.isnan(matrix).any():
+        raise ValueError(f"유형 거리 행렬에 빠진 유형이 있습니다: {path}")
+    return matrix
+
+
+def set_type_distance_matrix(matrix):
+    """미리 계산한 유형 거리 행렬 사용 (TYPE_CODES 순서의 (8, 8) 배열)"""
+    global _type_distance
+    matrix = np.asarray(matrix, dtype=float)
+    n = len(TYPE_CODES)
+    if matrix.shape != (n, n):
+        raise ValueError(f"유형 거리 행렬 크기가 {(n, n)}가 아닙니다: {matrix.shape}")
+    _type_distance = matrix
+
+
+def get_type_distance_matrix():
+    """유형 간 거리 행렬 (처음 호출 시 TYPE_DISTANCE_FILE에서 로드)"""
+    global _type_distance
+    if _type_distance is None:
+        with _load_lock:
+            if _type_distance is None:
+                _type_distance = load_type_distance_matrix()
+    return _type_distance
+
+
+def type_index(fitdna_type):
+    """유형 코드 → 행렬 인덱스 (알 수 없는 유형이면 KeyError)"""
+    try:
+        return _type_index[fitdna_type]
+    except KeyError:
+        raise KeyError(f"알 수 없는 FIT-DNA 유형: {fitdna_type}") from None
+
+
+def type_indices(fitdna_types):
+    """유형 코드 배열 → 행렬 인덱스 배열 (알 수 없는 유형은 -1)"""
+    return np.array([_type_index.get(t, -1) for t in fitdna_types], dtype=np.int64)
+
+
+def type_distance(type1, type2):
+    """두 유형 간 유클리드 거리 (유형 대표 Z-Score 벡터 기준)"""
+    return float(get_type_distance_matrix()[type_index(type1), type_index(type2)])
+
+
+def type_letter_differences():
+    """유형 간 다른 글자 수 (8, 8) - 매칭 선호도 fitdna_similarity(0~3개 차이)와 비교"""
+    codes = np.array([list(code) for code in TYPE_CODES])
+    return (codes[:, None, :] != codes[None, :, :]).sum(axis=2)
+
+
+def distance_to_score(distance):
+    """거리 0~3 → 점수 100~0 (3 이상은 0점, 배열도 가능)"""
+    return np.maximum(0, 100 - (np.asarray(distance) / MAX_DISTANCE * 100))
+
+
+def get_similarity_level(euclidean_dist):
+    """
+    유클리드 거리 기준으로 유사도 레벨 분류
+    - 레벨 1 (매우 유사): 거리 < 1.2
+    - 레벨 2 (유사): 거리 1.2 ~ 2.0
+    - 레벨 3 (다름): 거리 > 2.0
+    """
+    if euclidean_dist < LEVEL1_DISTANCE:
+        return "레벨 1 (매우 유사)"
+    elif euclidean_dist < LEVEL2_DISTANCE:
+        return "레벨 2 (유사)"
+    else:
+        return "레벨 3 (다름)"
+
+
+def recommend_matches(user_fitdna, top_n=3, similarity_level='all'):
+    """
+    주어진 FIT-DNA 유형에 대해 유사한 유형을 추천
+
+    Parameters:
+    -----------
+    user_fitdna : str
+        사용자의 FIT-DNA 유형 (예: 'PFE')
+    top_n : int
+        추천할 유형 개수
+    similarity_level : str
+        'level1' (매우 유사만), 'level2' (유사까지), 'all' (전체)
+
+    Returns:
+    --------
+    list : 추천 유형 리스트 [(유형, 거리, 레벨), ...]
+    """
+    if user_fitdna not in _type_index:
+        return []
+
+    distances = get_type_distance_matrix()[_type_index[user_fitdna]]
+    limit = {'level1': LEVEL1_DISTANCE, 'level2': LEVEL2_DISTANCE}.get(similarity_level, np.inf)
+
+    candidates = sorted(
+        (float(distances[i]), code) for i, code in enumerate(TYPE_CODES)
+        if code != user_fitdna and distances[i] < limit
+    )
+    return [(code, dist, get_similarity_level(dist)) for dist, code in candidates[:top_n]]
+
+
+def calculate_matching_score(user1_zscore, user2_zscore,
+                             user1_fitdna, user2_fitdna,
+                             exercise_match=True):
+    """
+    두 사용자 간 매칭 점수 계산
+
+    Parameters:
+    -----------
+    user1_zscore : array-like
+        사용자1의 [strength_z, flex_z, endurance_z]
+    user2_zscore : array-like
+        사용자2의 [strength_z, flex_z, endurance_z]
+    user1_fitdna : str
+        사용자1의 FIT-DNA 유형
+    user2_fitdna : str
+        사용자2의 FIT-DNA 유형
+    exercise_match : bool
+        운동 선호도가 일치하는지 (추가 가중치)
+
+    Returns:
+    --------
+    float : 매칭 점수 (0~100)
+    """
+    # 1. Z-Score 유사도 (유클리드 거리 0~3 → 점수 100~0)
+    zscore_distance = float(np.linalg.norm(
+        np.asarray(user1_zscore, dtype=float) - np.asarray(user2_zscore, dtype=float)
+    ))
+    zscore_score = max(0, 100 - (zscore_distance / MAX_DISTANCE * 100))
+
+    # 2. FIT-DNA 유형 유사도
+    fitdna_distance = type_distance(user1_fitdna, user2_fitdna)
+    fitdna_score = max(0, 100 - (fitdna_distance / MAX_DISTANCE * 100))
+
+    # 3. 가중 평균 (Z-Score 60%, FIT-DNA 40%)
+    base_score = zscore_score * ZSCORE_WEIGHT + fitdna_score * FITDNA_WEIGHT
+
+    # 4. 운동 선호도 보너스
+    if exercise_match:
+        base_score = min(100, base_score * EXERCISE_BONUS)
+
+    return round(base_score, 2)
+
+
+# ============================================================
+# 전체 쌍 점수 (벡터화)
+# ============================================================
+
+def _fitdna_score_table():
+    """유형 × 유형 가중 점수표 (8, 8) = 유형 거리 점수 × FITDNA_WEIGHT"""
+    return distance_to_score(get_type_distance_matrix()) * FITDNA_WEIGHT
+
+
+def _score_tile(z1, t1, m1, z2, t2, m2, table, exercise_match):
+    """
+    타일 하나의 (len(z1), len(z2)) 점수 (반올림 전)
+
+    Z-Score는 3차원이라 축별 차이를 바로 누적합니다
+    (|a|² + |b|² - 2ab 전개보다 거리 0 근처에서 정확해 스칼라 식과 같은 값이 나옴).
+    """
+    d2 = np.subtract.outer(z1[:, 0], z2[:, 0])
+    d2 *= d2
+    for axis in (1, 2):
+        diff = np.subtract.outer(z1[:, axis], z2[:, axis])
+        diff *= diff
+        d2 += diff
+    score = np.sqrt(d2, out=d2)
+    score /= MAX_DISTANCE
+    score *= 100
+    np.subtract(100, score, out=score)
+    np.maximum(score, 0, out=score)
+    score *= ZSCORE_WEIGHT
+    score += table[t1[:, None], t2[None, :]]
+
+    if m1 is not None:
+        bonus = (np.bitwise_and.outer(m1, m2) != 0)
+    elif exercise_match:
+        bonus = True
+    else:
+        return score
+    return np.where(bonus, np.minimum(100, score * EXERCISE_BONUS), score)
+
+
+def _as_member_arrays(zscores, types, exercise_masks):
+    zscores = np.ascontiguousarray(zscores, dtype=float).reshape(-1, 3)
+    types = np.asarray(types)
+    if types.dtype.kind in 'US' or types.dtype == object:
+        types = type_indices(types)
+    types = types.astype(np.int64)
+    if (types < 0).any() or (types >= len(TYPE_CODES)).any():
+        raise KeyError("알 수 없는 FIT-DNA 유형이 있습니다")
+    if exercise_masks is not None:
+        exercise_masks = np.asarray(exercise_masks, dtype=np.uint64)
+    return zscores, types, exercise_masks
+
+
+def matching_score_matrix(zscores1, types1, zscores2, types2,
+                          exercise_match=True, exercise_masks1=None, exercise_masks2=None):
+    """
+    두 회원 집합 간 매칭 점수 행렬 (calculate_matching_score와 같은 식)
+
+    Parameters:
+    -----------
+    zscores1, zscores2 : array-like (n, 3)
+        회원별 [strength_z, flex_z, endurance_z]
+    types1, types2 : array-like (n,)
+        FIT-DNA 유형 코드 또는 type_indices() 인덱스
+    exercise_match : bool
+        exercise_masks가 없을 때 모든 쌍에 운동 선호도 보너스 적용 여부
+    exercise_masks1, exercise_masks2 : array-like of int, optional
+        회원별 선호 운동 비트마스크 - 공통 비트가 있는 쌍에만 보너스
+
+    Returns:
+    --------
+    np.ndarray : (n1, n2) 점수 (0~100, 소수 둘째 자리 반올림)
+    """
+    z1, t1, m1 = _as_member_arrays(zscores1, types1, exercise_masks1)
+    z2, t2, m2 = _as_member_arrays(zscores2, types2, exercise_masks2)
+    if (m1 is None) != (m2 is None):
+        raise ValueError("exercise_masks1과 exercise_masks2는 함께 주어야 합니다")
+    return np.round(_score_tile(z1, t1, m1, z2, t2, m2, _fitdna_score_table(), exercise_match), 2)
+
+
+def _top_k_rows(zscores, types, masks, table, exercise_match, k, start, stop, tile_rows, tile_cols):
+    """행 [start, stop) 회원의 상위 k명 (자기 자신 제외) - 행 타일 × 열 타일을 돌며 누적 병합"""
+    n = len(zscores)
+    rows = stop - start
+    best_scores = np.full((rows, k), -np.inf)
+    best_idx = np.full((rows, k), -1, dtype=np.int64)
+
+    for r0 in range(start, stop, tile_rows):
+        r1 = min(r0 + tile_rows, stop)
+        z1, t1 = zscores[r0:r1], types[r0:r1]
+        m1 = masks[r0:r1] if masks is not None else None
+        row_scores = best_scores[r0 - start:r1 - start]
+        row_idx = best_idx[r0 - start:r1 - start]
+        own = np.arange(r0, r1)
+
+        for c0 in range(0, n, tile_cols):
+            c1 = min(c0 + tile_cols, n)
+            tile = _score_tile(z1, t1, m1, zscores[c0:c1], types[c0:c1],
+                               masks[c0:c1] if masks is not None else None, table, exercise_match)
+            # 자기 자신과의 쌍 제외
+            diagonal = (own >= c0) & (own < c1)
+            tile[np.flatnonzero(diagonal), own[diagonal] - c0] = -np.inf
+
+            cols = np.arange(c0, c1)
+            if c1 - c0 > k:
+                top = np.argpartition(tile, -k, axis=1)[:, -k:]
+                tile = np.take_along_axis(tile, top, axis=1)
+                cols = top + c0
+            else:
+                cols = np.broadcast_to(cols, tile.shape)
+
+            merged_scores = np.concatenate([row_scores, tile], axis=1)
+            merged_idx = np.concatenate([row_idx, cols], axis=1)
+            keep = np.argpartition(merged_scores, -k, axis=1)[:, -k:]
+            row_scores[:] = np.take_along_axis(merged_scores, keep, axis=1)
+            row_idx[:] = np.take_along_axis(merged_idx, keep, axis=1)
+
+    # 점수 내림차순 (동점은 인덱스 오름차순)
+    order = np.lexsort((best_idx, -best_scores), axis=1)
+    best_scores = np.take_along_axis(best_scores, order, axis=1)
+    best_idx = np.take_along_axis(best_idx, order, axis=1)
+    best_idx[~np.isfinite(best_scores)] = -1
+    return best_idx, best_scores
+
+
+# 프로세스 풀 워커 상태 (initializer로 한 번만 전달)
+_pool_state = None
+
+
+def _init_pool_worker(state):
+    global _pool_state
+    _pool_state = state
+
+
+def _top_k_pool_task(start, stop):
+    return start, _top_k_rows(*_pool_state[:4], start=start, stop=stop, **_pool_state[4])
+
+
+def top_k_matches(zscores, types, k=10, exercise_match=True, exercise_masks=None,
+                  tile_rows=TILE_ROWS, tile_cols=TILE_COLS, workers=None):
+    """
+    회원 전체 쌍 매칭 점수에서 회원별 상위 k명 (자기 자신 제외)
+
+    n × n 점수 행렬을 만들지 않고 tile_rows × tile_cols 타일을 계산하면서
+    회원별 상위 k개만 누적하므로 메모리는 O(n·k + 타일)입니다.
+
+    Parameters:
+    -----------
+    zscores : array-like (n, 3)
+        회원별 [strength_z, flex_z, endurance_z]
+    types : array-like (n,)
+        FIT-DNA 유형 코드 또는 type_indices() 인덱스
+    k : int
+        회원별 상위 후보 수
+    exercise_match : bool
+        exercise_masks가 없을 때 모든 쌍에 운동 선호도 보너스 적용 여부
+    exercise_masks : array-like of int, optional
+        회원별 선호 운동 비트마스크 - 공통 비트가 있는 쌍에만 보너스
+    tile_rows, tile_cols : int
+        타일 크기 (기본 TILE_ROWS × TILE_COLS)
+    workers : int, optional
+        2 이상이면 행 구간을 나눠 프로세스 풀에서 계산
+
+    Returns:
+    --------
+    (np.ndarray, np.ndarray)
+        (indices, scores) 각각 (n, k) - 점수 내림차순,
+        후보가 k명보다 적으면 나머지 indices=-1, scores=NaN
+    """
+    zscores, types, masks = _as_member_arrays(zscores, types, exercise_masks)
+    n = len(zscores)
+    if k <= 0 or n == 0:
+        return np.empty((n, 0), dtype=np.int64), np.empty((n, 0))
+
+    table = _fitdna_score_table()
+    params = {"exercise_match": exercise_match, "k": k, "tile_rows": tile_rows, "tile_cols": tile_cols}
+
+    if workers and workers > 1 and n > tile_rows:
+        # 워커마다 여러 구간을 받도록 나눠 구간별 계산량 차이를 흡수
+        step = max(tile_rows, -(-n // (workers * 4)) // tile_rows * tile_rows)
+        indices = np.empty((n, k), dtype=np.int64)
+        scores = np.empty((n, k))
+        state = (zscores, types, masks, table, params)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_pool_worker,
+                                 initargs=(state,)) as pool:
+            futures = [pool.submit(_top_k_pool_task, start, min(start + step, n)) for start in range(0, n, step)]
+            for future in futures:
+                start, (part_idx, part_scores) = future.result()
+                indices[start:start + len(part_idx)] = part_idx
+                scores[start:start + len(part_idx)] = part_scores
+    else:
+        indices, scores = _top_k_rows(zscores, types, masks, table, start=0, stop=n, **params)
+
+    scores = np.round(scores, 2)
+    scores[indices < 0] = np.nan
+    return indices, scores
@@ -0,0 +1,540 @@
+"""
+배열 기반 FIT-DNA 참조 테이블
+(나이, 성별, 측정항목) → 평균·표준편차를 연속 배열로 저장
+
+바이너리 파일(.bin) 형식 (little-endian, 버전 2)
+- 헤더 (40 bytes): magic, version, age_min, n_ages, n_genders, n_items, flags,
+  names_size, n_quantiles (버전 1은 n_quantiles 없이 36 bytes)
+- 이름 블록: 성별·측정항목 이름 (utf-8, '\\n' 구분), 8바이트 정렬 패딩
+- float64 배열: mean, std, count, (min, max - flags & 1), (median, mad - flags & 2),
+  (quantiles - flags & 4, 마지막 축 길이 n_quantiles)
+- uint8 배열: valid
+각 배열은 (n_ages, n_genders, n_items) C-order
+"""
+
+import bisect
+import math
+import mmap
+import os
+import struct
+import sys
+import numpy as np
+
+
+# 바이너리 형식
+BINARY_MAGIC = b'FDNAREF\0'
+BINARY_VERSION = 2
+_HEADER_V1 = struct.Struct('<8sIiIIIII')
+_HEADER = struct.Struct('<8sIiIIIIII')
+_FLAG_HAS_RANGE = 1
+_FLAG_HAS_ROBUST = 2
+_FLAG_HAS_QUANTILES = 4
+
+# MAD → 정규분포 표준편차 환산 계수
+MAD_SCALE = 1.4826
+
+# Z-Score 계산 방식
+# - 'mean': (x - 평균) / 표준편차
+# - 'robust': (x - 중앙값) / (1.4826 × MAD), 이상치에 덜 민감
+ZSCORE_METHODS = ('mean', 'robust')
+
+# 기본 성별/측정 항목 순서 (배열 인덱스 순서)
+GENDERS = ('M', 'F')
+ITEMS = (
+    'grip_left',
+    'grip_right',
+    'standing_long_jump',
+    'sit_up',
+    'sit_and_reach',
+    'vo2max',
+    'shuttle_run',
+)
+
+
+class ReferenceTable:
+    """
+    연령×성별×측정항목 참조 테이블 (dense array)
+
+    mean/std/count 값을 [age - age_min, gender_idx, item_idx] 위치의
+    float64 배열에 저장하고, 값이 있는 칸은 valid 마스크로 표시합니다.
+
+    기존 pickle 딕셔너리와 같은 방식으로도 조회할 수 있습니다.
+    >>> table[(25, 'M', 'grip_right')]
+    {'mean': 42.1, 'std': 6.3, 'count': 812}
+
+    벡터화 계산에서는 lookup()으로 인덱스 연산만으로 조회합니다.
+
+    중앙값/MAD(median, mad)와 분위수 배열(quantiles, 기본 101개 = 0~100%)은
+    선택 항목이며, 있으면 robust Z-Score와 이분 탐색 백분위를 지원합니다.
+    """
+
+    def __init__(self, age_min, mean, std, count, valid,
+                 genders=GENDERS, items=ITEMS, min_values=None, max_values=None,
+                 median=None, mad=None, quantiles=None):
+        self.age_min = int(age_min)
+        self.mean = mean
+        self.std = std
+        self.count = count
+        self.valid = valid
+        self.min_values = min_values
+        self.max_values = max_values
+        self.median = median
+        self.mad = mad
+        self.quantiles = quantiles
+        self.gender_names = tuple(genders)
+        self.item_names = tuple(items)
+
+        self.age_max = self.age_min + mean.shape[0] - 1
+        self._gender_index = {g: i for i, g in enumerate(self.gender_names)}
+        self._item_index = {item: i for i, item in enumerate(self.item_names)}
+
+        # 단일 조회는 평탄화 위치로 배열에서 바로 읽음 (ndarray.item → 파이썬 스칼라)
+        # mmap 배열을 리스트로 복사하지 않으므로 워커 프로세스들이 페이지 캐시를 공유
+        self._n_ages = mean.shape[0]
+        self._n_genders = len(self.gender_names)
+        self._n_items = len(self.item_names)
+        if quantiles is not None:
+            self._quantile_rows = quantiles.reshape(-1, quantiles.shape[-1])
+            n_q = quantiles.shape[-1]
+            self._quantile_probs = [100.0 * k / (n_q - 1) for k in range(n_q)]
+        else:
+            self._quantile_rows = None
+            self._quantile_probs = None
+
+    # ------------------------------------------------------------
+    # 생성
+    # ------------------------------------------------------------
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        {(age, gender, item): {'mean', 'std', 'count', ...}} 딕셔너리에서 생성
+
+        'min'/'max', 'median'/'mad', 'quantiles' 값은 모든 항목에 있을 때만 보관합니다.
+        """
+        ages = [int(k[0]) for k in data]
+        age_min = min(ages) if ages else 0
+        n_ages = (max(ages) - age_min + 1) if ages else 0
+
+        genders = list(GENDERS) + sorted({k[1] for k in data} - set(GENDERS))
+        items = list(ITEMS) + sorted({k[2] for k in data} - set(ITEMS))
+        gender_index = {g: i for i, g in enumerate(genders)}
+        item_index = {item: i for i, item in enumerate(items)}
+
+        shape = (n_ages, len(genders), len(items))
+        mean = np.full(shape, np.nan)
+        std = np.full(shape, np.nan)
+        count = np.zeros(shape)
+        valid = np.zeros(shape, dtype=bool)
+
+        has_range = bool(data) and all('min' in v and 'max' in v for v in data.values())
+        min_values = np.full(shape, np.nan) if has_range else None
+        max_values = np.full(shape, np.nan) if has_range else None
+
+        has_robust = bool(data) and all('median' in v and 'mad' in v for v in data.values())
+        median = np.full(shape, np.nan) if has_robust else None
+        mad = np.full(shape, np.nan) if has_robust else None
+
+        n_quantiles = {len(v['quantiles']) for v in data.values() if 'quantiles' in v}
+        has_quantiles = (bool(data) and len(n_quantiles) == 1
+                         and all('quantiles' in v for v in data.values()))
+        quantiles = np.full(shape + (n_quantiles.pop(),), np.nan) if has_quantiles else None
+
+        for (age, gender, item), ref in data.items():
+            idx = (int(age) - age_min, gender_index[gender], item_index[item])
+            mean[idx] = ref['mean']
+            std[idx] = ref['std']
+            count[idx] = ref.get('count', 0)
+            valid[idx] = True
+            if has_range:
+                min_values[idx] = ref['min']
+                max_values[idx] = ref['max']
+            if has_robust:
+                median[idx] = ref['median']
+                mad[idx] = ref['mad']
+            if has_quantiles:
+                quantiles[idx] = ref['quantiles']
+
+        return cls(age_min, mean, std, count, valid,
+                   genders=genders, items=items,
+                   min_values=min_values, max_values=max_values,
+                   median=median, mad=mad, quantiles=quantiles)
+
+    @classmethod
+    def load_binary(cls, path, use_mmap=True):
+        """
+        바이너리 참조 테이블 로드
+
+        use_mmap=True이면 파일을 읽기 전용으로 mmap 하여 배열이 페이지 캐시를
+        직접 가리키므로, 같은 호스트의 워커들이 한 벌의 메모리를 공유합니다.
+        """
+        with open(path, 'rb') as f:
+            if use_mmap:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                buffer = f.read()
+
+        magic, version = struct.unpack_from('<8sI', buffer, 0)
+        if magic != BINARY_MAGIC:
+            raise ValueError(f"참조 테이블 바이너리 파일이 아닙니다: {path}")
+        if version == 1:
+            header = _HEADER_V1
+            (_, _, age_min, n_ages, n_genders, n_items,
+             flags, names_size) = header.unpack_from(buffer, 0)
+            n_quantiles = 0
+        elif version == BINARY_VERSION:
+            header = _HEADER
+            (_, _, age_min, n_ages, n_genders, n_items,
+             flags, names_size, n_quantiles) = header.unpack_from(buffer, 0)
+        else:
+            raise ValueError(f"지원하지 않는 참조 테이블 버전입니다: v{version} ({path})")
+
+        offset = header.size
+        names = bytes(buffer[offset:offset + names_size]).decode('utf-8').split('\n')
+        genders, items = names[:n_genders], names[n_genders:n_genders + n_items]
+        offset = _align8(offset + names_size)
+
+        shape = (n_ages, n_genders, n_items)
+        size = n_ages * n_genders * n_items
+
+        def read(dtype, extra=()):
+            nonlocal offset
+            count = size * (extra[0] if extra else 1)
+            array = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+            offset += array.nbytes
+            return array.reshape(shape + extra)
+
+        mean = read('<f8')
+        std = read('<f8')
+        count = read('<f8')
+        min_values = max_values = None
+        if flags & _FLAG_HAS_RANGE:
+            min_values = read('<f8')
+            max_values = read('<f8')
+        median = mad = quantiles = None
+        if flags & _FLAG_HAS_ROBUST:
+            median = read('<f8')
+            mad = read('<f8')
+        if flags & _FLAG_HAS_QUANTILES:
+            quantiles = read('<f8', (n_quantiles,))
+        valid = read('u1').view(bool)
+
+        return cls(age_min, mean, std, count, valid,
+                   genders=genders, items=items,
+                   min_values=min_values, max_values=max_values,
+                   median=median, mad=mad, quantiles=quantiles)
+
+    def save_binary(self, path):
+        """
+        고정 레이아웃 바이너리 파일로 저장 (load_binary()로 mmap 로드)
+
+        임시 파일에 쓴 뒤 os.replace()로 교체하므로, 기존 파일을 mmap 중인
+        프로세스는 이전 내용을 그대로 읽고 다음 로드부터 새 파일을 봅니다.
+        """
+        n_ages, n_genders, n_items = self.mean.shape
+        names = '\n'.join(self.gender_names + self.item_names).encode('utf-8')
+        has_range = self.min_values is not None
+        has_robust = self.median is not None
+        has_quantiles = self.quantiles is not None
+        flags = ((_FLAG_HAS_RANGE if has_range else 0)
+                 | (_FLAG_HAS_ROBUST if has_robust else 0)
+                 | (_FLAG_HAS_QUANTILES if has_quantiles else 0))
+        n_quantiles = self.quantiles.shape[-1] if has_quantiles else 0
+
+        header = _HEADER.pack(BINARY_MAGIC, BINARY_VERSION, self.age_min,
+                              n_ages, n_genders, n_items, flags, len(names), n_quantiles)
+        padding = b'\0' * (_align8(len(header) + len(names)) - len(header) - len(names))
+
+        arrays = [self.mean, self.std, self.count]
+        if has_range:
+            arrays += [self.min_values, self.max_values]
+        if has_robust:
+            arrays += [self.median, self.mad]
+        if has_quantiles:
+            arrays.append(self.quantiles)
+
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(header)
+                f.write(names)
+                f.write(padding)
+                for array in arrays:
+                    f.write(np.ascontiguousarray(array, dtype='<f8').tobytes())
+                f.write(np.ascontiguousarray(self.valid, dtype='u1').tobytes())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def to_dict(self):
+        """기존 pickle과 같은 {(age, gender, item): {...}} 딕셔너리로 변환"""
+        return dict(self.items())
+
+    # ------------------------------------------------------------
+    # 인덱스 연산
+    # ------------------------------------------------------------
+
+    def flat_index(self, age, gender, item):
+        """
+        (age, gender, item) → 평탄화된 배열 위치
+        ((age - age_min) * n_genders + gender_idx) * n_items + item_idx
+
+        범위를 벗어나거나 값이 없으면 None
+        """
+        try:
+            a = age - self.age_min
+            if a < 0 or a >= self._n_ages:
+                return None
+            flat = (a * self._n_genders + self._gender_index[gender]) * self._n_items \
+                + self._item_index[item]
+            if not self.valid.item(flat):
+                return None
+            return flat
+        except KeyError:
+            return None
+        except TypeError:
+            # 정수가 아닌 나이 (25.0 등): 정수와 같은 값일 때만 허용
+            try:
+                int_age = int(age)
+            except (TypeError, ValueError, OverflowError):
+                return None
+            if int_age != age:
+                return None
+            return self.flat_index(int_age, gender, item)
+
+    def index(self, age, gender, item):
+        """
+        (age, gender, item) → 배열 인덱스 튜플 (age_idx, gender_idx, item_idx)
+
+        범위를 벗어나거나 값이 없으면 None
+        """
+        flat = self.flat_index(age, gender, item)
+        if flat is None:
+            return None
+        return np.unravel_index(flat, self.mean.shape)
+
+    def gender_indices(self, genders):
+        """성별 배열 → 성별 인덱스 배열 (알 수 없는 값은 -1)"""
+        genders = np.asarray(genders)
+        gender_idx = np.full(genders.shape, -1, dtype=np.int64)
+        for g, i in self._gender_index.items():
+            gender_idx[genders == g] = i
+        return gender_idx
+
+    def lookup(self, ages, gender_idx, item, method='mean'):
+        """
+        행별 평균·표준편차 벡터 조회
+
+        method='robust'이면 중앙값과 1.4826 × MAD를 돌려줍니다.
+        (중앙값/MAD가 없거나 MAD가 0인 칸은 평균·표준편차 사용)
+
+        Parameters:
+        -----------
+        ages : np.ndarray of int
+        gender_idx : np.ndarray of int
+            gender_indices()로 변환한 성별 인덱스
+        item : str
+            측정 항목
+
+        Returns:
+        --------
+        (np.ndarray, np.ndarray, np.ndarray)
+            (mean, std, ok) - 참조값이 없거나 std가 0인 행은 ok=False, mean/std=NaN
+        """
+        n = len(ages)
+        mean = np.full(n, np.nan)
+        std = np.full(n, np.nan)
+        i = self._item_index.get(item)
+        if i is None:
+            return mean, std, np.zeros(n, dtype=bool)
+
+        a = np.asarray(ages, dtype=np.int64) - self.age_min
+        in_range = (a >= 0) & (a < self.mean.shape[0]) & (gender_idx >= 0)
+        a_safe = np.where(in_range, a, 0)
+        g_safe = np.where(in_range, gender_idx, 0)
+
+        if method == 'robust' and self.median is not None:
+            center, scale = self._robust_arrays()
+        else:
+            center, scale = self.mean, self.std
+
+        ok = in_range & self.valid[a_safe, g_safe, i] & (scale[a_safe, g_safe, i] != 0)
+        mean[ok] = center[a_safe[ok], g_safe[ok], i]
+        std[ok] = scale[a_safe[ok], g_safe[ok], i]
+        return mean, std, ok
+
+    def _robust_arrays(self):
+        """(중앙값, 1.4826 × MAD) 배열, MAD가 0/NaN인 칸은 평균·표준편차로 대체"""
+        scale = self.mad * MAD_SCALE
+        fallback = ~(scale > 0)
+        return (np.where(fallback, self.mean, self.median),
+                np.where(fallback, self.std, scale))
+
+    def mean_std(self, age, gender, item):
+        """단일 조회: (mean, std) 또는 값이 없으면 None"""
+        flat = self.flat_index(age, gender, item)
+        if flat is None:
+            return None
+        return self.mean.item(flat), self.std.item(flat)
+
+    def center_scale(self, age, gender, item, method='mean'):
+        """
+        단일 조회: Z-Score 계산용 (중심, 척도) 또는 값이 없으면 None
+
+        method='robust'이면 (중앙값, 1.4826 × MAD)를 돌려주고,
+        중앙값/MAD가 없거나 MAD가 0이면 (평균, 표준편차)를 사용합니다.
+        """
+        flat = self.flat_index(age, gender, item)
+        if flat is None:
+            return None
+        if method == 'robust' and self.median is not None:
+            scale = self.mad.item(flat) * MAD_SCALE
+            if scale > 0:
+                return self.median.item(flat), scale
+        return self.mean.item(flat), self.std.item(flat)
+
+    def percentile(self, age, gender, item, value):
+        """
+        측정값의 그룹 내 백분위 (0~100)
+
+        분위수 배열이 있으면 이분 탐색 후 인접 분위수 사이를 선형 보간하고
+        (같은 값이 여러 분위수에 걸치면 그 구간의 가운데),
+        없으면 평균·표준편차 기준 정규분포 근사를 사용합니다.
+        참조값이 없으면 None
+        """
+        flat = self.flat_index(age, gender, item)
+        if flat is None:
+            return None
+
+        if self._quantile_rows is None:
+            return normal_percentile(value, self.mean.item(flat), self.std.item(flat))
+        return percentile_from_quantiles(self._quantile_rows[flat].tolist(), value,
+                                         self._quantile_probs)
+
+    # ------------------------------------------------------------
+    # dict 호환 인터페이스
+    # ------------------------------------------------------------
+
+    def _entry(self, idx):
+        entry = {
+            'mean': float(self.mean[idx]),
+            'std': float(self.std[idx]),
+            'count': int(self.count[idx]),
+        }
+        if self.min_values is not None:
+            entry['min'] = float(self.min_values[idx])
+            entry['max'] = float(self.max_values[idx])
+        if self.median is not None:
+            entry['median'] = float(self.median[idx])
+            entry['mad'] = float(self.mad[idx])
+        if self.quantiles is not None:
+            entry['quantiles'] = self.quantiles[idx].tolist()
+        return entry
+
+    def __contains__(self, key):
+        try:
+            age, gender, item = key
+        except (TypeError, ValueError):
+            return False
+        return self.flat_index(age, gender, item) is not None
+
+    def __getitem__(self, key):
+        try:
+            age, gender, item = key
+        except (TypeError, ValueError):
+            raise KeyError(key)
+        idx = self.index(age, gender, item)
+        if idx is None:
+            raise KeyError(key)
+        return self._entry(idx)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __len__(self):
+        return int(self.valid.sum())
+
+    def keys(self):
+        for a, g, i in zip(*np.nonzero(self.valid)):
+            yield (self.age_min + int(a), self.gender_names[g], self.item_names[i])
+
+    __iter__ = keys
+
+    def values(self):
+        for _, entry in self.items():
+            yield entry
+
+    def items(self):
+        for a, g, i in zip(*np.nonzero(self.valid)):
+            key = (self.age_min + int(a), self.gender_names[g], self.item_names[i])
+            yield key, self._entry((a, g, i))
+
+    def nbytes(self):
+        """배열 메모리 사용량 (bytes)"""
+        arrays = [self.mean, self.std, self.count, self.valid,
+                  self.min_values, self.max_values,
+                  self.median, self.mad, self.quantiles]
+        return sum(a.nbytes for a in arrays if a is not None)
+
+    def __repr__(self):
+        return (f"<ReferenceTable(ages={self.age_min}~{self.age_max}, "
+                f"genders={self.gender_names}, items={len(self.item_names)}, entries={len(self)})>")
+
+
+def percentile_from_quantiles(quantiles, value, probs=None):
+    """
+    분위수 배열(오름차순, 0~100% 등간격)에서 이분 탐색으로 백분위 계산
+
+    인접 분위수 사이는 선형 보간하고, 같은 값이 여러 분위수에 걸치면
+    그 구간의 가운데 백분위를 돌려줍니다.
+    """
+    n = len(quantiles)
+    if probs is None:
+        probs = [100.0 * k / (n - 1) for k in range(n)]
+
+    lo = bisect.bisect_left(quantiles, value)
+    hi = bisect.bisect_right(quantiles, value)
+    if lo < hi:
+        return (probs[lo] + probs[hi - 1]) / 2
+    if lo == 0:
+        return 0.0
+    if lo == n:
+        return 100.0
+    x0, x1 = quantiles[lo - 1], quantiles[lo]
+    return probs[lo - 1] + (value - x0) / (x1 - x0) * (probs[lo] - probs[lo - 1])
+
+
+def normal_percentile(value, mean, std):
+    """평균·표준편차 기준 정규분포 근사 백분위 (std가 0 이하면 None)"""
+    if not std > 0:
+        return None
+    z = (value - mean) / std
+    return 50.0 * (1.0 + math.erf(z / math.sqrt(2.0)))
+
+
+def _align8(n):
+    return (n + 7) // 8 * 8
+
+
+# ============================================================
+# pickle → 바이너리 변환
+# ============================================================
+
+if __name__ == "__main__":
+    import os
+    import pickle
+
+    src = sys.argv[1] if len(sys.argv) > 1 else 'FITDNA_ref_new.pkl'
+    dst = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(src)[0] + '.bin'
+
+    with open(src, 'rb') as f:
+        table = ReferenceTable.from_dict(pickle.load(f))
+    table.save_binary(dst)
+
+    print(f">> {src} → {dst}")
+    print(f">> {table} ({os.path.getsize(dst):,} bytes)")
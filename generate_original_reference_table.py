@@ -1,26 +1,41 @@
 """
 원본 측정 데이터에서 참조 테이블 생성
 사용자 측정값(kg, cm) → Z-Score 변환용
+
+CSV를 청크 단위로 읽으며 (나이, 성별, 측정항목)별 통계량
+(count, mean, M2, min, max)을 한 번의 그룹 집계로 누적합니다.
+청크별 결과는 Chan 병렬 분산 공식으로 합치므로 청크 순서·워커 수와 무관합니다.
+
+robust Z-Score / 백분위용으로 측정값을 0.1 단위 히스토그램으로도 누적하여
+그룹별 중앙값, MAD, 101개 분위수(0~100%)를 함께 저장합니다.
+
+누적 통계량은 fitdna_original_reference_stats.pkl에 함께 저장되며,
+새 측정 배치가 들어오면 전체 이력을 다시 읽지 않고 배치만 집계해 병합합니다(--update).
+이전 참조 테이블 대비 평균·표준편차가 허용치 이상 바뀐 그룹은 변경 리포트로 저장합니다.
+
+사용법:
+    python generate_original_reference_table.py [CSV 경로] [--chunksize N] [--workers N]
+    python generate_original_reference_table.py 새배치.csv --update [--tolerance 0.05]
 """
 
-import pandas as pd
+import argparse
 import json
+import os
 import pickle
-import numpy as np
+import time
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 
-print("=" * 70)
-print("원본 측정 데이터 기반 참조 테이블 생성")
-print("=" * 70)
+import numpy as np
+import pandas as pd
+from fitdna_reference import ReferenceTable
 
-# 1. 원본 데이터 로드
-print("\n[1단계] 원본 측정 데이터 로드")
-df = pd.read_csv('KS_NFA_FTNESS_MESURE_ITEM_MESURE_INFO_202504.csv', encoding='utf-8')
-print(f">> 로드 완료: {len(df):,}건")
 
-# 2. 측정 항목 매핑 (MESURE_IEM_XXX → 실제 항목명)
-print("\n[2단계] 측정 항목 매핑")
+SOURCE_CSV = 'KS_NFA_FTNESS_MESURE_ITEM_MESURE_INFO_202504.csv'
+AGE_COLUMN = 'MESURE_AGE_CO'
+GENDER_COLUMN = 'SEXDSTN_FLAG_CD'
 
-# 주요 측정 항목 컬럼 매핑
+# 주요 측정 항목 컬럼 매핑 (MESURE_IEM_XXX → 실제 항목명)
 MEASUREMENT_MAPPING = {
     # 근력
     'grip_left': 'MESURE_IEM_017_VALUE',      # 악력(좌)
@@ -36,46 +51,6 @@ MEASUREMENT_MAPPING = {
     'shuttle_run': 'MESURE_IEM_030_VALUE',    # 왕복오래달리기
 }
 
-print(f">> 매핑된 측정 항목: {len(MEASUREMENT_MAPPING)}개")
-
-# 3. 연령×성별 그룹별 통계 계산
-print("\n[3단계] 연령×성별 그룹별 통계 계산")
-
-reference_data = {}
-ages = sorted(df['MESURE_AGE_CO'].dropna().unique())
-genders = sorted(df['SEXDSTN_FLAG_CD'].dropna().unique())
-
-total_groups = len(ages) * len(genders) * len(MEASUREMENT_MAPPING)
-processed = 0
-
-for age in ages:
-    for gender in genders:
-        # 해당 연령×성별 그룹 필터링
-        group = df[(df['MESURE_AGE_CO'] == age) & (df['SEXDSTN_FLAG_CD'] == gender)]
-
-        if len(group) >= 10:  # 최소 10명 이상 있는 그룹만
-            for item_name, column_name in MEASUREMENT_MAPPING.items():
-                # 해당 측정 항목의 값 추출 (결측치 제거)
-                values = pd.to_numeric(group[column_name], errors='coerce').dropna()
-
-                if len(values) >= 5:  # 최소 5개 이상 데이터 있어야 함
-                    reference_data[(int(age), gender, item_name)] = {
-                        'mean': float(values.mean()),
-                        'std': float(values.std()) if values.std() > 0 else 1.0,  # 0 방지
-                        'count': int(len(values)),
-                        'min': float(values.min()),
-                        'max': float(values.max())
-                    }
-
-        processed += len(MEASUREMENT_MAPPING)
-        if processed % 50 == 0:
-            print(f"   진행: {processed}/{total_groups} ({processed/total_groups*100:.1f}%)")
-
-print(f">> 계산 완료: {len(reference_data)} 항목")
-
-# 4. 3축(strength/flexibility/endurance) 통합 참조 계산
-print("\n[4단계] 3축 통합 참조 테이블 생성")
-
 # 3축별 항목 그룹핑
 AXIS_ITEMS = {
     'strength': ['grip_left', 'grip_right', 'standing_long_jump', 'sit_up'],
@@ -83,29 +58,383 @@ AXIS_ITEMS = {
     'endurance': ['vo2max', 'shuttle_run']
 }
 
-axis_reference = {}
+MIN_GROUP_SIZE = 10   # 최소 10명 이상 있는 그룹만
+MIN_ITEM_COUNT = 5    # 최소 5개 이상 데이터 있어야 함
+DEFAULT_CHUNKSIZE = 200_000
+
+OUTPUT_PREFIX = 'fitdna_original_reference'
+STATS_FILE = f'{OUTPUT_PREFIX}_stats.pkl'
+DIFF_REPORT_FILE = f'{OUTPUT_PREFIX}_diff.csv'
+STATS_VERSION = 2
+
+# 분위수 스케치: 측정값을 0.1 단위(1/SKETCH_BINS_PER_UNIT)로 반올림한 히스토그램 (병합 가능)
+SKETCH_BINS_PER_UNIT = 10
+N_QUANTILES = 101
+
+# 변경 리포트 기준: 평균 변화 / 이전 표준편차, 표준편차 상대 변화
+DEFAULT_TOLERANCE = 0.05
+
+
+# ============================================================
+# 청크 집계 / 병합
+# ============================================================
+
+def aggregate_chunk(chunk):
+    """
+    청크 하나의 (나이, 성별)별 통계량 계산
+
+    Parameters:
+    -----------
+    chunk : DataFrame
+        원본 CSV 청크 (나이·성별·측정항목 컬럼)
+
+    Returns:
+    --------
+    tuple : (group_rows, item_stats, item_hist)
+        group_rows: {(age, gender): 행 수}
+        item_stats: {(age, gender, item): [count, mean, M2, min, max]}
+        item_hist: {(age, gender, item): {bin: 개수}} (값 = bin / SKETCH_BINS_PER_UNIT)
+    """
+    values = pd.DataFrame({
+        item_name: pd.to_numeric(chunk[column_name], errors='coerce')
+        for item_name, column_name in MEASUREMENT_MAPPING.items()
+    })
+    keys = [chunk[AGE_COLUMN], chunk[GENDER_COLUMN]]
+
+    # numpy 스칼라 → 파이썬 값 (통계량 파일에 그대로 저장되므로)
+    group_rows = {
+        (age.item() if hasattr(age, 'item') else age, gender): int(size)
+        for (age, gender), size in chunk.groupby(keys, sort=False).size().items()
+    }
+
+    grouped = values.groupby(keys, sort=False)
+    count = grouped.count()
+    mean = grouped.mean()
+    # M2 = Σ(x - mean)² = 분산(ddof=0) × n
+    m2 = grouped.var(ddof=0).mul(count).fillna(0.0)
+    minimum = grouped.min()
+    maximum = grouped.max()
+
+    item_stats = {}
+    for item_name in MEASUREMENT_MAPPING:
+        for (age, gender), n in count[item_name].items():
+            if n == 0:
+                continue
+            key = age.item() if hasattr(age, 'item') else age
+            item_stats[(key, gender, item_name)] = [
+                int(n),
+                float(mean.at[(age, gender), item_name]),
+                float(m2.at[(age, gender), item_name]),
+                float(minimum.at[(age, gender), item_name]),
+                float(maximum.at[(age, gender), item_name]),
+            ]
+
+    item_hist = {}
+    for item_name in MEASUREMENT_MAPPING:
+        column = values[item_name]
+        present = column.notna()
+        bins = pd.Series(
+            np.rint(column[present].to_numpy() * SKETCH_BINS_PER_UNIT).astype(np.int64),
+            index=column.index[present]
+        )
+        sizes = bins.groupby([chunk[AGE_COLUMN][present], chunk[GENDER_COLUMN][present], bins]).size()
+        for (age, gender, b), n in sizes.items():
+            key = (age.item() if hasattr(age, 'item') else age, gender, item_name)
+            item_hist.setdefault(key, {})[int(b)] = int(n)
+
+    return group_rows, item_stats, item_hist
+
+
+def merge_item_stats(a, b):
+    """
+    두 부분 통계량 [count, mean, M2, min, max] 병합 (Chan et al.)
+    """
+    n_a, mean_a, m2_a, min_a, max_a = a
+    n_b, mean_b, m2_b, min_b, max_b = b
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    return [
+        n,
+        mean_a + delta * n_b / n,
+        m2_a + m2_b + delta * delta * n_a * n_b / n,
+        min(min_a, min_b),
+        max(max_a, max_b),
+    ]
+
+
+def merge_partials(total, partial):
+    """청크 결과(partial)를 누적 결과(total)에 병합"""
+    total_rows, total_stats, total_hist = total
+    group_rows, item_stats, item_hist = partial
+
+    for key, rows in group_rows.items():
+        total_rows[key] = total_rows.get(key, 0) + rows
+
+    for key, stats in item_stats.items():
+        if key in total_stats:
+            total_stats[key] = merge_item_stats(total_stats[key], stats)
+        else:
+            total_stats[key] = stats
+
+    for key, hist in item_hist.items():
+        target = total_hist.setdefault(key, {})
+        for b, n in hist.items():
+            target[b] = target.get(b, 0) + n
+
+    return total
+
+
+def read_measurement_chunks(csv_path, chunksize=DEFAULT_CHUNKSIZE):
+    """필요한 컬럼만 청크 단위로 읽기"""
+    usecols = [AGE_COLUMN, GENDER_COLUMN] + list(MEASUREMENT_MAPPING.values())
+    return pd.read_csv(csv_path, encoding='utf-8', usecols=usecols, chunksize=chunksize)
+
+
+def aggregate_measurements(csv_path, chunksize=DEFAULT_CHUNKSIZE, workers=1):
+    """
+    CSV 전체를 스트리밍 집계
+
+    Parameters:
+    -----------
+    csv_path : str
+        원본 측정 데이터 CSV
+    chunksize : int
+        청크당 행 수
+    workers : int
+        청크 집계 프로세스 수 (1이면 현재 프로세스에서 순차 처리)
+
+    Returns:
+    --------
+    tuple : (group_rows, item_stats, item_hist, total_rows)
+    """
+    total = ({}, {}, {})
+    total_rows = 0
+    chunks = read_measurement_chunks(csv_path, chunksize)
+
+    def report(partial_rows):
+        print(f"   진행: {partial_rows:,}행 집계")
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = []
+            for chunk in chunks:
+                total_rows += len(chunk)
+                pending.append(executor.submit(aggregate_chunk, chunk))
+                # 읽기가 집계를 너무 앞서가지 않도록 대기열 제한
+                if len(pending) >= workers * 2:
+                    merge_partials(total, pending.pop(0).result())
+                    report(total_rows)
+            for future in pending:
+                merge_partials(total, future.result())
+    else:
+        for chunk in chunks:
+            total_rows += len(chunk)
+            merge_partials(total, aggregate_chunk(chunk))
+            report(total_rows)
+
+    group_rows, item_stats, item_hist = total
+    return group_rows, item_stats, item_hist, total_rows
+
+
+def weighted_quantiles(values, counts, probs):
+    """
+    (값, 개수) 히스토그램의 분위수 (np.quantile 선형 보간과 같은 정의)
+
+    Parameters:
+    -----------
+    values : np.ndarray
+        값 배열
+    counts : np.ndarray
+        값별 개수
+    probs : np.ndarray
+        0~1 사이 확률
+    """
+    order = np.argsort(values, kind='stable')
+    values = np.asarray(values, dtype=float)[order]
+    cum = np.cumsum(np.asarray(counts)[order])
+
+    h = np.asarray(probs, dtype=float) * (cum[-1] - 1)
+    lo = np.floor(h)
+    # k번째(0부터) 값 = 누적 개수가 k를 처음 넘는 위치의 값
+    v_lo = values[np.searchsorted(cum, lo, side='right')]
+    v_hi = values[np.searchsorted(cum, np.ceil(h), side='right')]
+    return v_lo + (h - lo) * (v_hi - v_lo)
+
+
+def sketch_summary(hist, n_quantiles=N_QUANTILES):
+    """
+    히스토그램 → (중앙값, MAD, 분위수 리스트)
+
+    분위수는 0~100%를 n_quantiles개 등간격으로 나눈 값입니다.
+    """
+    bins = np.fromiter(hist.keys(), dtype=np.int64, count=len(hist))
+    counts = np.fromiter(hist.values(), dtype=np.int64, count=len(hist))
+    values = bins / SKETCH_BINS_PER_UNIT
+
+    quantiles = weighted_quantiles(values, counts, np.linspace(0.0, 1.0, n_quantiles))
+    median = float(weighted_quantiles(values, counts, [0.5])[0])
+    mad = float(weighted_quantiles(np.abs(values - median), counts, [0.5])[0])
+    return median, mad, [float(q) for q in quantiles]
+
+
+def build_reference_data(group_rows, item_stats, item_hist=None):
+    """
+    누적 통계량 → 참조 테이블 {(age, gender, item): {mean, std, count, min, max, ...}}
+
+    키 순서(나이 → 성별 → 측정항목)와 필터 조건은 기존 생성 결과와 같습니다.
+    item_hist가 있으면 median, mad, quantiles(N_QUANTILES개)를 함께 넣습니다.
+    """
+    reference_data = {}
+    ages = sorted({age for age, _ in group_rows})
+    genders = sorted({gender for _, gender in group_rows})
+
+    for age in ages:
+        for gender in genders:
+            if group_rows.get((age, gender), 0) < MIN_GROUP_SIZE:
+                continue
+
+            for item_name in MEASUREMENT_MAPPING:
+                stats = item_stats.get((age, gender, item_name))
+                if stats is None or stats[0] < MIN_ITEM_COUNT:
+                    continue
+
+                count, mean, m2, minimum, maximum = stats
+                std = float(np.sqrt(m2 / (count - 1)))
+                reference_data[(int(age), gender, item_name)] = {
+                    'mean': float(mean),
+                    'std': std if std > 0 else 1.0,  # 0 방지
+                    'count': int(count),
+                    'min': float(minimum),
+                    'max': float(maximum)
+                }
+
+                hist = item_hist.get((age, gender, item_name)) if item_hist else None
+                if hist:
+                    median, mad, quantiles = sketch_summary(hist)
+                    reference_data[(int(age), gender, item_name)].update({
+                        'median': median,
+                        'mad': mad,
+                        'quantiles': quantiles
+                    })
 
-for age in ages:
-    for gender in genders:
+    return reference_data
+
+
+def merge_sufficient_stats(stats, batch):
+    """
+    누적 통계량에 새 배치 통계량 병합 (배치 크기에 비례하는 시간)
+
+    Parameters:
+    -----------
+    stats : dict
+        load_sufficient_stats() 결과
+    batch : tuple
+        aggregate_measurements() 결과 (group_rows, item_stats, item_hist, total_rows)
+    """
+    group_rows, item_stats, item_hist, total_rows = batch
+    merge_partials((stats['group_rows'], stats['item_stats'], stats['item_hist']),
+                   (group_rows, item_stats, item_hist))
+    stats['total_rows'] += total_rows
+    return stats
+
+
+def save_sufficient_stats(stats, path=STATS_FILE):
+    """누적 통계량 저장 (임시 파일에 쓴 뒤 교체)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(stats, f)
+    os.replace(tmp_path, path)
+
+
+def load_sufficient_stats(path=STATS_FILE):
+    """
+    누적 통계량 로드
+
+    Returns:
+    --------
+    dict : {'version', 'group_rows', 'item_stats', 'item_hist', 'total_rows', 'sources'}
+    """
+    with open(path, 'rb') as f:
+        stats = pickle.load(f)
+
+    if stats.get('version') != STATS_VERSION:
+        raise ValueError(f"지원하지 않는 통계량 파일 버전: {stats.get('version')} "
+                         f"(전체 재생성 필요: --update 없이 실행)")
+
+    return stats
+
+
+def source_info(csv_path, rows):
+    """집계에 사용한 원본 파일 기록 (중복 병합 방지용)"""
+    return {
+        'file': os.path.basename(csv_path),
+        'size': os.path.getsize(csv_path),
+        'rows': rows,
+        'added_at': datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def diff_reference_data(old, new, tolerance=DEFAULT_TOLERANCE):
+    """
+    이전/새 참조 테이블 비교
+
+    평균 변화가 이전 표준편차의 tolerance배를 넘거나,
+    표준편차가 tolerance 비율 이상 바뀐 그룹, 새로 생기거나 빠진 그룹을 반환합니다.
+
+    Returns:
+    --------
+    list : [{'나이', '성별', '측정항목', '변경', ...}, ...]
+    """
+    rows = []
+
+    for key in sorted(set(old) | set(new)):
+        before = old.get(key)
+        after = new.get(key)
+
+        if before is None or after is None:
+            change = '추가' if before is None else '삭제'
+            mean_shift = std_change = None
+        else:
+            mean_shift = (after['mean'] - before['mean']) / before['std']
+            std_change = (after['std'] - before['std']) / before['std']
+            if abs(mean_shift) <= tolerance and abs(std_change) <= tolerance:
+                continue
+            change = '변경'
+
+        rows.append({
+            '나이': key[0],
+            '성별': key[1],
+            '측정항목': key[2],
+            '변경': change,
+            '이전평균': before['mean'] if before else None,
+            '새평균': after['mean'] if after else None,
+            '평균변화(표준편차 단위)': mean_shift,
+            '이전표준편차': before['std'] if before else None,
+            '새표준편차': after['std'] if after else None,
+            '표준편차변화율': std_change,
+            '이전샘플수': before['count'] if before else 0,
+            '새샘플수': after['count'] if after else 0,
+        })
+
+    return rows
+
+
+def build_axis_reference(reference_data):
+    """3축(strength/flexibility/endurance) 통합 참조 계산"""
+    axis_reference = {}
+    age_genders = sorted({(age, gender) for age, gender, _ in reference_data})
+
+    for age, gender in age_genders:
         for axis, items in AXIS_ITEMS.items():
             # 해당 축의 모든 항목 평균값 수집
-            axis_values = []
-
-            for item in items:
-                key = (int(age), gender, item)
-                if key in reference_data:
-                    # 각 항목별로 표준화된 값의 평균
-                    axis_values.append({
-                        'mean': reference_data[key]['mean'],
-                        'std': reference_data[key]['std'],
-                        'count': reference_data[key]['count']
-                    })
+            axis_values = [reference_data[(age, gender, item)] for item in items
+                           if (age, gender, item) in reference_data]
 
             if axis_values:
                 # 가중 평균 (샘플 수 기반)
                 total_count = sum(v['count'] for v in axis_values)
 
-                axis_reference[(int(age), gender, axis)] = {
+                axis_reference[(age, gender, axis)] = {
                     'items': len(axis_values),
                     'total_count': total_count,
                     # 참고용 평균 (실제로는 각 항목별 계산 사용)
@@ -113,69 +442,173 @@ for age in ages:
                     'avg_std': np.mean([v['std'] for v in axis_values])
                 }
 
-print(f">> 3축 통합 참조: {len(axis_reference)} 항목")
-
-# 5. 통계 정보
-print("\n[5단계] 통계 정보")
-unique_ages = set(k[0] for k in reference_data.keys())
-unique_genders = set(k[1] for k in reference_data.keys())
-unique_items = set(k[2] for k in reference_data.keys())
-
-print(f">> 연령 범위: {min(unique_ages)}세 ~ {max(unique_ages)}세")
-print(f">> 성별: {sorted(unique_genders)}")
-print(f">> 측정 항목: {sorted(unique_items)}")
-print(f">> 총 참조 항목: {len(reference_data)}")
-
-# 6. 샘플 출력
-print("\n>> 샘플 데이터 (25세 남성):")
-for item in ['grip_right', 'sit_and_reach', 'vo2max']:
-    key = (25, 'M', item)
-    if key in reference_data:
-        data = reference_data[key]
-        print(f"   {item:20s}: 평균={data['mean']:7.2f}, 표준편차={data['std']:6.2f}, 샘플={data['count']:4d}, 범위=[{data['min']:.1f}~{data['max']:.1f}]")
-
-# 7. JSON 저장
-print("\n[6단계] JSON 형식 저장")
-json_data = {}
-for key, value in reference_data.items():
-    str_key = f"{key[0]}_{key[1]}_{key[2]}"
-    json_data[str_key] = value
-
-with open('fitdna_original_reference.json', 'w', encoding='utf-8') as f:
-    json.dump(json_data, f, indent=2, ensure_ascii=False)
-print(">> 저장 완료: fitdna_original_reference.json")
-
-# 8. Pickle 저장
-print("\n[7단계] Pickle 형식 저장")
-with open('fitdna_original_reference.pkl', 'wb') as f:
-    pickle.dump(reference_data, f)
-print(">> 저장 완료: fitdna_original_reference.pkl")
-
-# 9. CSV 저장
-print("\n[8단계] CSV 형식 저장")
-csv_rows = []
-for key, value in reference_data.items():
-    csv_rows.append({
-        '나이': key[0],
-        '성별': key[1],
-        '측정항목': key[2],
-        '평균': value['mean'],
-        '표준편차': value['std'],
-        '최소값': value['min'],
-        '최대값': value['max'],
-        '샘플수': value['count']
-    })
-
-csv_df = pd.DataFrame(csv_rows)
-csv_df = csv_df.sort_values(['나이', '성별', '측정항목'])
-csv_df.to_csv('fitdna_original_reference.csv', index=False, encoding='utf-8-sig')
-print(">> 저장 완료: fitdna_original_reference.csv")
-
-print("\n" + "=" * 70)
-print("원본 측정 데이터 기반 참조 테이블 생성 완료!")
-print("=" * 70)
-print("\n생성된 파일:")
-print("1. fitdna_original_reference.json  - JSON 형식 (웹 API용)")
-print("2. fitdna_original_reference.pkl   - Pickle 형식 (Python용)")
-print("3. fitdna_original_reference.csv   - CSV 형식 (확인용)")
-print("\n이제 사용자 측정값(kg, cm) → Z-Score → FIT-DNA 계산 가능!")
+    return axis_reference
+
+
+# ============================================================
+# 저장
+# ============================================================
+
+def save_reference_files(reference_data, prefix='fitdna_original_reference'):
+    """JSON / Pickle / CSV / 바이너리 형식으로 저장"""
+    print("\n[6단계] JSON 형식 저장")
+    json_data = {}
+    for key, value in reference_data.items():
+        str_key = f"{key[0]}_{key[1]}_{key[2]}"
+        json_data[str_key] = value
+
+    with open(f'{prefix}.json', 'w', encoding='utf-8') as f:
+        json.dump(json_data, f, indent=2, ensure_ascii=False)
+    print(f">> 저장 완료: {prefix}.json")
+
+    print("\n[7단계] Pickle 형식 저장")
+    with open(f'{prefix}.pkl', 'wb') as f:
+        pickle.dump(reference_data, f)
+    print(f">> 저장 완료: {prefix}.pkl")
+
+    print("\n[8단계] CSV 형식 저장")
+    csv_rows = []
+    for key, value in reference_data.items():
+        csv_rows.append({
+            '나이': key[0],
+            '성별': key[1],
+            '측정항목': key[2],
+            '평균': value['mean'],
+            '표준편차': value['std'],
+            '최소값': value['min'],
+            '최대값': value['max'],
+            '중앙값': value.get('median'),
+            'MAD': value.get('mad'),
+            '샘플수': value['count']
+        })
+
+    csv_df = pd.DataFrame(csv_rows)
+    csv_df = csv_df.sort_values(['나이', '성별', '측정항목'])
+    csv_df.to_csv(f'{prefix}.csv', index=False, encoding='utf-8-sig')
+    print(f">> 저장 완료: {prefix}.csv")
+
+    # 워커 mmap 공유용
+    print("\n[9단계] 바이너리 형식 저장")
+    ReferenceTable.from_dict(reference_data).save_binary(f'{prefix}.bin')
+    print(f">> 저장 완료: {prefix}.bin")
+
+
+def main(csv_path=SOURCE_CSV, chunksize=DEFAULT_CHUNKSIZE, workers=1,
+         update=False, tolerance=DEFAULT_TOLERANCE):
+    print("=" * 70)
+    print("원본 측정 데이터 기반 참조 테이블 " + ("업데이트" if update else "생성"))
+    print("=" * 70)
+
+    # 이전 참조 테이블 (변경 리포트용)
+    previous_reference = None
+    if os.path.exists(f'{OUTPUT_PREFIX}.pkl'):
+        with open(f'{OUTPUT_PREFIX}.pkl', 'rb') as f:
+            previous_reference = pickle.load(f)
+
+    if update:
+        stats = load_sufficient_stats()
+        batch_name = os.path.basename(csv_path)
+        batch_size = os.path.getsize(csv_path)
+        if any(src['file'] == batch_name and src['size'] == batch_size for src in stats['sources']):
+            raise SystemExit(f">> 이미 병합된 배치입니다: {batch_name}")
+        print(f">> 누적 통계량: {stats['total_rows']:,}건, 원본 {len(stats['sources'])}개")
+
+    # 1~3. 청크 스트리밍 + 그룹 집계
+    print("\n[1단계] 원본 측정 데이터 스트리밍 집계")
+    print(f">> 매핑된 측정 항목: {len(MEASUREMENT_MAPPING)}개")
+    print(f">> 청크 크기: {chunksize:,}행, 워커: {workers}개")
+    start = time.perf_counter()
+    batch = aggregate_measurements(csv_path, chunksize, workers)
+    elapsed = time.perf_counter() - start
+    print(f">> 로드 완료: {batch[-1]:,}건 ({elapsed:.1f}초)")
+
+    print("\n[2단계] 누적 통계량 " + ("병합" if update else "저장"))
+    if update:
+        merge_sufficient_stats(stats, batch)
+    else:
+        group_rows, item_stats, item_hist, total_rows = batch
+        stats = {
+            'version': STATS_VERSION,
+            'group_rows': group_rows,
+            'item_stats': item_stats,
+            'item_hist': item_hist,
+            'total_rows': total_rows,
+            'sources': [],
+        }
+    stats['sources'].append(source_info(csv_path, batch[-1]))
+    save_sufficient_stats(stats)
+    print(f">> 저장 완료: {STATS_FILE} (누적 {stats['total_rows']:,}건)")
+
+    print("\n[3단계] 연령×성별 그룹별 통계 계산")
+    reference_data = build_reference_data(stats['group_rows'], stats['item_stats'], stats['item_hist'])
+    print(f">> 계산 완료: {len(reference_data)} 항목")
+
+    # 4. 3축(strength/flexibility/endurance) 통합 참조 계산
+    print("\n[4단계] 3축 통합 참조 테이블 생성")
+    axis_reference = build_axis_reference(reference_data)
+    print(f">> 3축 통합 참조: {len(axis_reference)} 항목")
+
+    # 5. 통계 정보
+    print("\n[5단계] 통계 정보")
+    unique_ages = set(k[0] for k in reference_data.keys())
+    unique_genders = set(k[1] for k in reference_data.keys())
+    unique_items = set(k[2] for k in reference_data.keys())
+
+    print(f">> 연령 범위: {min(unique_ages)}세 ~ {max(unique_ages)}세")
+    print(f">> 성별: {sorted(unique_genders)}")
+    print(f">> 측정 항목: {sorted(unique_items)}")
+    print(f">> 총 참조 항목: {len(reference_data)}")
+
+    # 샘플 출력
+    print("\n>> 샘플 데이터 (25세 남성):")
+    for item in ['grip_right', 'sit_and_reach', 'vo2max']:
+        key = (25, 'M', item)
+        if key in reference_data:
+            data = reference_data[key]
+            print(f"   {item:20s}: 평균={data['mean']:7.2f}, 표준편차={data['std']:6.2f}, 샘플={data['count']:4d}, 범위=[{data['min']:.1f}~{data['max']:.1f}]")
+
+    # 6~9. 저장
+    save_reference_files(reference_data)
+
+    # 10. 변경 리포트
+    if previous_reference is not None:
+        print(f"\n[10단계] 변경 리포트 (허용치 {tolerance})")
+        diff_rows = diff_reference_data(previous_reference, reference_data, tolerance)
+        columns = ['나이', '성별', '측정항목', '변경', '이전평균', '새평균', '평균변화(표준편차 단위)',
+                   '이전표준편차', '새표준편차', '표준편차변화율', '이전샘플수', '새샘플수']
+        pd.DataFrame(diff_rows, columns=columns).to_csv(DIFF_REPORT_FILE, index=False, encoding='utf-8-sig')
+        for row in diff_rows[:10]:
+            if row['변경'] == '변경':
+                print(f"   {row['나이']}세 {row['성별']} {row['측정항목']:20s}: "
+                      f"평균 {row['이전평균']:.2f}→{row['새평균']:.2f}, "
+                      f"표준편차 {row['이전표준편차']:.2f}→{row['새표준편차']:.2f}")
+            else:
+                print(f"   {row['나이']}세 {row['성별']} {row['측정항목']:20s}: {row['변경']}")
+        print(f">> 허용치 초과 그룹: {len(diff_rows)}개 → {DIFF_REPORT_FILE}")
+
+    print("\n" + "=" * 70)
+    print("원본 측정 데이터 기반 참조 테이블 생성 완료!")
+    print("=" * 70)
+    print("\n생성된 파일:")
+    print("1. fitdna_original_reference.json  - JSON 형식 (웹 API용)")
+    print("2. fitdna_original_reference.pkl   - Pickle 형식 (Python용)")
+    print("3. fitdna_original_reference.csv   - CSV 형식 (확인용)")
+    print("4. fitdna_original_reference.bin   - 바이너리 형식 (서버 mmap 로드용)")
+    print("5. fitdna_original_reference_stats.pkl - 누적 통계량 (증분 업데이트용)")
+    print("\n이제 사용자 측정값(kg, cm) → Z-Score → FIT-DNA 계산 가능!")
+
+    return reference_data
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="원본 측정 데이터 기반 참조 테이블 생성")
+    parser.add_argument('csv_path', nargs='?', default=SOURCE_CSV, help="원본 측정 데이터 CSV")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help="청크당 행 수")
+    parser.add_argument('--workers', type=int, default=1, help="청크 집계 프로세스 수")
+    parser.add_argument('--update', action='store_true',
+                        help=f"전체 재계산 대신 새 배치를 {STATS_FILE}에 병합")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="변경 리포트 기준 (평균: 표준편차 단위, 표준편차: 상대 변화)")
+    args = parser.parse_args()
+
+    main(args.csv_path, args.chunksize, args.workers, args.update, args.tolerance)
@@ -6,6 +6,12 @@ from scipy.spatial.distance import euclidean, cosine, cityblock
 from scipy.cluster.hierarchy import dendrogram, linkage
 import networkx as nx
 import warnings
+
+from fitdna_matching import (
+    TYPE_CODES, set_type_distance_matrix,
+    get_similarity_level, recommend_matches, calculate_matching_score,
+)
+
 warnings.filterwarnings('ignore')
 
 # 한글 폰트 설정
@@ -43,20 +49,6 @@ def calculate_manhattan_distance(vec1, vec2):
     """맨하탄 거리 계산 (낮을수록 유사)"""
     return cityblock(vec1, vec2)
 
-def get_similarity_level(euclidean_dist):
-    """
-    유클리드 거리 기준으로 유사도 레벨 분류
-    - 레벨 1 (매우 유사): 거리 < 1.2
-    - 레벨 2 (유사): 거리 1.2 ~ 2.0
-    - 레벨 3 (다름): 거리 > 2.0
-    """
-    if euclidean_dist < 1.2:
-        return "레벨 1 (매우 유사)"
-    elif euclidean_dist < 2.0:
-        return "레벨 2 (유사)"
-    else:
-        return "레벨 3 (다름)"
-
 # ============================================================================
 # 유형 간 유사도 행렬 생성
 # ============================================================================
@@ -95,97 +87,8 @@ euclidean_df.to_csv('matching_euclidean_distance_matrix.csv', encoding='utf-8-si
 cosine_df.to_csv('matching_cosine_similarity_matrix.csv', encoding='utf-8-sig')
 print("\n>> 유사도 행렬 CSV 저장 완료")
 
-# ============================================================================
-# 매칭 추천 함수
-# ============================================================================
-
-def recommend_matches(user_fitdna, top_n=3, similarity_level='all'):
-    """
-    주어진 FIT-DNA 유형에 대해 유사한 유형을 추천
-
-    Parameters:
-    -----------
-    user_fitdna : str
-        사용자의 FIT-DNA 유형 (예: 'PFE')
-    top_n : int
-        추천할 유형 개수
-    similarity_level : str
-        'level1' (매우 유사만), 'level2' (유사까지), 'all' (전체)
-
-    Returns:
-    --------
-    list : 추천 유형 리스트 [(유형, 거리, 레벨), ...]
-    """
-    if user_fitdna not in type_names:
-        return []
-
-    # 해당 유형의 거리 가져오기
-    distances = euclidean_df.loc[user_fitdna].copy()
-
-    # 자기 자신 제외
-    distances = distances[distances.index != user_fitdna]
-
-    # 정렬
-    distances = distances.sort_values()
-
-    # 유사도 레벨 필터링
-    if similarity_level == 'level1':
-        distances = distances[distances < 1.2]
-    elif similarity_level == 'level2':
-        distances = distances[distances < 2.0]
-
-    # 상위 N개 추출
-    recommendations = []
-    for type_name, dist in distances.head(top_n).items():
-        level = get_similarity_level(dist)
-        recommendations.append((type_name, dist, level))
-
-    return recommendations
-
-# ============================================================================
-# 개인 간 매칭 점수 계산 함수
-# ============================================================================
-
-def calculate_matching_score(user1_zscore, user2_zscore,
-                              user1_fitdna, user2_fitdna,
-                              exercise_match=True):
-    """
-    두 사용자 간 매칭 점수 계산
-
-    Parameters:
-    -----------
-    user1_zscore : array-like
-        사용자1의 [strength_z, flex_z, endurance_z]
-    user2_zscore : array-like
-        사용자2의 [strength_z, flex_z, endurance_z]
-    user1_fitdna : str
-        사용자1의 FIT-DNA 유형
-    user2_fitdna : str
-        사용자2의 FIT-DNA 유형
-    exercise_match : bool
-        운동 선호도가 일치하는지 (추가 가중치)
-
-    Returns:
-    --------
-    float : 매칭 점수 (0~100)
-    """
-    # 1. Z-Score 유사도 (유클리드 거리 → 점수 변환)
-    zscore_distance = euclidean(user1_zscore, user2_zscore)
-    # 거리 0~3을 점수 100~0으로 변환
-    zscore_score = max(0, 100 - (zscore_distance / 3.0 * 100))
-
-    # 2. FIT-DNA 유형 유사도
-    fitdna_distance = euclidean_df.loc[user1_fitdna, user2_fitdna]
-    fitdna_score = max(0, 100 - (fitdna_distance / 3.0 * 100))
-
-    # 3. 가중 평균 (Z-Score 60%, FIT-DNA 40%)
-    base_score = zscore_score * 0.6 + fitdna_score * 0.4
-
-    # 4. 운동 선호도 보너스
-    if exercise_match:
-        base_score = min(100, base_score * 1.1)  # 10% 보너스
-
-    return round(base_score, 2)
+# 매칭 추천·점수는 백엔드와 같은 fitdna_matching 모듈 식을 이번 데이터의 거리 행렬로 사용
+set_type_distance_matrix(euclidean_df.loc[list(TYPE_CODES), list(TYPE_CODES)].values)
 
 # ============================================================================
 # 매칭 예시 생성
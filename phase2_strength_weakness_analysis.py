@@ -96,19 +96,61 @@ def get_strength_weakness(strength_z, flex_z, endurance_z):
         'std': std
     }
 
-def get_percentile_within_type(fitdna_type, strength_z, flex_z, endurance_z, df):
+ZSCORE_COLUMNS = ['strength_z', 'flex_z', 'endurance_z']
+
+def get_type_sorted_zscores(fitdna_type, df):
+    """
+    FIT-DNA 유형 하나의 축별 정렬된 Z-Score 배열 {축 컬럼: np.ndarray}
+    """
+    same_type_df = df[df['FIT_DNA'] == fitdna_type]
+    return {
+        col: np.sort(same_type_df[col].dropna().to_numpy(dtype=float))
+        for col in ZSCORE_COLUMNS
+    }
+
+def build_type_sorted_zscores(df):
+    """
+    전체 유형의 축별 정렬된 Z-Score 배열 {유형: {축 컬럼: np.ndarray}}
+    데이터프레임마다 한 번 만들어 get_percentile_within_type(type_sorted=...)에 전달
+    """
+    return {
+        fitdna_type: {
+            col: np.sort(type_df[col].dropna().to_numpy(dtype=float))
+            for col in ZSCORE_COLUMNS
+        }
+        for fitdna_type, type_df in df.groupby('FIT_DNA')
+    }
+
+def sorted_percentileofscore(sorted_values, score):
+    """
+    정렬된 배열에서 이분 탐색으로 백분위 계산
+    stats.percentileofscore(kind='rank')와 같은 값
+    """
+    n = len(sorted_values)
+    if n == 0:
+        return np.nan
+    left = np.searchsorted(sorted_values, score, side='left')
+    right = np.searchsorted(sorted_values, score, side='right')
+    plus1 = 1 if left < right else 0
+    return (left + right + plus1) * (50.0 / n)
+
+def get_percentile_within_type(fitdna_type, strength_z, flex_z, endurance_z, df, type_sorted=None):
     """
     같은 FIT-DNA 유형 내에서의 백분위 계산
+    (type_sorted: build_type_sorted_zscores(df) 결과, 주면 호출마다 전체 데이터를 훑지 않음)
 
     Returns:
     --------
     dict : 각 축별 백분위 (0~100)
     """
-    same_type_df = df[df['FIT_DNA'] == fitdna_type]
+    if type_sorted is not None:
+        sorted_zscores = type_sorted.get(fitdna_type) or get_type_sorted_zscores(fitdna_type, df)
+    else:
+        sorted_zscores = get_type_sorted_zscores(fitdna_type, df)
 
-    strength_percentile = stats.percentileofscore(same_type_df['strength_z'].dropna(), strength_z)
-    flex_percentile = stats.percentileofscore(same_type_df['flex_z'].dropna(), flex_z)
-    endurance_percentile = stats.percentileofscore(same_type_df['endurance_z'].dropna(), endurance_z)
+    strength_percentile = sorted_percentileofscore(sorted_zscores['strength_z'], strength_z)
+    flex_percentile = sorted_percentileofscore(sorted_zscores['flex_z'], flex_z)
+    endurance_percentile = sorted_percentileofscore(sorted_zscores['endurance_z'], endurance_z)
 
     return {
         '근력': round(strength_percentile, 1),
@@ -116,7 +158,7 @@ def get_percentile_within_type(fitdna_type, strength_z, flex_z, endurance_z, df)
         '지구력': round(endurance_percentile, 1)
     }
 
-def generate_feedback_text(fitdna_type, strength_z, flex_z, endurance_z, df):
+def generate_feedback_text(fitdna_type, strength_z, flex_z, endurance_z, df, type_sorted=None):
     """
     개인 맞춤 피드백 텍스트 생성
 
@@ -125,7 +167,7 @@ def generate_feedback_text(fitdna_type, strength_z, flex_z, endurance_z, df):
     str : 피드백 텍스트
     """
     analysis = get_strength_weakness(strength_z, flex_z, endurance_z)
-    percentiles = get_percentile_within_type(fitdna_type, strength_z, flex_z, endurance_z, df)
+    percentiles = get_percentile_within_type(fitdna_type, strength_z, flex_z, endurance_z, df, type_sorted)
 
     feedback = []
     feedback.append(f"[{fitdna_type} 유형 분석 결과]\n")
@@ -229,13 +271,15 @@ print(f"\n>> {len(example_users)}개 유형에서 샘플 추출 완료")
 
 # 첫 3명 피드백 생성 (파일로만 저장, 콘솔 출력 제외)
 feedbacks_for_report = []
+type_sorted_zscores = build_type_sorted_zscores(df)
 for i, user in enumerate(example_users[:3], 1):
     feedback = generate_feedback_text(
         user['FIT_DNA'],
         user['strength_z'],
         user['flex_z'],
         user['endurance_z'],
-        df
+        df,
+        type_sorted_zscores
     )
     feedbacks_for_report.append((i, feedback))
 